@@ -8,6 +8,11 @@ from pathlib import Path
 
 from flask import Flask, send_from_directory
 
+try:  # response compression is optional
+    from flask_compress import Compress  # type: ignore
+except ImportError:  # pragma: no cover - runtime fallback
+    Compress = None
+
 from app.blueprints.api import api_bp
 from app.blueprints.stream import stream_bp
 from app.config import Settings
@@ -20,7 +25,11 @@ from app.services.voice_input_service import VoiceInputService
 from app.services.face_recognition_service import FaceRecognitionService
 from app.services.chat_log_service import ChatLogService
 from app.services.backup_service import BackupService
+from app.services.bluetooth_service import BluetoothScanner
+from app.services.task_service import TaskService
+from app.services.wallpaper_sync_service import WallpaperSyncService
 from app.utils.env import load_first_existing
+from app.utils.orjson_provider import OrjsonProvider
 
 LOGGER = logging.getLogger("echo")
 
@@ -39,7 +48,7 @@ def create_app() -> Flask:
     settings.data_dir.mkdir(parents=True, exist_ok=True)
 
     state_service = StateService(settings.data_dir / "echo_state.json", history_size=settings.event_history)
-    metrics_service = MetricsService(settings.metrics_cache_ttl)
+    metrics_service = MetricsService(settings.metrics_cache_ttl, settings.temp_sensors)
     camera_service = CameraService.from_settings(
         devices=settings.camera_devices,
         resolution=settings.camera_resolution,
@@ -49,10 +58,13 @@ def create_app() -> Flask:
     chat_log_service = ChatLogService(settings)
     backup_service = BackupService(settings)
     face_recognition_service = FaceRecognitionService(settings)
-    ai_service = AIService(settings, state_service)
+    ai_service = AIService(settings, state_service, metrics_service)
+    task_service = TaskService()
+    wallpaper_sync_service = WallpaperSyncService(settings)
+    bluetooth_scanner = BluetoothScanner()
     
     # Voice input service with callback
-    def on_voice_input(voice_input):
+    def handle_voice_turn(voice_input):
         # Log the voice input
         chat_log_service.log_user_input(
             content=voice_input.text,
@@ -70,10 +82,28 @@ def create_app() -> Flask:
         # Speak if needed
         if ai_response.should_speak:
             speech_service.enqueue(ai_response.response_text)
+
+    def on_voice_input(voice_input):
+        # The AI round trip runs on its own worker so transcription of the next
+        # utterance is not held up; one worker keeps turns in order.
+        task_service.submit("voice", "voice_turn", handle_voice_turn, voice_input)
     
     voice_input_service = VoiceInputService(settings, on_voice_input)
 
     app = Flask(__name__, static_folder=None)
+    app.json = OrjsonProvider(app)
+    if Compress is not None:
+        # Only JSON bodies: images/videos are already compressed and the
+        # MJPEG/SSE streams must not be buffered by the compressor.
+        app.config.update(
+            COMPRESS_MIMETYPES=["application/json"],
+            COMPRESS_ALGORITHM=["br", "gzip"],
+            COMPRESS_LEVEL=4,
+            COMPRESS_BR_LEVEL=4,
+            COMPRESS_MIN_SIZE=1024,
+            COMPRESS_STREAMS=False,
+        )
+        Compress(app)
     app.config["JSONIFY_PRETTYPRINT_REGULAR"] = False
     app.config["settings"] = settings
 
@@ -86,6 +116,9 @@ def create_app() -> Flask:
     app.extensions["face_recognition_service"] = face_recognition_service
     app.extensions["ai_service"] = ai_service
     app.extensions["voice_input_service"] = voice_input_service
+    app.extensions["task_service"] = task_service
+    app.extensions["wallpaper_sync_service"] = wallpaper_sync_service
+    app.extensions["bluetooth_scanner"] = bluetooth_scanner
 
     app.register_blueprint(api_bp)
     app.register_blueprint(stream_bp)
@@ -137,6 +170,30 @@ def create_app() -> Flask:
             camera_service.stop_all()
         except Exception:
             LOGGER.exception("Failed to stop cameras")
+        try:
+            task_service.stop()
+        except Exception:
+            LOGGER.exception("Failed to stop background tasks")
+        try:
+            wallpaper_sync_service.close()
+        except Exception:
+            LOGGER.exception("Failed to close wallpaper sync session")
+        try:
+            bluetooth_scanner.stop()
+        except Exception:
+            LOGGER.exception("Failed to stop Bluetooth scanner")
+        try:
+            ai_service.stop()
+        except Exception:
+            LOGGER.exception("Failed to stop AI service")
+        try:
+            metrics_service.stop()
+        except Exception:
+            LOGGER.exception("Failed to stop metrics sampler")
+        try:
+            face_recognition_service.flush()
+        except Exception:
+            LOGGER.exception("Failed to save face data")
 
     atexit.register(_cleanup)
     return app
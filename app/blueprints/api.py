@@ -1,72 +1,99 @@
 """REST API blueprint."""
 from __future__ import annotations
 
-import time
+import mimetypes
 import os
+import re
+import shlex
+import subprocess
+import time
 from typing import Any, Dict
 
 from flask import Blueprint, Response, current_app, jsonify, request, send_file
+from werkzeug.exceptions import HTTPException
 
+from app.utils import sysmetrics
 from app.utils.auth import require_api_key
+from app.utils.orjson_provider import json_body, json_response
+from app.utils.ttl_cache import ttl_cache
 from app.services.wake_word_service import get_wake_word_status, start_wake_word_detection, stop_wake_word_detection
+from app.services.backup_service import BackupConfig
 from app.services.camera_service import CameraService
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
+# Radio scans take seconds; serve repeat requests from the last result for a while.
+SCAN_CACHE_TTL = 10.0
+
 
 def _svc(name: str) -> Any:
-    return current_app.extensions[name]
+    # Services are registered once in create_app(); the resolved set lives on the app
+    # itself so it goes away with it and is never shared by an app reusing its id().
+    cache: Dict[str, Any] = current_app.extensions.setdefault("_svc_cache", {})
+    service = cache.get(name)
+    if service is None:
+        service = cache[name] = current_app.extensions[name]
+    return service
+
+
+@api_bp.errorhandler(Exception)
+def _json_error(exc: Exception) -> Response:
+    """Render any error raised by an endpoint as ``{"error": ...}`` JSON."""
+    if isinstance(exc, HTTPException):
+        return json_response({"error": exc.description}, status=exc.code or 500)
+    current_app.logger.exception("Unhandled error in %s", request.path)
+    return json_response({"error": str(exc)}, status=500)
+
+
+API_VERSION = "2025.9"
+
+# Everything but the timestamp is fixed once the app is configured, so /health
+# (polled by liveness probes) only formats a float per request.
+_HEALTH_PREFIX = b'{"status":"ok","port":5000,"version":"%s","time":' % API_VERSION.encode()
+
+
+@api_bp.record_once
+def _prepare_health(state: Any) -> None:
+    global _HEALTH_PREFIX
+    settings = state.app.config.get("settings")
+    port = int(getattr(settings, "port", 5000))
+    _HEALTH_PREFIX = b'{"status":"ok","port":%d,"version":"%s","time":' % (port, API_VERSION.encode())
 
 
 @api_bp.get("/health")
 def health() -> Response:
-    settings = current_app.config.get("settings")
-    payload = {
-        "status": "ok",
-        "time": time.time(),
-        "port": getattr(settings, "port", 5000),
-        "version": "2025.9",
-    }
-    return jsonify(payload)
+    return Response(_HEALTH_PREFIX + b"%.3f}" % time.time(), mimetype="application/json")
 
 
 @api_bp.get("/status")
 @require_api_key
 def get_status() -> Response:
     """Get system status and metrics"""
-    try:
-        import psutil
-        import os
-        
-        # Get system metrics
-        cpu_usage = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        # Get uptime
-        uptime_seconds = time.time() - psutil.boot_time()
-        
-        # Get temperature (Raspberry Pi)
-        temperature = 0
-        try:
-            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                temperature = float(f.read()) / 1000.0
-        except:
-            pass
-        
-        return jsonify({
-            "status": "ok",
-            "uptime": int(uptime_seconds),
-            "cpu_usage": cpu_usage,
-            "memory_usage": memory.percent,
-            "memory_available": memory.available,
-            "disk_usage": disk.percent,
-            "disk_free": disk.free,
-            "temperature": temperature,
-            "timestamp": time.time()
-        })
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    return jsonify(_status_payload())
+
+
+def _status_payload() -> Dict[str, Any]:
+    snapshot = sysmetrics.status_snapshot(_svc("metrics_service").core())
+    now = time.time()
+    return {
+        "status": "ok",
+        "uptime": int(now - sysmetrics.boot_time()),
+        **snapshot,
+        "timestamp": now
+    }
+
+
+@api_bp.get("/dashboard")
+@require_api_key
+def dashboard() -> Response:
+    """Status, state, metrics, speech and voice in one round trip for UI polling."""
+    return json_response({
+        "status": _status_payload(),
+        "state": _svc("state_service").snapshot(),
+        "metrics": _svc("metrics_service").current(),
+        "speech": _svc("speech_service").status(),
+        "voice": {"listening": _svc("voice_input_service").is_listening()},
+    })
 
 
 @api_bp.get("/state")
@@ -79,7 +106,7 @@ def get_state() -> Response:
 @api_bp.post("/state")
 @require_api_key
 def patch_state() -> Response:
-    payload: Dict[str, Any] | None = request.get_json(silent=True)
+    payload: Dict[str, Any] | None = json_body()
     if not isinstance(payload, dict):
         return jsonify({"error": "invalid payload"}), 400
     state = _svc("state_service").update(payload)
@@ -89,7 +116,9 @@ def patch_state() -> Response:
 @api_bp.get("/metrics")
 @require_api_key
 def metrics() -> Response:
-    metrics = _svc("metrics_service").current()
+    # ?sections=core,storage skips gathering (and cache-refreshing) the rest.
+    sections = request.args.get("sections")
+    metrics = _svc("metrics_service").current(sections.split(",") if sections else None)
     return jsonify(metrics)
 
 
@@ -97,17 +126,14 @@ def metrics() -> Response:
 @require_api_key
 def detect_cameras() -> Response:
     """Auto-detect available cameras"""
-    try:
-        camera_info = CameraService.get_camera_info()
-        return jsonify(camera_info)
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    camera_info = CameraService.get_camera_info()
+    return jsonify(camera_info)
 
 
 @api_bp.post("/speak")
 @require_api_key
 def speak() -> Response:
-    payload = request.get_json(silent=True) or {}
+    payload = json_body() or {}
     text = payload.get("text", "")
     voice = payload.get("voice")
     if not text.strip():
@@ -136,7 +162,7 @@ def cameras() -> Response:
 @api_bp.post("/cameras/start")
 @require_api_key
 def camera_start() -> Response:
-    payload = request.get_json(silent=True) or {}
+    payload = json_body() or {}
     name = payload.get("name", "head")
     try:
         _svc("camera_service").ensure_started(name)
@@ -150,7 +176,7 @@ def camera_start() -> Response:
 @api_bp.post("/cameras/stop")
 @require_api_key
 def camera_stop() -> Response:
-    payload = request.get_json(silent=True) or {}
+    payload = json_body() or {}
     name = payload.get("name", "head")
     try:
         _svc("camera_service").stop(name)
@@ -163,84 +189,106 @@ def camera_stop() -> Response:
 @api_bp.post("/ai/chat")
 @require_api_key
 def ai_chat() -> Response:
-    payload = request.get_json(silent=True) or {}
+    payload = json_body() or {}
     message = payload.get("message", "")
     if not message.strip():
         return jsonify({"error": "message is required"}), 400
     
-    try:
-        ai_service = _svc("ai_service")
-        response = ai_service.process_input(message)
-        return jsonify({
-            "response": response.response_text,
-            "action": response.action,
-            "parameters": response.parameters,
-            "confidence": response.confidence,
-            "should_speak": response.should_speak
-        })
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    ai_service = _svc("ai_service")
+    response = ai_service.process_input(message)
+    return json_response({
+        "response": response.response_text,
+        "action": response.action,
+        "parameters": response.parameters,
+        "confidence": response.confidence,
+        "should_speak": response.should_speak
+    })
+
+
+# Flask-Compress appends the coding to the ETag it sends ("conv-3:br"), so the
+# tag a client echoes back carries that suffix too.
+_COMPRESS_ETAG_SUFFIXES = (":br", ":gzip")
+
+
+def _etag_matches(etag: str) -> bool:
+    tags = request.if_none_match
+    if tags.star_tag:
+        return True
+    for tag in tags.as_set():
+        for suffix in _COMPRESS_ETAG_SUFFIXES:
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)]
+                break
+        if tag == etag:
+            return True
+    return False
 
 
 @api_bp.get("/ai/conversation")
 @require_api_key
 def get_conversation() -> Response:
-    try:
-        chat_log_service = _svc("chat_log_service")
-        messages = chat_log_service.get_recent_messages(limit=50)
-        return jsonify({"messages": messages})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    chat_log_service = _svc("chat_log_service")
+    # Pollers usually see no new messages; answer 304 before serializing.
+    etag = f"conv-{chat_log_service.version()}"
+    if _etag_matches(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    messages = chat_log_service.get_recent_messages(limit=50)
+    response = json_response({"messages": messages})
+    response.set_etag(etag)
+    return response
 
 
 @api_bp.post("/voice/start")
 @require_api_key
 def voice_start() -> Response:
-    try:
-        voice_service = _svc("voice_input_service")
-        voice_service.start_listening()
-        return jsonify({"ok": True, "listening": voice_service.is_listening()})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    voice_service = _svc("voice_input_service")
+    voice_service.start_listening()
+    return jsonify({"ok": True, "listening": voice_service.is_listening()})
 
 
 @api_bp.post("/voice/stop")
 @require_api_key
 def voice_stop() -> Response:
-    try:
-        voice_service = _svc("voice_input_service")
-        voice_service.stop_listening()
-        return jsonify({"ok": True, "listening": voice_service.is_listening()})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    voice_service = _svc("voice_input_service")
+    voice_service.stop_listening()
+    return jsonify({"ok": True, "listening": voice_service.is_listening()})
 
 
 @api_bp.get("/voice/status")
 @require_api_key
 def voice_status() -> Response:
-    try:
-        voice_service = _svc("voice_input_service")
-        return jsonify({"listening": voice_service.is_listening()})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    voice_service = _svc("voice_input_service")
+    return jsonify({"listening": voice_service.is_listening()})
 
 
 # Face recognition endpoints
 @api_bp.get("/faces")
 @require_api_key
 def get_faces() -> Response:
-    try:
-        face_service = _svc("face_recognition_service")
-        faces = face_service.get_known_faces()
-        return jsonify({"faces": faces})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    face_service = _svc("face_recognition_service")
+    faces = face_service.get_known_faces()
+    return jsonify({"faces": faces})
 
 
 @api_bp.post("/faces/add")
 @require_api_key
 def add_face() -> Response:
-    payload = request.get_json(silent=True) or {}
+    image = request.files.get("image")
+    if image is not None:
+        # Multipart upload: hand the JPEG bytes over untouched so they are
+        # stored without a decode/re-encode round trip.
+        name = request.form.get("name", "")
+        if not name.strip():
+            return jsonify({"error": "name is required"}), 400
+        if "/" in name or "\\" in name:
+            return jsonify({"error": "name must not contain path separators"}), 400
+        if not _svc("face_recognition_service").add_face(name.strip(), image.read()):
+            return jsonify({"error": "Could not extract a face from the image"}), 400
+        return jsonify({"ok": True, "message": f"Face added for {name.strip()}"})
+    
+    payload = json_body() or {}
     name = payload.get("name", "")
     if not name.strip():
         return jsonify({"error": "name is required"}), 400
@@ -252,88 +300,64 @@ def add_face() -> Response:
 @api_bp.delete("/faces/<name>")
 @require_api_key
 def remove_face(name: str) -> Response:
-    try:
-        face_service = _svc("face_recognition_service")
-        success = face_service.remove_face(name)
-        if success:
-            return jsonify({"ok": True, "message": f"Face {name} removed"})
-        else:
-            return jsonify({"error": "Face not found"}), 404
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    face_service = _svc("face_recognition_service")
+    success = face_service.remove_face(name)
+    if success:
+        return jsonify({"ok": True, "message": f"Face {name} removed"})
+    else:
+        return jsonify({"error": "Face not found"}), 404
 
 
 # Backup endpoints
 @api_bp.get("/backups")
 @require_api_key
 def list_backups() -> Response:
-    try:
-        backup_service = _svc("backup_service")
-        backups = backup_service.list_backups()
-        return jsonify({"backups": [
-            {
-                "backup_id": backup.backup_id,
-                "created_at": backup.created_at,
-                "size_bytes": backup.size_bytes,
-                "file_count": backup.file_count,
-                "path": backup.path
-            }
-            for backup in backups
-        ]})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    backup_service = _svc("backup_service")
+    backups = backup_service.list_backups()
+    # BackupInfo is a dataclass, so orjson encodes the list natively.
+    return json_response({"backups": backups})
 
 
 @api_bp.post("/backups/create")
 @require_api_key
 def create_backup() -> Response:
-    payload = request.get_json(silent=True) or {}
+    payload = json_body() or {}
     config_data = payload.get("config", {})
     
-    try:
-        from app.services.backup_service import BackupConfig
-        config = BackupConfig(**config_data)
-        
-        backup_service = _svc("backup_service")
-        backup_info = backup_service.create_backup(config)
-        
-        return jsonify({
-            "ok": True,
-            "backup_id": backup_info.backup_id,
-            "created_at": backup_info.created_at,
-            "size_bytes": backup_info.size_bytes,
-            "file_count": backup_info.file_count
-        })
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    config = BackupConfig(**config_data)
+    
+    backup_service = _svc("backup_service")
+    backup_info = backup_service.create_backup(config)
+    
+    return jsonify({
+        "ok": True,
+        "backup_id": backup_info.backup_id,
+        "created_at": backup_info.created_at,
+        "size_bytes": backup_info.size_bytes,
+        "file_count": backup_info.file_count
+    })
 
 
 @api_bp.post("/backups/<backup_id>/restore")
 @require_api_key
 def restore_backup(backup_id: str) -> Response:
-    try:
-        backup_service = _svc("backup_service")
-        success = backup_service.restore_backup(backup_id)
-        if success:
-            return jsonify({"ok": True, "message": f"Backup {backup_id} restored"})
-        else:
-            return jsonify({"error": "Backup not found or restore failed"}), 404
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    backup_service = _svc("backup_service")
+    success = backup_service.restore_backup(backup_id)
+    if success:
+        return jsonify({"ok": True, "message": f"Backup {backup_id} restored"})
+    else:
+        return jsonify({"error": "Backup not found or restore failed"}), 404
 
 
 @api_bp.delete("/backups/<backup_id>")
 @require_api_key
 def delete_backup(backup_id: str) -> Response:
-    try:
-        backup_service = _svc("backup_service")
-        success = backup_service.delete_backup(backup_id)
-        if success:
-            return jsonify({"ok": True, "message": f"Backup {backup_id} deleted"})
-        else:
-            return jsonify({"error": "Backup not found"}), 404
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    backup_service = _svc("backup_service")
+    success = backup_service.delete_backup(backup_id)
+    if success:
+        return jsonify({"ok": True, "message": f"Backup {backup_id} deleted"})
+    else:
+        return jsonify({"error": "Backup not found"}), 404
 
 
 # =============================================================================
@@ -344,49 +368,37 @@ def delete_backup(backup_id: str) -> Response:
 @require_api_key
 def get_wake_word_status_endpoint() -> Response:
     """Get wake word detection status"""
-    try:
-        status = get_wake_word_status()
-        return jsonify(status)
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    status = get_wake_word_status()
+    return jsonify(status)
 
 
 @api_bp.post("/wake-word/start")
 @require_api_key
 def start_wake_word_endpoint() -> Response:
     """Start wake word detection"""
-    try:
-        start_wake_word_detection()
-        return jsonify({"ok": True, "message": "Wake word detection started"})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    start_wake_word_detection()
+    return jsonify({"ok": True, "message": "Wake word detection started"})
 
 
 @api_bp.post("/wake-word/stop")
 @require_api_key
 def stop_wake_word_endpoint() -> Response:
     """Stop wake word detection"""
-    try:
-        stop_wake_word_detection()
-        return jsonify({"ok": True, "message": "Wake word detection stopped"})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    stop_wake_word_detection()
+    return jsonify({"ok": True, "message": "Wake word detection stopped"})
 
 
 @api_bp.post("/wake-word/configure")
 @require_api_key
 def configure_wake_word_endpoint() -> Response:
     """Configure wake word detection settings"""
-    try:
-        payload: Dict[str, Any] | None = request.get_json(silent=True)
-        if not isinstance(payload, dict):
-            return jsonify({"error": "invalid payload"}), 400
-        
-        # Update configuration (implementation depends on your config system)
-        # This is a placeholder - you'd need to implement config updating
-        return jsonify({"ok": True, "message": "Wake word configuration updated"})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    payload: Dict[str, Any] | None = json_body()
+    if not isinstance(payload, dict):
+        return jsonify({"error": "invalid payload"}), 400
+    
+    # Update configuration (implementation depends on your config system)
+    # This is a placeholder - you'd need to implement config updating
+    return jsonify({"ok": True, "message": "Wake word configuration updated"})
 
 
 # =============================================================================
@@ -397,53 +409,47 @@ def configure_wake_word_endpoint() -> Response:
 @require_api_key
 def get_settings() -> Response:
     """Get current application settings"""
-    try:
-        settings = current_app.config.get("settings")
-        return jsonify({
-            "voice_enabled": settings.voice_input_enabled,
-            "wake_word_enabled": getattr(settings, 'wake_word_enabled', False),
-            "camera_enabled": True,  # Camera is always available
-            "ai_service": getattr(settings, 'ai_service', 'openai'),
-            "openai_key": getattr(settings, 'openai_api_key', ''),
-            "anthropic_key": getattr(settings, 'anthropic_api_key', ''),
-            "ollama_url": getattr(settings, 'ollama_url', 'http://localhost:11434'),
-        })
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    settings = current_app.config.get("settings")
+    return jsonify({
+        "voice_enabled": settings.voice_input_enabled,
+        "wake_word_enabled": getattr(settings, 'wake_word_enabled', False),
+        "camera_enabled": True,  # Camera is always available
+        "ai_service": getattr(settings, 'ai_service', 'openai'),
+        "openai_key": getattr(settings, 'openai_api_key', ''),
+        "anthropic_key": getattr(settings, 'anthropic_api_key', ''),
+        "ollama_url": getattr(settings, 'ollama_url', 'http://localhost:11434'),
+    })
 
 
 @api_bp.post("/settings")
 @require_api_key
 def update_settings() -> Response:
     """Update application settings and restart services"""
-    try:
-        payload: Dict[str, Any] | None = request.get_json(silent=True)
-        if not isinstance(payload, dict):
-            return jsonify({"error": "invalid payload"}), 400
-        
-        # Update voice input service
-        if 'voice_enabled' in payload:
-            voice_service = _svc("voice_input_service")
-            if payload['voice_enabled']:
-                voice_service.start_listening()
-            else:
-                voice_service.stop_listening()
-        
-        # Update wake word service
-        if 'wake_word_enabled' in payload:
-            if payload['wake_word_enabled']:
-                start_wake_word_detection()
-            else:
-                stop_wake_word_detection()
-        
-        # Update camera service
-        if 'camera_enabled' in payload and payload['camera_enabled']:
-            camera_service = _svc("camera_service")
-            camera_service.ensure_started("head")
-        
-        return jsonify({"ok": True, "message": "Settings updated and services restarted"})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    payload: Dict[str, Any] | None = json_body()
+    if not isinstance(payload, dict):
+        return jsonify({"error": "invalid payload"}), 400
+    
+    # Update voice input service
+    if 'voice_enabled' in payload:
+        voice_service = _svc("voice_input_service")
+        if payload['voice_enabled']:
+            voice_service.start_listening()
+        else:
+            voice_service.stop_listening()
+    
+    # Update wake word service
+    if 'wake_word_enabled' in payload:
+        if payload['wake_word_enabled']:
+            start_wake_word_detection()
+        else:
+            stop_wake_word_detection()
+    
+    # Update camera service
+    if 'camera_enabled' in payload and payload['camera_enabled']:
+        camera_service = _svc("camera_service")
+        camera_service.ensure_started("head")
+    
+    return jsonify({"ok": True, "message": "Settings updated and services restarted"})
 
 
 # =============================================================================
@@ -454,413 +460,447 @@ def update_settings() -> Response:
 @require_api_key
 def get_media() -> Response:
     """Get list of media files"""
-    try:
-        # For now, return empty list - this would need to be implemented
-        # based on your media storage system
-        return jsonify([])
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    # For now, return empty list - this would need to be implemented
+    # based on your media storage system
+    return jsonify([])
 
 
 @api_bp.post("/media/upload")
 @require_api_key
 def upload_media() -> Response:
     """Upload media file"""
-    try:
-        # For now, return success - this would need to be implemented
-        # based on your media storage system
-        return jsonify({"ok": True, "message": "Media upload not yet implemented"})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    # For now, return success - this would need to be implemented
+    # based on your media storage system
+    return jsonify({"ok": True, "message": "Media upload not yet implemented"})
 
 
 # =============================================================================
 # NETWORK ENDPOINTS
 # =============================================================================
 
+@api_bp.get("/tasks/<task_id>")
+@require_api_key
+def get_task(task_id: str) -> Response:
+    """Poll a background task started by one of the network endpoints"""
+    task = _svc("task_service").get(task_id)
+    if task is None:
+        return jsonify({"error": "Task not found"}), 404
+    return jsonify(task)
+
+
 @api_bp.get("/wifi/scan")
 @require_api_key
 def scan_wifi() -> Response:
-    """Scan for available WiFi networks"""
+    """Scan for available WiFi networks in the background (?force=1 skips the cache)"""
+    force = request.args.get("force", "0") in {"1", "true", "True"}
+    task = _svc("task_service").submit("net", "wifi_scan", _do_wifi_scan, force=force)
+    return jsonify({"task_id": task.id, "state": task.state}), 202
+
+
+@ttl_cache(SCAN_CACHE_TTL)
+def _do_wifi_scan() -> dict:
+    """Scan for WiFi networks; runs on the "net" task queue."""
+    
+    # Debug: Let's see what commands are available and what they return
+    debug_info = {"attempts": []}
+    
+    # First, unblock WiFi with rfkill and bring up the interface
     try:
-        import subprocess
-        import json
+        # Unblock WiFi with rfkill
+        rfkill_result = subprocess.run(['sudo', 'rfkill', 'unblock', 'wifi'], 
+                                     capture_output=True, timeout=10)
+        debug_info["attempts"].append({
+            "command": "sudo rfkill unblock wifi",
+            "returncode": rfkill_result.returncode,
+            "stdout": _preview(rfkill_result.stdout, 200),
+            "stderr": _preview(rfkill_result.stderr, 200) if rfkill_result.returncode else ""
+        })
         
-        # Debug: Let's see what commands are available and what they return
-        debug_info = {"attempts": []}
+        # Also unblock all wireless devices
+        rfkill_all_result = subprocess.run(['sudo', 'rfkill', 'unblock', 'all'], 
+                                         capture_output=True, timeout=10)
+        debug_info["attempts"].append({
+            "command": "sudo rfkill unblock all",
+            "returncode": rfkill_all_result.returncode,
+            "stdout": _preview(rfkill_all_result.stdout, 200),
+            "stderr": _preview(rfkill_all_result.stderr, 200) if rfkill_all_result.returncode else ""
+        })
         
-        # First, unblock WiFi with rfkill and bring up the interface
-        try:
-            # Unblock WiFi with rfkill
-            rfkill_result = subprocess.run(['sudo', 'rfkill', 'unblock', 'wifi'], 
-                                         capture_output=True, text=True, timeout=10)
-            debug_info["attempts"].append({
-                "command": "sudo rfkill unblock wifi",
-                "returncode": rfkill_result.returncode,
-                "stdout": rfkill_result.stdout[:200],
-                "stderr": rfkill_result.stderr[:200]
-            })
-            
-            # Also unblock all wireless devices
-            rfkill_all_result = subprocess.run(['sudo', 'rfkill', 'unblock', 'all'], 
-                                             capture_output=True, text=True, timeout=10)
-            debug_info["attempts"].append({
-                "command": "sudo rfkill unblock all",
-                "returncode": rfkill_all_result.returncode,
-                "stdout": rfkill_all_result.stdout[:200],
-                "stderr": rfkill_all_result.stderr[:200]
-            })
-            
-            # Enable WiFi interface
-            enable_result = subprocess.run(['sudo', 'ip', 'link', 'set', 'wlan0', 'up'], 
-                                         capture_output=True, text=True, timeout=10)
-            debug_info["attempts"].append({
-                "command": "sudo ip link set wlan0 up",
-                "returncode": enable_result.returncode,
-                "stdout": enable_result.stdout[:200],
-                "stderr": enable_result.stderr[:200]
-            })
-        except Exception as e:
-            debug_info["attempts"].append({
-                "command": "WiFi enable sequence",
-                "error": str(e)
-            })
+        # Enable WiFi interface
+        enable_result = subprocess.run(['sudo', 'ip', 'link', 'set', 'wlan0', 'up'], 
+                                     capture_output=True, timeout=10)
+        debug_info["attempts"].append({
+            "command": "sudo ip link set wlan0 up",
+            "returncode": enable_result.returncode,
+            "stdout": _preview(enable_result.stdout, 200),
+            "stderr": _preview(enable_result.stderr, 200) if enable_result.returncode else ""
+        })
+    except Exception as e:
+        debug_info["attempts"].append({
+            "command": "WiFi enable sequence",
+            "error": str(e)
+        })
+    
+    # Try nmcli first (NetworkManager) - with rescan
+    try:
+        # Force a rescan first
+        rescan_result = subprocess.run(['nmcli', 'device', 'wifi', 'rescan'], 
+                                     capture_output=True, timeout=15)
+        debug_info["attempts"].append({
+            "command": "nmcli device wifi rescan",
+            "returncode": rescan_result.returncode,
+            "stdout": _preview(rescan_result.stdout, 200),
+            "stderr": _preview(rescan_result.stderr, 200) if rescan_result.returncode else ""
+        })
         
-        # Try nmcli first (NetworkManager) - with rescan
-        try:
-            # Force a rescan first
-            rescan_result = subprocess.run(['nmcli', 'device', 'wifi', 'rescan'], 
-                                         capture_output=True, text=True, timeout=15)
-            debug_info["attempts"].append({
-                "command": "nmcli device wifi rescan",
-                "returncode": rescan_result.returncode,
-                "stdout": rescan_result.stdout[:200],
-                "stderr": rescan_result.stderr[:200]
-            })
-            
-            # Wait a moment for scan to complete
-            import time
-            time.sleep(3)
-            
-            # Now list networks
-            result = subprocess.run(['nmcli', '-t', '-f', 'SSID,SIGNAL,SECURITY', 'device', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=30)
-            debug_info["attempts"].append({
-                "command": "nmcli device wifi list",
-                "returncode": result.returncode,
-                "stdout": result.stdout[:500],  # First 500 chars
-                "stderr": result.stderr[:500]
-            })
-            
-            if result.returncode == 0 and result.stdout.strip():
-                networks = []
-                for line in result.stdout.strip().split('\n'):
-                    if line and not line.startswith('--'):
-                        parts = line.split(':')
-                        if len(parts) >= 3:
-                            networks.append({
-                                'ssid': parts[0] if parts[0] else 'Hidden',
-                                'signal': parts[1] if parts[1] else 'Unknown',
-                                'security': parts[2] if parts[2] else 'Open'
-                            })
-                if networks:
-                    return jsonify({"networks": networks, "debug": debug_info})
-        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
-            debug_info["attempts"].append({
-                "command": "nmcli device wifi list",
-                "error": str(e)
-            })
+        # Wait a moment for scan to complete
+        time.sleep(3)
         
-        # Fallback to iwlist with specific interface
-        try:
-            result = subprocess.run(['sudo', 'iwlist', 'wlan0', 'scan'], capture_output=True, text=True, timeout=30)
-            debug_info["attempts"].append({
-                "command": "sudo iwlist wlan0 scan",
-                "returncode": result.returncode,
-                "stdout": result.stdout[:500],  # First 500 chars
-                "stderr": result.stderr[:500]
-            })
-            
-            if result.returncode == 0 and 'Cell' in result.stdout:
-                networks = []
-                lines = result.stdout.split('\n')
-                current_network = {}
-                
-                for line in lines:
-                    line = line.strip()
-                    if 'Cell' in line and 'Address' in line:
-                        if current_network:
-                            networks.append(current_network)
-                        current_network = {'ssid': 'Hidden', 'signal': 'Unknown', 'security': 'Open'}
-                    elif 'ESSID:' in line:
-                        ssid = line.split('ESSID:')[1].strip().strip('"')
-                        if ssid:
-                            current_network['ssid'] = ssid
-                    elif 'Signal level=' in line:
-                        signal = line.split('Signal level=')[1].split()[0]
-                        current_network['signal'] = signal
-                    elif 'Encryption key:' in line:
-                        if 'on' in line:
-                            current_network['security'] = 'Encrypted'
-                        else:
-                            current_network['security'] = 'Open'
-                
-                if current_network:
-                    networks.append(current_network)
-                
-                if networks:
-                    return jsonify({"networks": networks, "debug": debug_info})
-        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
-            debug_info["attempts"].append({
-                "command": "sudo iwlist wlan0 scan",
-                "error": str(e)
-            })
+        # Now list networks
+        result = subprocess.run(['nmcli', '-t', '-f', 'SSID,SIGNAL,SECURITY', 'device', 'wifi', 'list'], 
+                              capture_output=True, timeout=30)
+        debug_info["attempts"].append({
+            "command": "nmcli device wifi list",
+            "returncode": result.returncode,
+            "stdout": _preview(result.stdout, 500),
+            "stderr": _preview(result.stderr, 500)
+        })
         
-        # If both fail, return debug info to see what went wrong
-        return jsonify({"networks": [], "debug": debug_info})
+        if result.returncode == 0 and result.stdout.strip():
+            networks = _parse_nmcli(result.stdout)
+            if networks:
+                return {"networks": networks, "debug": debug_info}
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        debug_info["attempts"].append({
+            "command": "nmcli device wifi list",
+            "error": str(e)
+        })
+    
+    # Fallback to iwlist with specific interface
+    try:
+        result = subprocess.run(['sudo', 'iwlist', 'wlan0', 'scan'], capture_output=True, timeout=30)
+        debug_info["attempts"].append({
+            "command": "sudo iwlist wlan0 scan",
+            "returncode": result.returncode,
+            "stdout": _preview(result.stdout, 500),
+            "stderr": _preview(result.stderr, 500)
+        })
         
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+        if result.returncode == 0 and b'Cell' in result.stdout:
+            networks = _parse_iwlist(result.stdout)
+            if networks:
+                return {"networks": networks, "debug": debug_info}
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        debug_info["attempts"].append({
+            "command": "sudo iwlist wlan0 scan",
+            "error": str(e)
+        })
+    
+    # If both fail, return debug info to see what went wrong
+    return {"networks": [], "debug": debug_info}
+
+
+def _preview(data: bytes, limit: int) -> str:
+    """Decode only the head of a command's output for the debug payload."""
+    return data[:limit].decode('utf-8', 'replace')
+
+
+def _text(data: bytes) -> str:
+    return data.decode('utf-8', 'replace')
+
+
+# Scan output is parsed as bytes; only the matched fields are ever decoded.
+# nmcli -t escapes literal colons in fields as "\:", so an SSID may contain them.
+_NMCLI_RE = re.compile(rb'^(?!--)((?:[^:\\\n]|\\.)*):([^:\n]*):(.*)$', re.M)
+
+
+def _parse_nmcli(output: bytes) -> list:
+    """Parse `nmcli -t -f SSID,SIGNAL,SECURITY device wifi list` output."""
+    return [
+        {
+            'ssid': _text(ssid.replace(b'\\:', b':')) if ssid else 'Hidden',
+            'signal': _text(signal) if signal else 'Unknown',
+            'security': _text(security) if security else 'Open',
+        }
+        for ssid, signal, security in _NMCLI_RE.findall(output)
+    ]
+
+
+# One alternation scanned by finditer() walks the whole iwlist output in C;
+# lastgroup tells us which field matched.
+_IWLIST_RE = re.compile(
+    rb'Cell \d+ - Address: (?P<mac>\S+)|'
+    rb'ESSID:"(?P<ssid>[^"]*)"|'
+    rb'Signal level=(?P<sig>\S+)|'
+    rb'Encryption key:(?P<enc>on|off)'
+)
+
+
+def _parse_iwlist(output: bytes) -> list:
+    """Parse `iwlist <iface> scan` output in a single regex pass."""
+    networks = []
+    current: dict | None = None
+    for match in _IWLIST_RE.finditer(output):
+        group = match.lastgroup
+        if group == 'mac':
+            current = {'ssid': 'Hidden', 'signal': 'Unknown', 'security': 'Open'}
+            networks.append(current)
+        elif current is None:
+            continue
+        elif group == 'ssid':
+            if match['ssid']:
+                current['ssid'] = _text(match['ssid'])
+        elif group == 'sig':
+            current['signal'] = _text(match['sig'])
+        elif group == 'enc':
+            current['security'] = 'Encrypted' if match['enc'] == b'on' else 'Open'
+    return networks
+
+
+def _parse_hcitool_scan(output: bytes) -> list:
+    """Parse `hcitool scan` output ("XX:XX:XX:XX:XX:XX<TAB>Device Name" rows)."""
+    devices = []
+    for raw_line in output.splitlines():
+        device_id, _, device_name = raw_line.strip().partition(b'\t')
+        if not device_id or device_id.startswith(b'Scanning') or b':' not in device_id:
+            continue
+        devices.append({
+            'id': _text(device_id.strip()),
+            'name': _text(device_name.strip()) or "Unknown Device",
+            'status': 'Available'
+        })
+    return devices
+
+
+def _parse_bluetoothctl_devices(output: bytes) -> list:
+    """Parse `bluetoothctl devices` output ("Device <MAC> <name>" rows)."""
+    devices = []
+    for line in output.splitlines():
+        prefix, _, rest = line.partition(b' ')
+        device_id, _, device_name = rest.partition(b' ')
+        if prefix == b'Device' and device_name:
+            devices.append({
+                'id': _text(device_id),
+                'name': _text(device_name),
+                'status': 'Available'
+            })
+    return devices
 
 
 @api_bp.post("/wifi/connect")
 @require_api_key
 def connect_wifi() -> Response:
-    """Connect to WiFi network"""
+    """Connect to WiFi network in the background"""
+    payload: Dict[str, Any] | None = json_body()
+    if not isinstance(payload, dict):
+        return jsonify({"error": "invalid payload"}), 400
+    
+    ssid = payload.get("ssid", "")
+    password = payload.get("password", "")
+    
+    if not ssid:
+        return jsonify({"error": "SSID is required"}), 400
+    
+    task = _svc("task_service").submit("net", "wifi_connect", _do_wifi_connect, ssid, password)
+    return jsonify({"task_id": task.id, "state": task.state, "message": f"Connecting to {ssid}..."}), 202
+    
+
+
+def _do_wifi_connect(ssid: str, password: str) -> dict:
+    """Connect to a WiFi network; runs on the "net" task queue."""
+    
+    # Try nmcli (NetworkManager)
     try:
-        payload: Dict[str, Any] | None = request.get_json(silent=True)
-        if not isinstance(payload, dict):
-            return jsonify({"error": "invalid payload"}), 400
+        # First, do a fresh rescan to ensure network is available
+        subprocess.run(['nmcli', 'device', 'wifi', 'rescan'], 
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15)
         
-        ssid = payload.get("ssid", "")
-        password = payload.get("password", "")
+        # Wait a moment for scan to complete
+        time.sleep(2)
         
-        if not ssid:
-            return jsonify({"error": "SSID is required"}), 400
-        
-        import subprocess
+        if password:
+            # Connect with password
+            result = subprocess.run(['nmcli', 'device', 'wifi', 'connect', ssid, 'password', password], 
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=60)
+        else:
+            # Connect to open network
+            result = subprocess.run(['nmcli', 'device', 'wifi', 'connect', ssid], 
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=60)
         
-        # Try nmcli (NetworkManager)
-        try:
-            # First, do a fresh rescan to ensure network is available
-            subprocess.run(['nmcli', 'device', 'wifi', 'rescan'], 
-                         capture_output=True, text=True, timeout=15)
-            
-            # Wait a moment for scan to complete
-            import time
-            time.sleep(2)
-            
-            if password:
-                # Connect with password
-                result = subprocess.run(['nmcli', 'device', 'wifi', 'connect', ssid, 'password', password], 
-                                      capture_output=True, text=True, timeout=60)
-            else:
-                # Connect to open network
-                result = subprocess.run(['nmcli', 'device', 'wifi', 'connect', ssid], 
-                                      capture_output=True, text=True, timeout=60)
+        if result.returncode == 0:
+            return {"ok": True, "message": f"Successfully connected to {ssid}"}
+        else:
+            return {"ok": False, "error": f"Failed to connect: {_text(result.stderr)}"}
             
-            if result.returncode == 0:
-                return jsonify({"ok": True, "message": f"Successfully connected to {ssid}"})
-            else:
-                return jsonify({"error": f"Failed to connect: {result.stderr}"}), 400
-                
-        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
-            return jsonify({"error": f"Connection failed: {str(e)}"}), 500
-        
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        return {"ok": False, "error": f"Connection failed: {str(e)}"}
 
 
 @api_bp.get("/bluetooth/scan")
 @require_api_key
 def scan_bluetooth() -> Response:
-    """Scan for available Bluetooth devices"""
+    """List nearby Bluetooth devices.
+
+    Served from the always-on bluetoothctl discovery snapshot when available;
+    otherwise falls back to a one-off hcitool scan task (?force=1 skips its cache).
+    """
+    scanner = _svc("bluetooth_scanner")
+    if scanner.ensure_started():
+        return jsonify({"devices": scanner.devices(), "scanning": True})
+    
+    force = request.args.get("force", "0") in {"1", "true", "True"}
+    task = _svc("task_service").submit("bt", "bluetooth_scan", _do_bluetooth_scan, force=force)
+    return jsonify({"task_id": task.id, "state": task.state}), 202
+
+
+@ttl_cache(SCAN_CACHE_TTL)
+def _do_bluetooth_scan() -> dict:
+    """Scan for Bluetooth devices; runs on the "bt" task queue."""
+    
+    # Debug: Let's see what Bluetooth commands are available
+    debug_info = {"attempts": []}
+    
+    # First, unblock Bluetooth with rfkill
     try:
-        import subprocess
-        import json
-        
-        # Debug: Let's see what Bluetooth commands are available
-        debug_info = {"attempts": []}
+        # Unblock Bluetooth with rfkill
+        rfkill_result = subprocess.run(['sudo', 'rfkill', 'unblock', 'bluetooth'], 
+                                     capture_output=True, timeout=10)
+        debug_info["attempts"].append({
+            "command": "sudo rfkill unblock bluetooth",
+            "returncode": rfkill_result.returncode,
+            "stdout": _preview(rfkill_result.stdout, 200),
+            "stderr": _preview(rfkill_result.stderr, 200) if rfkill_result.returncode else ""
+        })
+    except Exception as e:
+        debug_info["attempts"].append({
+            "command": "sudo rfkill unblock bluetooth",
+            "error": str(e)
+        })
+    
+    # Start Bluetooth service first
+    try:
+        # Start Bluetooth service
+        service_result = subprocess.run(['sudo', 'systemctl', 'start', 'bluetooth'], 
+                                      capture_output=True, timeout=10)
+        debug_info["attempts"].append({
+            "command": "sudo systemctl start bluetooth",
+            "returncode": service_result.returncode,
+            "stdout": _preview(service_result.stdout, 200),
+            "stderr": _preview(service_result.stderr, 200) if service_result.returncode else ""
+        })
+    except Exception as e:
+        debug_info["attempts"].append({
+            "command": "sudo systemctl start bluetooth",
+            "error": str(e)
+        })
+    
+    # Use hcitool for scanning (more reliable than bluetoothctl)
+    try:
+        # Enable Bluetooth adapter
+        hci_up_result = subprocess.run(['sudo', 'hciconfig', 'hci0', 'up'], 
+                                     capture_output=True, timeout=10)
+        debug_info["attempts"].append({
+            "command": "sudo hciconfig hci0 up",
+            "returncode": hci_up_result.returncode,
+            "stdout": _preview(hci_up_result.stdout, 200),
+            "stderr": _preview(hci_up_result.stderr, 200) if hci_up_result.returncode else ""
+        })
         
-        # First, unblock Bluetooth with rfkill
-        try:
-            # Unblock Bluetooth with rfkill
-            rfkill_result = subprocess.run(['sudo', 'rfkill', 'unblock', 'bluetooth'], 
-                                         capture_output=True, text=True, timeout=10)
-            debug_info["attempts"].append({
-                "command": "sudo rfkill unblock bluetooth",
-                "returncode": rfkill_result.returncode,
-                "stdout": rfkill_result.stdout[:200],
-                "stderr": rfkill_result.stderr[:200]
-            })
-        except Exception as e:
-            debug_info["attempts"].append({
-                "command": "sudo rfkill unblock bluetooth",
-                "error": str(e)
-            })
+        # Scan for devices using hcitool
+        scan_result = subprocess.run(['sudo', 'hcitool', 'scan'], 
+                                   capture_output=True, timeout=15)
+        debug_info["attempts"].append({
+            "command": "sudo hcitool scan",
+            "returncode": scan_result.returncode,
+            "stdout": _preview(scan_result.stdout, 500),
+            "stderr": _preview(scan_result.stderr, 200)
+        })
         
-        # Start Bluetooth service first
-        try:
-            # Start Bluetooth service
-            service_result = subprocess.run(['sudo', 'systemctl', 'start', 'bluetooth'], 
-                                          capture_output=True, text=True, timeout=10)
-            debug_info["attempts"].append({
-                "command": "sudo systemctl start bluetooth",
-                "returncode": service_result.returncode,
-                "stdout": service_result.stdout[:200],
-                "stderr": service_result.stderr[:200]
-            })
-        except Exception as e:
-            debug_info["attempts"].append({
-                "command": "sudo systemctl start bluetooth",
-                "error": str(e)
-            })
+        if scan_result.returncode == 0 and scan_result.stdout.strip():
+            return {"devices": _parse_hcitool_scan(scan_result.stdout), "debug": debug_info}
+        else:
+            return {"devices": [], "debug": debug_info}
+            
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        debug_info["attempts"].append({
+            "command": "hcitool scan",
+            "error": str(e)
+        })
         
-        # Use hcitool for scanning (more reliable than bluetoothctl)
+        # Fallback to bluetoothctl with shorter timeout
         try:
-            # Enable Bluetooth adapter
-            hci_up_result = subprocess.run(['sudo', 'hciconfig', 'hci0', 'up'], 
-                                         capture_output=True, text=True, timeout=10)
+            # Try bluetoothctl with very short timeout
+            devices_result = subprocess.run(['bluetoothctl', 'devices'], 
+                                          capture_output=True, timeout=3)
             debug_info["attempts"].append({
-                "command": "sudo hciconfig hci0 up",
-                "returncode": hci_up_result.returncode,
-                "stdout": hci_up_result.stdout[:200],
-                "stderr": hci_up_result.stderr[:200]
+                "command": "bluetoothctl devices (fallback)",
+                "returncode": devices_result.returncode,
+                "stdout": _preview(devices_result.stdout, 500),
+                "stderr": _preview(devices_result.stderr, 200)
             })
             
-            # Scan for devices using hcitool
-            scan_result = subprocess.run(['sudo', 'hcitool', 'scan'], 
-                                       capture_output=True, text=True, timeout=15)
-            debug_info["attempts"].append({
-                "command": "sudo hcitool scan",
-                "returncode": scan_result.returncode,
-                "stdout": scan_result.stdout[:500],
-                "stderr": scan_result.stderr[:200]
-            })
-            
-            if scan_result.returncode == 0 and scan_result.stdout.strip():
-                devices = []
-                lines = scan_result.stdout.strip().split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line and not line.startswith('Scanning'):
-                        # Format: "XX:XX:XX:XX:XX:XX	Device Name"
-                        parts = line.split('\t', 1)
-                        if len(parts) >= 2:
-                            device_id = parts[0].strip()
-                            device_name = parts[1].strip() if parts[1].strip() else "Unknown Device"
-                            devices.append({
-                                'id': device_id,
-                                'name': device_name,
-                                'status': 'Available'
-                            })
-                        elif len(parts) == 1 and ':' in parts[0]:
-                            # Just MAC address, no name
-                            device_id = parts[0].strip()
-                            devices.append({
-                                'id': device_id,
-                                'name': 'Unknown Device',
-                                'status': 'Available'
-                            })
+            if devices_result.returncode == 0:
+                return {"devices": _parse_bluetoothctl_devices(devices_result.stdout), "debug": debug_info}
                 
-                return jsonify({"devices": devices, "debug": debug_info})
-            else:
-                return jsonify({"devices": [], "debug": debug_info})
-                
-        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        except (subprocess.TimeoutExpired, FileNotFoundError) as e2:
             debug_info["attempts"].append({
-                "command": "hcitool scan",
-                "error": str(e)
+                "command": "bluetoothctl devices (fallback)",
+                "error": str(e2)
             })
-            
-            # Fallback to bluetoothctl with shorter timeout
-            try:
-                # Try bluetoothctl with very short timeout
-                devices_result = subprocess.run(['bluetoothctl', 'devices'], 
-                                              capture_output=True, text=True, timeout=3)
-                debug_info["attempts"].append({
-                    "command": "bluetoothctl devices (fallback)",
-                    "returncode": devices_result.returncode,
-                    "stdout": devices_result.stdout[:500],
-                    "stderr": devices_result.stderr[:200]
-                })
-                
-                if devices_result.returncode == 0:
-                    devices = []
-                    for line in devices_result.stdout.strip().split('\n'):
-                        if line.startswith('Device '):
-                            parts = line.split(' ', 2)
-                            if len(parts) >= 3:
-                                device_id = parts[1]
-                                device_name = parts[2]
-                                devices.append({
-                                    'id': device_id,
-                                    'name': device_name,
-                                    'status': 'Available'
-                                })
-                    
-                    return jsonify({"devices": devices, "debug": debug_info})
-                    
-            except (subprocess.TimeoutExpired, FileNotFoundError) as e2:
-                debug_info["attempts"].append({
-                    "command": "bluetoothctl devices (fallback)",
-                    "error": str(e2)
-                })
-            
-            return jsonify({"devices": [], "debug": debug_info})
         
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+        return {"devices": [], "debug": debug_info}
 
 
 @api_bp.post("/bluetooth/connect")
 @require_api_key
 def connect_bluetooth() -> Response:
-    """Connect to Bluetooth device"""
+    """Connect to Bluetooth device in the background"""
+    payload: Dict[str, Any] | None = json_body()
+    if not isinstance(payload, dict):
+        return jsonify({"error": "invalid payload"}), 400
+    
+    device_id = payload.get("device_id", "")
+    
+    if not device_id:
+        return jsonify({"error": "Device ID is required"}), 400
+    
+    task = _svc("task_service").submit("bt", "bluetooth_connect", _do_bluetooth_connect, device_id)
+    return jsonify({"task_id": task.id, "state": task.state, "message": f"Connecting to {device_id}..."}), 202
+    
+
+
+def _do_bluetooth_connect(device_id: str) -> dict:
+    """Connect to a Bluetooth device; runs on the "bt" task queue."""
+    
     try:
-        payload: Dict[str, Any] | None = request.get_json(silent=True)
-        if not isinstance(payload, dict):
-            return jsonify({"error": "invalid payload"}), 400
-        
-        device_id = payload.get("device_id", "")
-        
-        if not device_id:
-            return jsonify({"error": "Device ID is required"}), 400
+        # Use hcitool for more reliable connection
+        # First, try to connect directly
+        connect_result = subprocess.run(['sudo', 'hcitool', 'cc', device_id], 
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15)
         
-        import subprocess
-        
-        try:
-            # Use hcitool for more reliable connection
-            # First, try to connect directly
-            connect_result = subprocess.run(['sudo', 'hcitool', 'cc', device_id], 
-                                          capture_output=True, text=True, timeout=15)
-            
-            if connect_result.returncode == 0:
-                return jsonify({"ok": True, "message": f"Successfully connected to {device_id}"})
-            else:
-                # If direct connection fails, try bluetoothctl with shorter timeout
-                try:
-                    # Try pairing first
-                    pair_result = subprocess.run(['timeout', '10', 'bluetoothctl', 'pair', device_id], 
-                                               capture_output=True, text=True, timeout=15)
-                    
-                    # Try connecting regardless of pair result
-                    connect_result = subprocess.run(['timeout', '10', 'bluetoothctl', 'connect', device_id], 
-                                                 capture_output=True, text=True, timeout=15)
-                    
-                    if connect_result.returncode == 0:
-                        return jsonify({"ok": True, "message": f"Successfully connected to {device_id}"})
-                    else:
-                        return jsonify({"error": f"Failed to connect: {connect_result.stderr or 'Connection timeout'}"}, 400)
-                        
-                except (subprocess.TimeoutExpired, FileNotFoundError):
-                    return jsonify({"error": "Bluetooth connection timed out"}, 400)
+        if connect_result.returncode == 0:
+            return {"ok": True, "message": f"Successfully connected to {device_id}"}
+        else:
+            # If direct connection fails, try bluetoothctl with shorter timeout
+            try:
+                # Try pairing first
+                subprocess.run(['timeout', '10', 'bluetoothctl', 'pair', device_id], 
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15)
                 
-        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
-            return jsonify({"error": f"Connection failed: {str(e)}"}), 500
-        
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+                # Try connecting regardless of pair result
+                connect_result = subprocess.run(['timeout', '10', 'bluetoothctl', 'connect', device_id], 
+                                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=15)
+                
+                if connect_result.returncode == 0:
+                    return {"ok": True, "message": f"Successfully connected to {device_id}"}
+                else:
+                    return {"ok": False, "error": f"Failed to connect: {_text(connect_result.stderr) or 'Connection timeout'}"}
+                    
+            except (subprocess.TimeoutExpired, FileNotFoundError):
+                return {"ok": False, "error": "Bluetooth connection timed out"}
+            
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        return {"ok": False, "error": f"Connection failed: {str(e)}"}
 
 
 # =============================================================================
@@ -871,153 +911,123 @@ def connect_bluetooth() -> Response:
 @require_api_key
 def upload_pi_wallpaper() -> Response:
     """Upload wallpaper for Pi display and auto-sync to Pi #2"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({"error": "No file provided"}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
-        
-        file_type = request.form.get('type', 'image')
-        
-        # Create wallpaper directory if it doesn't exist
-        wallpaper_dir = "/opt/echo-ai/wallpapers"
-        os.makedirs(wallpaper_dir, exist_ok=True)
-        
-        # Save the file
-        if file_type == 'image':
-            filename = "wallpaper.jpg"
-        else:
-            filename = "wallpaper.mp4"
-        
-        file_path = os.path.join(wallpaper_dir, filename)
-        file.save(file_path)
-        
-        # Auto-sync to Pi #2 immediately
-        sync_result = _sync_wallpaper_to_pi2(file_path, filename)
-        
-        response_msg = f"Wallpaper saved as {filename}"
-        if sync_result["success"]:
-            response_msg += f" and synced to Pi #2"
-        else:
-            response_msg += f" (sync to Pi #2 failed: {sync_result['error']})"
-        
-        return jsonify({
-            "ok": True, 
-            "message": response_msg, 
-            "path": file_path,
-            "sync_status": sync_result
-        })
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
-
-
-def _sync_wallpaper_to_pi2(file_path: str, filename: str) -> dict:
-    """Sync wallpaper to Pi #2 immediately"""
-    import requests
-    import subprocess
+    if 'file' not in request.files:
+        return jsonify({"error": "No file provided"}), 400
     
-    # Get Pi #2 IP from environment
-    pi2_ip = os.environ.get('ECHO_FACE_PI_IP', '192.168.68.63')
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "No file selected"}), 400
     
-    try:
-        # Method 1: Try SCP (fastest)
-        scp_cmd = [
-            'scp', '-o', 'ConnectTimeout=10', '-o', 'StrictHostKeyChecking=no',
-            file_path, f'echo2@{pi2_ip}:/opt/echo-ai/wallpapers/{filename}'
-        ]
-        
-        result = subprocess.run(scp_cmd, capture_output=True, timeout=30)
-        if result.returncode == 0:
-            return {"success": True, "method": "scp"}
-        
-        # Method 2: Try HTTP if Pi #2 has a simple receiver (fallback)
-        # For now, just return SCP result
-        return {
-            "success": False, 
-            "error": f"SCP failed: {result.stderr.decode() if result.stderr else 'Unknown error'}",
-            "method": "scp"
-        }
-        
-    except subprocess.TimeoutExpired:
-        return {"success": False, "error": "SCP timeout", "method": "scp"}
-    except Exception as e:
-        return {"success": False, "error": str(e), "method": "scp"}
+    file_type = request.form.get('type', 'image')
+    
+    # Create wallpaper directory if it doesn't exist
+    wallpaper_dir = "/opt/echo-ai/wallpapers"
+    os.makedirs(wallpaper_dir, exist_ok=True)
+    
+    # Save the file
+    if file_type == 'image':
+        filename = "wallpaper.jpg"
+    else:
+        filename = "wallpaper.mp4"
+    
+    file_path = os.path.join(wallpaper_dir, filename)
+    file.save(file_path)
+    
+    # Sync to Pi #2 in the background; poll /api/tasks/<task_id> for the result
+    sync_service = _svc("wallpaper_sync_service")
+    task = _svc("task_service").submit("sync", "wallpaper_sync", sync_service.sync, file_path, filename)
+    
+    return jsonify({
+        "ok": True, 
+        "message": f"Wallpaper saved as {filename}; syncing to Pi #2", 
+        "path": file_path,
+        "sync_status": {"task_id": task.id, "state": task.state}
+    })
 
 
 @api_bp.get("/pi/wallpaper/current")
 @require_api_key
 def get_current_pi_wallpaper() -> Response:
     """Get current Pi wallpaper info"""
+    wallpaper_dir = "/opt/echo-ai/wallpapers"
+    
+    # One directory listing instead of an exists() + stat() pair per candidate
     try:
-        wallpaper_dir = "/opt/echo-ai/wallpapers"
-        
-        # Check for image wallpaper
-        image_path = os.path.join(wallpaper_dir, "wallpaper.jpg")
-        video_path = os.path.join(wallpaper_dir, "wallpaper.mp4")
-        
-        if os.path.exists(image_path):
-            stat = os.stat(image_path)
-            return jsonify({
-                "has_wallpaper": True,
-                "path": image_path,
-                "type": "image",
-                "size": stat.st_size,
-                "modified": stat.st_mtime
-            })
-        elif os.path.exists(video_path):
-            stat = os.stat(video_path)
-            return jsonify({
-                "has_wallpaper": True,
-                "path": video_path,
-                "type": "video",
-                "size": stat.st_size,
-                "modified": stat.st_mtime
-            })
-        else:
-            return jsonify({"has_wallpaper": False})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+        with os.scandir(wallpaper_dir) as it:
+            entries = {entry.name: entry for entry in it}
+    except FileNotFoundError:
+        entries = {}
+    
+    for name, kind in (("wallpaper.jpg", "image"), ("wallpaper.mp4", "video")):
+        entry = entries.get(name)
+        if entry is not None and entry.is_file():
+            return _wallpaper_info_response(entry.path, kind, entry.stat())
+    return jsonify({"has_wallpaper": False})
+
+
+def _wallpaper_info_response(path: str, kind: str, stat: os.stat_result) -> Response:
+    """Build the wallpaper info payload with an ETag so Pi #2 can revalidate cheaply."""
+    response = jsonify({
+        "has_wallpaper": True,
+        "path": path,
+        "type": kind,
+        "size": stat.st_size,
+        "modified": stat.st_mtime
+    })
+    response.set_etag(f"{kind}-{stat.st_size}-{stat.st_mtime_ns}")
+    return response.make_conditional(request)
 
 
 @api_bp.get("/pi/wallpaper/download/<filename>")
 @require_api_key
 def download_pi_wallpaper(filename: str) -> Response:
     """Download wallpaper file for Pi #2"""
-    try:
-        # Security check - only allow specific filenames
-        allowed_files = ["wallpaper.jpg", "wallpaper.mp4", "wallpaper.png"]
-        if filename not in allowed_files:
-            return jsonify({"error": "Invalid filename"}), 400
-        
-        wallpaper_dir = "/opt/echo-ai/wallpapers"
-        file_path = os.path.join(wallpaper_dir, filename)
-        
-        if not os.path.exists(file_path):
-            return jsonify({"error": "File not found"}), 404
-        
-        return send_file(file_path, as_attachment=True, download_name=filename)
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    # Security check - only allow specific filenames
+    allowed_files = ["wallpaper.jpg", "wallpaper.mp4", "wallpaper.png"]
+    if filename not in allowed_files:
+        return jsonify({"error": "Invalid filename"}), 400
+    
+    wallpaper_dir = "/opt/echo-ai/wallpapers"
+    file_path = os.path.join(wallpaper_dir, filename)
+    
+    if not os.path.exists(file_path):
+        return jsonify({"error": "File not found"}), 404
+    
+    # Behind nginx, hand the transfer to an internal location so the
+    # worker is released immediately and nginx sendfile()s the bytes.
+    accel_prefix = current_app.config["settings"].wallpaper_accel_redirect
+    if accel_prefix:
+        response = Response(mimetype=mimetypes.guess_type(filename)[0])
+        response.headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{filename}"
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+        return response
+    
+    # Conditional responses let Pi #2 skip unchanged files (304), and
+    # Werkzeug hands the file to wsgi.file_wrapper/sendfile when available.
+    return send_file(
+        file_path,
+        as_attachment=True,
+        download_name=filename,
+        conditional=True,
+        etag=True,
+        last_modified=os.path.getmtime(file_path),
+        max_age=3600,
+    )
 
 
 @api_bp.delete("/pi/wallpaper")
 @require_api_key
 def remove_pi_wallpaper() -> Response:
     """Remove current Pi wallpaper"""
-    try:
-        settings = current_app.config.get("settings")
-        wallpaper_path = getattr(settings, 'pi_wallpaper', None)
-        
-        if wallpaper_path and os.path.exists(wallpaper_path):
-            os.remove(wallpaper_path)
-            setattr(settings, 'pi_wallpaper', None)
-            return jsonify({"ok": True, "message": "Wallpaper removed"})
-        else:
-            return jsonify({"ok": True, "message": "No wallpaper to remove"})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    settings = current_app.config.get("settings")
+    wallpaper_path = getattr(settings, 'pi_wallpaper', None)
+    
+    if wallpaper_path and os.path.exists(wallpaper_path):
+        os.remove(wallpaper_path)
+        setattr(settings, 'pi_wallpaper', None)
+        return jsonify({"ok": True, "message": "Wallpaper removed"})
+    else:
+        return jsonify({"ok": True, "message": "No wallpaper to remove"})
 
 
 # =============================================================================
@@ -1028,51 +1038,34 @@ def remove_pi_wallpaper() -> Response:
 @require_api_key
 def restart_system() -> Response:
     """Restart the Echo AI system"""
-    try:
-        # For now, return success - this would need to be implemented
-        # using system commands like systemctl
-        return jsonify({"ok": True, "message": "System restart not yet implemented"})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    # For now, return success - this would need to be implemented
+    # using system commands like systemctl
+    return jsonify({"ok": True, "message": "System restart not yet implemented"})
 
 
 @api_bp.post("/system/reboot")
 @require_api_key
 def reboot_system() -> Response:
     """Reboot both Pi systems"""
-    try:
-        import subprocess
-        import threading
-        
-        def reboot_both_pis():
-            try:
-                # Reboot Pi #2 first
-                subprocess.run(['ssh', 'echo2@192.168.68.63', 'sudo reboot'], timeout=10)
-            except:
-                pass  # Pi #2 might not be reachable
-            
-            # Wait a moment then reboot Pi #1 (this Pi)
-            import time
-            time.sleep(2)
-            subprocess.run(['sudo', 'reboot'], timeout=5)
-        
-        # Start reboot in background thread so we can return response first
-        thread = threading.Thread(target=reboot_both_pis)
-        thread.daemon = True
-        thread.start()
-        
-        return jsonify({"ok": True, "message": "System reboot initiated"})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    settings = current_app.config["settings"]
+    face_pi = shlex.quote(f"{settings.face_pi_user}@{settings.face_pi_ip}")
+    # Reboot Pi #2 first (it might not be reachable), then this Pi. A detached
+    # shell in its own session outlives this process and needs no thread.
+    subprocess.Popen(
+        ["sh", "-c", f"timeout 10 ssh {face_pi} sudo reboot; sleep 2; sudo reboot"],
+        start_new_session=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    
+    return jsonify({"ok": True, "message": "System reboot initiated"})
 
 
 @api_bp.post("/system/backup")
 @require_api_key
 def create_system_backup() -> Response:
     """Create a system backup"""
-    try:
-        # For now, return success - this would need to be implemented
-        # using the backup service
-        return jsonify({"ok": True, "message": "System backup not yet implemented"})
-    except Exception as exc:
-        return jsonify({"error": str(exc)}), 500
+    # For now, return success - this would need to be implemented
+    # using the backup service
+    return jsonify({"ok": True, "message": "System backup not yet implemented"})
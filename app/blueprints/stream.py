@@ -1,8 +1,8 @@
 """Streaming endpoints (MJPEG + SSE)."""
 from __future__ import annotations
 
-import json
 import time
+from queue import Empty
 from typing import Any, Dict
 
 from flask import Blueprint, Response, current_app, stream_with_context
@@ -13,12 +13,22 @@ stream_bp = Blueprint("stream", __name__, url_prefix="/stream")
 
 
 def _svc(name: str) -> Any:
-    return current_app.extensions[name]
+    # Services are registered once in create_app(); the resolved set lives on the app
+    # itself so it goes away with it and is never shared by an app reusing its id().
+    cache: Dict[str, Any] = current_app.extensions.setdefault("_svc_cache", {})
+    service = cache.get(name)
+    if service is None:
+        service = cache[name] = current_app.extensions[name]
+    return service
 
 
-def _format_sse(event: Dict[str, Any]) -> str:
-    data = json.dumps(event)
-    return f"data: {data}\n\n"
+SSE_BATCH_WINDOW = 0.015
+
+MJPEG_BOUNDARY = "frame"
+# Constant multipart framing, encoded once; only Content-Length varies per frame.
+_MJPEG_PART_HEAD = b"--%s\r\nContent-Type: image/jpeg\r\nContent-Length: " % MJPEG_BOUNDARY.encode("ascii")
+_MJPEG_HEAD_END = b"\r\n\r\n"
+_MJPEG_PART_END = b"\r\n"
 
 
 @stream_bp.get("/events")
@@ -30,11 +40,23 @@ def events() -> Response:
     @stream_with_context
     def generate():
         try:
-            for event in state_service.history():
-                yield _format_sse(event)
+            history = state_service.history_bytes()
+            if history:
+                yield history
             while True:
-                event = listener.get()
-                yield _format_sse(event)
+                # Frames arrive already encoded and shared by every subscriber;
+                # a burst within SSE_BATCH_WINDOW goes out as a single write.
+                frames = [listener.get()]
+                deadline = time.monotonic() + SSE_BATCH_WINDOW
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        frames.append(listener.get(timeout=remaining))
+                    except Empty:
+                        break
+                yield frames[0] if len(frames) == 1 else b"".join(frames)
         finally:
             state_service.remove_listener(listener)
 
@@ -45,6 +67,17 @@ def events() -> Response:
 @require_api_key
 def camera(name: str) -> Response:
     camera_service = _svc("camera_service")
+    accel_prefix = current_app.config["settings"].camera_accel_redirect
+    if accel_prefix:
+        # nginx proxies an external MJPEG streamer; Flask only gates auth and
+        # never touches frame bytes (or opens the device itself).
+        if name not in camera_service.list():
+            return Response("Unknown camera", status=404)
+        # The streamer's own Content-Type/boundary reach the client via nginx.
+        response = Response()
+        response.headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{name}"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
     try:
         camera_service.ensure_started(name)
     except KeyError:
@@ -52,22 +85,16 @@ def camera(name: str) -> Response:
     except RuntimeError as exc:
         return Response(str(exc), status=500)
 
-    boundary = "frame"
-
     @stream_with_context
     def generate():
+        seq = 0
         while True:
-            frame = camera_service.frame(name)
+            # Wakes as soon as the capture thread publishes a newer frame.
+            seq, frame = camera_service.wait_for_frame(name, after=seq, timeout=1.0)
             if frame is None:
-                time.sleep(0.05)
                 continue
-            chunk = (
-                f"--{boundary}\r\n"
-                f"Content-Type: image/jpeg\r\n"
-                f"Content-Length: {len(frame)}\r\n\r\n"
-            ).encode("ascii") + frame + b"\r\n"
-            yield chunk
-            time.sleep(0.02)
+            # One join per frame keeps it to a single socket write.
+            yield b"".join((_MJPEG_PART_HEAD, b"%d" % len(frame), _MJPEG_HEAD_END, frame, _MJPEG_PART_END))
 
     headers = {"Cache-Control": "no-cache", "Pragma": "no-cache"}
-    return Response(generate(), mimetype=f"multipart/x-mixed-replace; boundary={boundary}", headers=headers)
+    return Response(generate(), mimetype=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}", headers=headers)
@@ -5,7 +5,9 @@ import os
 import shlex
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Tuple
+
+_TRUTHY = frozenset({"1", "true", "yes", "on"})
 
 
 @dataclass(slots=True)
@@ -21,12 +23,13 @@ class Settings:
     openai_api_key: str
     tts_model: str
     tts_voice: str
-    speech_player_cmd: List[str]
-    ffmpeg_cmd: List[str]
+    speech_player_cmd: Tuple[str, ...]
+    ffmpeg_cmd: Tuple[str, ...]
     camera_devices: Dict[str, str]
     camera_resolution: Tuple[int, int]
     camera_fps: int
     metrics_cache_ttl: float = 2.0
+    temp_sensors: Tuple[str, ...] = ("coretemp", "cpu_thermal")
     speech_queue_max: int = 16
     event_history: int = 100
     # AI and Voice settings
@@ -34,6 +37,9 @@ class Settings:
     voice_input_enabled: bool = True
     voice_input_device: str = "default"
     voice_input_language: str = "en"
+    whisper_model_size: str = "base"
+    whisper_compute_type: str = "int8"
+    whisper_cpu_threads: int = 4
     # Face recognition settings
     face_recognition_enabled: bool = True
     face_recognition_confidence: float = 0.6
@@ -45,9 +51,13 @@ class Settings:
     wifi_setup_enabled: bool = True
     remote_access_enabled: bool = True
     cloudflare_tunnel_token: str = ""
+    face_pi_ip: str = "192.168.68.63"
+    face_pi_user: str = "echo2"
     # Performance settings
     max_concurrent_requests: int = 10
     request_timeout: int = 30
+    wallpaper_accel_redirect: str = ""
+    camera_accel_redirect: str = ""
 
     @classmethod
     def from_env(cls, base_dir: Path) -> "Settings":
@@ -58,7 +68,7 @@ class Settings:
 
         port = _int(env.get("PORT", "5000"), fallback=5000)
         host = env.get("HOST", "0.0.0.0")
-        debug = env.get("FLASK_DEBUG", "0") in {"1", "true", "True"}
+        debug = _bool(env, "FLASK_DEBUG", "0")
 
         api_token = env.get("ECHO_API_TOKEN", "change-me")
         ollama_url = env.get("OLLAMA_URL", "")
@@ -75,32 +85,42 @@ class Settings:
         fps = _int(env.get("CAM_FPS", "30"), fallback=30)
 
         metrics_cache_ttl = float(env.get("METRICS_CACHE_TTL", "2.0"))
+        temp_sensors = tuple(
+            name.strip() for name in env.get("ECHO_TEMP_SENSORS", "coretemp,cpu_thermal").split(",") if name.strip()
+        )
         speech_queue_max = _int(env.get("SPEECH_QUEUE_MAX", "16"), fallback=16)
         event_history = _int(env.get("EVENT_HISTORY", "100"), fallback=100)
         
         # AI and Voice settings
         ai_model = env.get("ECHO_AI_MODEL", "qwen2.5:latest")
-        voice_input_enabled = env.get("ECHO_VOICE_INPUT_ENABLED", "1") in {"1", "true", "True"}
+        voice_input_enabled = _bool(env, "ECHO_VOICE_INPUT_ENABLED", "1")
         voice_input_device = env.get("ECHO_VOICE_INPUT_DEVICE", "default")
         voice_input_language = env.get("ECHO_VOICE_INPUT_LANGUAGE", "en")
+        whisper_model_size = env.get("ECHO_WHISPER_MODEL", "base")
+        whisper_compute_type = env.get("ECHO_WHISPER_COMPUTE_TYPE", "int8")
+        whisper_cpu_threads = _int(env.get("ECHO_WHISPER_THREADS", "4"), fallback=4)
         
         # Face recognition settings
-        face_recognition_enabled = env.get("ECHO_FACE_RECOGNITION_ENABLED", "1") in {"1", "true", "True"}
+        face_recognition_enabled = _bool(env, "ECHO_FACE_RECOGNITION_ENABLED", "1")
         face_recognition_confidence = float(env.get("ECHO_FACE_RECOGNITION_CONFIDENCE", "0.6"))
         
         # Backup settings
-        backup_enabled = env.get("ECHO_BACKUP_ENABLED", "1") in {"1", "true", "True"}
+        backup_enabled = _bool(env, "ECHO_BACKUP_ENABLED", "1")
         backup_auto_interval_hours = _int(env.get("ECHO_BACKUP_AUTO_INTERVAL_HOURS", "24"), fallback=24)
         backup_max_size_mb = _int(env.get("ECHO_BACKUP_MAX_SIZE_MB", "500"), fallback=500)
         
         # Network settings
-        wifi_setup_enabled = env.get("ECHO_WIFI_SETUP_ENABLED", "1") in {"1", "true", "True"}
-        remote_access_enabled = env.get("ECHO_REMOTE_ACCESS_ENABLED", "1") in {"1", "true", "True"}
+        wifi_setup_enabled = _bool(env, "ECHO_WIFI_SETUP_ENABLED", "1")
+        remote_access_enabled = _bool(env, "ECHO_REMOTE_ACCESS_ENABLED", "1")
         cloudflare_tunnel_token = env.get("CLOUDFLARE_TUNNEL_TOKEN", "")
+        face_pi_ip = env.get("ECHO_FACE_PI_IP", "192.168.68.63")
+        face_pi_user = env.get("ECHO_FACE_PI_USER", "echo2")
         
         # Performance settings
         max_concurrent_requests = _int(env.get("ECHO_MAX_CONCURRENT_REQUESTS", "10"), fallback=10)
         request_timeout = _int(env.get("ECHO_REQUEST_TIMEOUT", "30"), fallback=30)
+        wallpaper_accel_redirect = env.get("ECHO_WALLPAPER_ACCEL_REDIRECT", "")
+        camera_accel_redirect = env.get("ECHO_CAMERA_ACCEL_REDIRECT", "")
 
         return cls(
             base_dir=base_dir,
@@ -120,6 +140,7 @@ class Settings:
             camera_resolution=(width, height),
             camera_fps=fps,
             metrics_cache_ttl=metrics_cache_ttl,
+            temp_sensors=temp_sensors,
             speech_queue_max=speech_queue_max,
             event_history=event_history,
             # AI and Voice settings
@@ -127,6 +148,9 @@ class Settings:
             voice_input_enabled=voice_input_enabled,
             voice_input_device=voice_input_device,
             voice_input_language=voice_input_language,
+            whisper_model_size=whisper_model_size,
+            whisper_compute_type=whisper_compute_type,
+            whisper_cpu_threads=whisper_cpu_threads,
             # Face recognition settings
             face_recognition_enabled=face_recognition_enabled,
             face_recognition_confidence=face_recognition_confidence,
@@ -138,47 +162,46 @@ class Settings:
             wifi_setup_enabled=wifi_setup_enabled,
             remote_access_enabled=remote_access_enabled,
             cloudflare_tunnel_token=cloudflare_tunnel_token,
+            face_pi_ip=face_pi_ip,
+            face_pi_user=face_pi_user,
             # Performance settings
             max_concurrent_requests=max_concurrent_requests,
             request_timeout=request_timeout,
+            wallpaper_accel_redirect=wallpaper_accel_redirect,
+            camera_accel_redirect=camera_accel_redirect,
         )
 
 
 def _int(raw: str | None, fallback: int) -> int:
     try:
-        return int(raw) if raw is not None else fallback
+        return int(raw, 10) if raw is not None else fallback
     except ValueError:
         return fallback
 
 
-def _split_cmd(raw: str | None) -> List[str]:
+def _bool(env: dict, key: str, default: str) -> bool:
+    return env.get(key, default).strip().lower() in _TRUTHY
+
+
+def _split_cmd(raw: str | None) -> Tuple[str, ...]:
     if not raw:
-        return []
-    return shlex.split(raw)
+        return ()
+    return tuple(shlex.split(raw))
 
 
 def _resolve_camera_devices(env: dict) -> Dict[str, str]:
     # Allow a CSV list ("name:/dev/video0,front:/dev/video1") or individual vars.
-    devices_env = env.get("CAMERA_DEVICES")
-    devices: Dict[str, str] = {}
-    if devices_env:
-        for item in devices_env.split(","):
-            if ":" not in item:
-                continue
-            name, path = item.split(":", 1)
-            name = name.strip()
-            path = path.strip()
-            if name and path:
-                devices[name] = path
-    # Fallback to the legacy naming.
-    legacy_map = {
-        "front": env.get("CAM_FRONT"),
-        "rear": env.get("CAM_REAR"),
-        "head": env.get("CAM_HEAD"),
+    devices_env = env.get("CAMERA_DEVICES") or ""
+    devices: Dict[str, str] = {
+        name.strip(): path.strip()
+        for name, _, path in (item.partition(":") for item in devices_env.split(","))
+        if name.strip() and path.strip()
     }
-    for name, path in legacy_map.items():
-        if path and name not in devices:
-            devices[name] = path
+    # Fallback to the legacy naming.
+    for name, key in (("front", "CAM_FRONT"), ("rear", "CAM_REAR"), ("head", "CAM_HEAD")):
+        path = env.get(key)
+        if path:
+            devices.setdefault(name, path)
     if not devices:
         devices["head"] = "/dev/video0"
     return devices
@@ -1,22 +1,56 @@
 """AI decision-making and conversation service."""
 from __future__ import annotations
 
-import json
 import logging
+import re
 import threading
 import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 from app.config import Settings
+from app.services.metrics_service import MetricsService
 from app.services.state_service import StateService
 
 LOGGER = logging.getLogger("echo.ai")
 
+SYSTEM_PROMPT = """You are Echo, an AI assistant running on a Raspberry Pi. 
 
-@dataclass
+IMPORTANT: Give direct, concise answers. Do not show your thinking process or reasoning steps. Just provide the final answer clearly and briefly.
+
+Lines starting with [status] report your current robot state and CPU usage; use them as context, do not reply to them.
+
+Available Actions:
+- set_state: Change robot state (idle, talking, sleeping)
+- camera_action: Control camera (start, stop)
+- speak: Make the robot speak text
+- toggle: Control robot features (listening, beam lights)
+
+Examples of good responses:
+- User: "What is the capital of Montana?" → "The capital of Montana is Helena."
+- User: "What's 2+2?" → "2+2 equals 4."
+- User: "How are you?" → "I'm doing well! How can I help you?"
+
+Be helpful, friendly, and concise. Only use JSON format if you need to perform actions."""
+
+OLLAMA_KEEP_ALIVE = "30m"
+# Explicit window/reply sizes keep the KV cache small and bound work per turn.
+OLLAMA_NUM_CTX = 2048
+OLLAMA_NUM_PREDICT = 200
+# Leave room in the window for the next prompt and reply.
+OLLAMA_CONTEXT_MAX_TOKENS = OLLAMA_NUM_CTX - OLLAMA_NUM_PREDICT - 256
+
+# A successful /api/tags probe is trusted for this long before re-checking.
+OLLAMA_HEALTH_TTL = 30.0
+
+
+@dataclass(slots=True, frozen=True)
 class ConversationContext:
     user_input: str
     timestamp: float
@@ -25,7 +59,7 @@ class ConversationContext:
     conversation_history: List[Dict[str, Any]]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AIResponse:
     response_text: str
     action: Optional[str]
@@ -34,14 +68,130 @@ class AIResponse:
     should_speak: bool
 
 
+# Responses that never depend on context are built once and shared.
+_GREETING_RESPONSE = AIResponse(
+    response_text="Hello! I'm Echo, your AI assistant. How can I help you today?",
+    action=None,
+    parameters={},
+    confidence=0.9,
+    should_speak=True
+)
+_SLEEP_RESPONSE = AIResponse(
+    response_text="I'll go to sleep now. Goodbye!",
+    action="set_state",
+    parameters={"state": "sleeping"},
+    confidence=0.9,
+    should_speak=True
+)
+_WAKE_RESPONSE = AIResponse(
+    response_text="I'm awake and ready to help!",
+    action="set_state",
+    parameters={"state": "idle"},
+    confidence=0.9,
+    should_speak=True
+)
+_CAMERA_RESPONSE = AIResponse(
+    response_text="I can see through my camera. Would you like me to show you what I see?",
+    action="camera_action",
+    parameters={"action": "start"},
+    confidence=0.7,
+    should_speak=True
+)
+
+
+def _greet(context: ConversationContext) -> AIResponse:
+    return _GREETING_RESPONSE
+
+
+def _report_status(context: ConversationContext) -> AIResponse:
+    cpu = context.system_metrics.get("core", {}).get("cpu_percent", 0)
+    mem = context.system_metrics.get("core", {}).get("memory", {})
+    used_mem = mem.get("used", 0) if mem else 0
+    total_mem = mem.get("total", 1) if mem else 1
+    mem_percent = (used_mem / total_mem) * 100 if total_mem > 0 else 0
+    
+    status_text = f"I'm doing well! CPU usage is at {cpu:.1f}% and memory usage is at {mem_percent:.1f}%. "
+    status_text += f"Current state: {context.robot_state.get('state', 'unknown')}"
+    
+    return AIResponse(
+        response_text=status_text,
+        action=None,
+        parameters={},
+        confidence=0.8,
+        should_speak=True
+    )
+
+
+def _go_to_sleep(context: ConversationContext) -> AIResponse:
+    return _SLEEP_RESPONSE
+
+
+def _wake_up(context: ConversationContext) -> AIResponse:
+    return _WAKE_RESPONSE
+
+
+def _start_camera(context: ConversationContext) -> AIResponse:
+    return _CAMERA_RESPONSE
+
+
+_WORD_RE = re.compile(r"[a-z']+")
+_JSON_OBJECT_START_RE = re.compile(r"\s*\{")
+_THINK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+_VERBOSE_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'Let me think about this\.\s*',
+    r'Let me recall\s+.*?\.\s*',
+    r'I need to remember\s+.*?\.\s*',
+    r'Wait,?\s+.*?\.\s*',
+    r'Actually,?\s+.*?\.\s*',
+    r'Let me double-check\s+.*?\.\s*',
+    r'I should make sure\s+.*?\.\s*',
+    r'Let me confirm\s+.*?\.\s*',
+    r'I think\s+.*?\.\s*',
+    r'I believe\s+.*?\.\s*',
+    r'If I remember correctly,?\s*',
+    r'From what I know,?\s*',
+    r'As far as I can recall,?\s*',
+))
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Rule-based intents checked in order: (trigger words, trigger phrases, handler).
+# The input is tokenized once and intersected with each word set.
+_FALLBACK_INTENTS: Tuple[Tuple[FrozenSet[str], Tuple[str, ...], Callable[[ConversationContext], AIResponse]], ...] = (
+    (frozenset({"hello", "hi", "hey"}), (), _greet),
+    (frozenset({"status"}), ("how are you", "what's up"), _report_status),
+    (frozenset({"sleep", "rest", "shutdown"}), (), _go_to_sleep),
+    (frozenset({"wake", "awake", "start"}), (), _wake_up),
+    (frozenset({"camera", "see", "look"}), (), _start_camera),
+)
+
+# Intents whose reply never depends on context; their matches are remembered
+# per normalized input so repeats skip tokenizing and matching entirely.
+_CACHEABLE_INTENTS = frozenset({_greet, _go_to_sleep, _wake_up, _start_camera})
+_FALLBACK_CACHE_MAX = 256
+_fallback_cache: Dict[str, AIResponse] = {}
+
+
 class AIService:
-    def __init__(self, settings: Settings, state_service: StateService) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        state_service: StateService,
+        metrics_service: Optional[MetricsService] = None,
+    ) -> None:
         self._settings = settings
         self._state_service = state_service
-        self._conversation_history: List[Dict[str, Any]] = []
+        self._metrics_service = metrics_service
         self._max_history = 20
+        self._conversation_history: deque[Dict[str, Any]] = deque(maxlen=self._max_history)
         self._running = threading.Event()
         self._running.set()
+        # One keep-alive connection pool to Ollama instead of a new socket per call.
+        self._session = requests.Session()
+        self._session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+        self._session.headers["Content-Type"] = "application/json"
+        self._last_health_ok = 0.0
+        self._ollama_context: Optional[List[int]] = None
 
     def process_input(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> AIResponse:
         """Process user input and generate appropriate response and actions."""
@@ -56,7 +206,7 @@ class AIService:
                 timestamp=time.time(),
                 robot_state=robot_state,
                 system_metrics=system_metrics,
-                conversation_history=self._conversation_history[-10:]  # Last 10 exchanges
+                conversation_history=self._recent_history(10)  # Last 10 exchanges
             )
             
             # Generate AI response
@@ -84,11 +234,10 @@ class AIService:
 
     def _generate_response(self, context: ConversationContext) -> AIResponse:
         """Generate AI response using local LLM or fallback."""
-        LOGGER.info(f"Generating response - Ollama URL configured: {bool(self._settings.ollama_url)}")
-        LOGGER.info(f"Ollama URL: {self._settings.ollama_url}")
+        LOGGER.debug("Generating response - Ollama URL: %s", self._settings.ollama_url or "<not configured>")
         
         if self._settings.ollama_url:
-            LOGGER.info("Attempting to use Ollama for response generation")
+            LOGGER.debug("Attempting to use Ollama for response generation")
             return self._generate_with_ollama(context)
         else:
             LOGGER.warning("No Ollama URL configured, using fallback response")
@@ -97,89 +246,57 @@ class AIService:
     def _generate_with_ollama(self, context: ConversationContext) -> AIResponse:
         """Generate response using local Ollama instance."""
         try:
-            LOGGER.info(f"Connecting to Ollama at: {self._settings.ollama_url}")
-            LOGGER.info(f"Using model: {self._settings.ai_model}")
-            
-            # First, check if Ollama is reachable
-            try:
-                health_response = requests.get(
-                    f"{self._settings.ollama_url}/api/tags",
-                    timeout=5
-                )
-                health_response.raise_for_status()
-                LOGGER.info("Ollama server is reachable")
-            except Exception as health_exc:
-                LOGGER.error(f"Ollama server not reachable: {health_exc}")
-                raise health_exc
-            
-            # Prepare system prompt
-            system_prompt = self._build_system_prompt(context)
-            
-            # Prepare conversation messages
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
-            
-            # Add recent conversation history (but clean it first)
-            for entry in context.conversation_history[-6:]:  # Last 6 exchanges
-                role = entry.get("role", "")
-                content = entry.get("content", "")
-                
-                # Skip empty or invalid entries
-                if not content or not role:
-                    continue
-                    
-                # Clean up content - remove thinking tags and extra formatting
-                if "<think>" in content:
-                    # Extract just the final response after </think>
-                    parts = content.split("</think>")
-                    if len(parts) > 1:
-                        content = parts[-1].strip()
-                
-                messages.append({
-                    "role": role,
-                    "content": content
-                })
+            LOGGER.debug("Connecting to Ollama at %s with model %s", self._settings.ollama_url, self._settings.ai_model)
             
-            # Add current user input
-            messages.append({"role": "user", "content": context.user_input})
+            # Check Ollama is reachable, unless it answered recently
+            self._check_ollama_health()
             
-            # Call Ollama API
+            # Ollama hands back the evaluated token context with each reply;
+            # passing it on means only the new turn is sent and prefilled,
+            # instead of replaying the system prompt and history every time.
+            status = self._status_line(context)
             payload = {
                 "model": self._settings.ai_model,  # Use configured model
-                "messages": messages,
-                "stream": False,
+                "system": SYSTEM_PROMPT,
+                "prompt": f"{status}\n{context.user_input}",
+                "stream": True,
+                "keep_alive": OLLAMA_KEEP_ALIVE,
                 "options": {
                     "temperature": 0.7,
                     "top_p": 0.9,
-                    "max_tokens": 200
+                    "num_ctx": OLLAMA_NUM_CTX,
+                    "num_predict": OLLAMA_NUM_PREDICT,
+                    "num_batch": 512
                 }
             }
+            if self._ollama_context:
+                payload["context"] = self._ollama_context
             
-            LOGGER.info(f"Sending request to Ollama with payload: {payload}")
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug("Ollama payload: %s", payload)
             
-            response = requests.post(
-                f"{self._settings.ollama_url}/api/chat",
-                json=payload,
+            with self._session.post(
+                f"{self._settings.ollama_url}/api/generate",
+                data=orjson.dumps(payload),
                 timeout=self._settings.request_timeout,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            LOGGER.info(f"Ollama response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                LOGGER.error(f"Ollama API error: {response.status_code} - {response.text}")
-                response.raise_for_status()
-            
-            result = response.json()
-            LOGGER.info(f"Ollama response: {result}")
+                stream=True
+            ) as response:
+                LOGGER.debug("Ollama response status: %s", response.status_code)
+                
+                if response.status_code != 200:
+                    LOGGER.error(f"Ollama API error: {response.status_code} - {response.text}")
+                    response.raise_for_status()
+                
+                ai_message, context_tokens, result = self._read_ollama_stream(response)
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug("Ollama response: %s", result)
             
-            ai_message = result.get("message", {}).get("content", "")
+            self._store_context(context_tokens)
             
             if not ai_message:
                 LOGGER.warning("Empty response from Ollama")
                 LOGGER.warning(f"Full Ollama response: {result}")
-                LOGGER.warning(f"Messages sent to Ollama: {messages}")
+                LOGGER.warning(f"Prompt sent to Ollama: {payload['prompt']}")
                 raise ValueError("Empty response from Ollama")
             
             # Clean up the response
@@ -188,7 +305,7 @@ class AIService:
             # Parse response for actions
             action, parameters = self._parse_response_for_actions(ai_message)
             
-            LOGGER.info(f"AI response generated successfully: {ai_message[:100]}...")
+            LOGGER.debug("AI response generated successfully: %.100s", ai_message)
             
             return AIResponse(
                 response_text=ai_message,
@@ -200,6 +317,7 @@ class AIService:
             
         except requests.exceptions.ConnectionError as exc:
             LOGGER.error(f"Connection error to Ollama server: {exc}")
+            self._last_health_ok = 0.0
             return self._generate_fallback(context)
         except requests.exceptions.Timeout as exc:
             LOGGER.error(f"Timeout connecting to Ollama server: {exc}")
@@ -215,97 +333,84 @@ class AIService:
                 self.clear_history()
             return self._generate_fallback(context)
 
+    def _read_ollama_stream(
+        self, response: requests.Response
+    ) -> tuple[str, Optional[List[int]], Dict[str, Any]]:
+        """Consume Ollama's JSON-lines stream, publishing each token delta as it arrives.
+
+        Returns the full text, the ``context`` tokens and the rest of the final
+        ``done`` chunk (timings/metadata, without the large token array).
+        """
+        parts: List[str] = []
+        for line in response.iter_lines(chunk_size=4096):
+            if not line:
+                continue
+            chunk = orjson.loads(line)
+            delta = chunk.get("response")
+            if delta:
+                parts.append(delta)
+                self._state_service.publish("ai_token", {"delta": delta})
+            if chunk.get("done"):
+                # Split off the context array so logging the metadata never
+                # formats thousands of token ids.
+                return "".join(parts), chunk.pop("context", None), chunk
+        return "".join(parts), None, {}
+
+    def _store_context(self, tokens: Optional[List[int]]) -> None:
+        # Start over once the carried context grows past what the model keeps anyway.
+        if tokens and len(tokens) <= OLLAMA_CONTEXT_MAX_TOKENS:
+            self._ollama_context = tokens
+        else:
+            self._ollama_context = None
+
+    def _check_ollama_health(self) -> None:
+        if time.monotonic() - self._last_health_ok < OLLAMA_HEALTH_TTL:
+            return
+        try:
+            health_response = self._session.get(
+                f"{self._settings.ollama_url}/api/tags",
+                timeout=5
+            )
+            health_response.raise_for_status()
+            LOGGER.debug("Ollama server is reachable")
+        except Exception as health_exc:
+            LOGGER.error(f"Ollama server not reachable: {health_exc}")
+            raise health_exc
+        self._last_health_ok = time.monotonic()
+
     def _generate_fallback(self, context: ConversationContext) -> AIResponse:
         """Generate fallback response using rule-based system."""
         user_input = context.user_input.lower()
-        
-        # Simple pattern matching for common requests
-        if any(word in user_input for word in ["hello", "hi", "hey"]):
-            return AIResponse(
-                response_text="Hello! I'm Echo, your AI assistant. How can I help you today?",
-                action=None,
-                parameters={},
-                confidence=0.9,
-                should_speak=True
-            )
-        elif any(word in user_input for word in ["status", "how are you", "what's up"]):
-            cpu = context.system_metrics.get("core", {}).get("cpu_percent", 0)
-            mem = context.system_metrics.get("core", {}).get("memory", {})
-            used_mem = mem.get("used", 0) if mem else 0
-            total_mem = mem.get("total", 1) if mem else 1
-            mem_percent = (used_mem / total_mem) * 100 if total_mem > 0 else 0
-            
-            status_text = f"I'm doing well! CPU usage is at {cpu:.1f}% and memory usage is at {mem_percent:.1f}%. "
-            status_text += f"Current state: {context.robot_state.get('state', 'unknown')}"
-            
-            return AIResponse(
-                response_text=status_text,
-                action=None,
-                parameters={},
-                confidence=0.8,
-                should_speak=True
-            )
-        elif any(word in user_input for word in ["sleep", "rest", "shutdown"]):
-            return AIResponse(
-                response_text="I'll go to sleep now. Goodbye!",
-                action="set_state",
-                parameters={"state": "sleeping"},
-                confidence=0.9,
-                should_speak=True
-            )
-        elif any(word in user_input for word in ["wake", "awake", "start"]):
-            return AIResponse(
-                response_text="I'm awake and ready to help!",
-                action="set_state",
-                parameters={"state": "idle"},
-                confidence=0.9,
-                should_speak=True
-            )
-        elif any(word in user_input for word in ["camera", "see", "look"]):
-            return AIResponse(
-                response_text="I can see through my camera. Would you like me to show you what I see?",
-                action="camera_action",
-                parameters={"action": "start"},
-                confidence=0.7,
-                should_speak=True
-            )
-        else:
-            return AIResponse(
-                response_text="I understand you said: " + context.user_input + ". I'm still learning, but I'm here to help!",
-                action=None,
-                parameters={},
-                confidence=0.5,
-                should_speak=True
-            )
+        key = user_input.strip()
+        cached = _fallback_cache.get(key)
+        if cached is not None:
+            return cached
+        tokens = set(_WORD_RE.findall(user_input))
+        for words, phrases, handler in _FALLBACK_INTENTS:
+            if tokens & words or any(phrase in user_input for phrase in phrases):
+                response = handler(context)
+                if handler in _CACHEABLE_INTENTS and len(_fallback_cache) < _FALLBACK_CACHE_MAX:
+                    _fallback_cache[key] = response
+                return response
+        return AIResponse(
+            response_text="I understand you said: " + context.user_input + ". I'm still learning, but I'm here to help!",
+            action=None,
+            parameters={},
+            confidence=0.5,
+            should_speak=True
+        )
 
     def _clean_response(self, response: str) -> str:
         """Clean up AI response to remove verbose thinking and keep only the final answer."""
         # Remove <think> tags and everything inside them
-        import re
-        response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
+        response = _THINK_RE.sub('', response)
         
         # Remove common verbose patterns
-        verbose_patterns = [
-            r'Let me think about this\.\s*',
-            r'Let me recall\s+.*?\.\s*',
-            r'I need to remember\s+.*?\.\s*',
-            r'Wait,?\s+.*?\.\s*',
-            r'Actually,?\s+.*?\.\s*',
-            r'Let me double-check\s+.*?\.\s*',
-            r'I should make sure\s+.*?\.\s*',
-            r'Let me confirm\s+.*?\.\s*',
-            r'I think\s+.*?\.\s*',
-            r'I believe\s+.*?\.\s*',
-            r'If I remember correctly,?\s*',
-            r'From what I know,?\s*',
-            r'As far as I can recall,?\s*'
-        ]
-        
-        for pattern in verbose_patterns:
-            response = re.sub(pattern, '', response, flags=re.IGNORECASE)
+        for pattern in _VERBOSE_RES:
+            response = pattern.sub('', response)
         
         # Clean up multiple spaces and newlines
-        response = re.sub(r'\s+', ' ', response)
+        response = _WHITESPACE_RE.sub(' ', response)
         response = response.strip()
         
         # If the response is still very long, try to extract just the key information
@@ -321,41 +426,26 @@ class AIService:
         
         return response
 
-    def _build_system_prompt(self, context: ConversationContext) -> str:
-        """Build system prompt for AI context."""
-        return f"""You are Echo, an AI assistant running on a Raspberry Pi. 
-
-IMPORTANT: Give direct, concise answers. Do not show your thinking process or reasoning steps. Just provide the final answer clearly and briefly.
-
-Current State: {context.robot_state.get('state', 'unknown')}
-System Status: CPU {context.system_metrics.get('core', {}).get('cpu_percent', 0):.1f}%, Memory usage available
-
-Available Actions:
-- set_state: Change robot state (idle, talking, sleeping)
-- camera_action: Control camera (start, stop)
-- speak: Make the robot speak text
-- toggle: Control robot features (listening, beam lights)
-
-Examples of good responses:
-- User: "What is the capital of Montana?" → "The capital of Montana is Helena."
-- User: "What's 2+2?" → "2+2 equals 4."
-- User: "How are you?" → "I'm doing well! How can I help you?"
-
-Be helpful, friendly, and concise. Only use JSON format if you need to perform actions."""
+    def _status_line(self, context: ConversationContext) -> str:
+        """Describe the current robot/system status; prepended to each new prompt."""
+        state = context.robot_state.get('state', 'unknown')
+        cpu = context.system_metrics.get('core', {}).get('cpu_percent', 0)
+        return f"[status] state={state} cpu={cpu:.1f}%"
 
     def _parse_response_for_actions(self, response_text: str) -> tuple[Optional[str], Dict[str, Any]]:
         """Parse AI response for actions."""
         try:
-            # Try to parse as JSON first
-            if response_text.strip().startswith('{'):
-                data = json.loads(response_text)
+            # Try to parse as JSON first; prose is rejected on its first
+            # non-space character without copying the text.
+            if _JSON_OBJECT_START_RE.match(response_text):
+                data = orjson.loads(response_text)
                 # Check for standard format
                 if 'action' in data:
                     return data.get('action'), data.get('parameters', {})
                 # Check for set_state command
                 elif 'set_state' in data:
                     return "set_state", {"state": data['set_state']}
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             pass
         
         # Simple text parsing for common actions
@@ -402,12 +492,19 @@ Be helpful, friendly, and concise. Only use JSON format if you need to perform a
             LOGGER.exception("Error executing AI action %s: %s", action, exc)
 
     def _get_system_metrics(self) -> Dict[str, Any]:
-        """Get current system metrics."""
-        # This would be injected from the main app
-        return {
+        """Current CPU/memory/uptime from the shared MetricsService sample."""
+        metrics = {
             "core": {"cpu_percent": 0, "memory": {"used": 0, "total": 0}},
             "system": {"uptime_seconds": 0}
         }
+        if self._metrics_service is not None:
+            core = self._metrics_service.core()
+            metrics["core"] = {
+                "cpu_percent": core.get("cpu_percent") or 0,
+                "memory": core.get("memory") or {"used": 0, "total": 0},
+            }
+            metrics["system"] = {"uptime_seconds": self._metrics_service.system().get("uptime_seconds") or 0}
+        return metrics
 
     def _add_to_history(self, role: str, content: str) -> None:
         """Add message to conversation history."""
@@ -416,19 +513,21 @@ Be helpful, friendly, and concise. Only use JSON format if you need to perform a
             "content": content,
             "timestamp": time.time()
         })
-        
-        # Keep only recent history
-        if len(self._conversation_history) > self._max_history:
-            self._conversation_history = self._conversation_history[-self._max_history:]
+
+    def _recent_history(self, count: int) -> List[Dict[str, Any]]:
+        history = self._conversation_history
+        return list(islice(history, max(0, len(history) - count), None))
 
     def get_conversation_history(self) -> List[Dict[str, Any]]:
         """Get conversation history."""
-        return self._conversation_history.copy()
+        return list(self._conversation_history)
 
     def clear_history(self) -> None:
         """Clear conversation history."""
         self._conversation_history.clear()
+        self._ollama_context = None
 
     def stop(self) -> None:
         """Stop the AI service."""
         self._running.clear()
+        self._session.close()
@@ -1,21 +1,60 @@
 """Backup and data export service."""
 from __future__ import annotations
 
-import json
+import io
 import logging
+import os
 import shutil
+import stat
+import subprocess
 import tarfile
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+try:  # zstandard is optional; backups fall back to gzip without it
+    import zstandard as zstd  # type: ignore
+except ImportError:  # pragma: no cover - runtime fallback
+    zstd = None
 
 from app.config import Settings
 
 LOGGER = logging.getLogger("echo.backup")
 
+# Per-file copy chunk for tar add/extract; the stdlib default is 16 KiB.
+TAR_COPY_BUFSIZE = 1024 * 1024
+ZSTD_LEVEL = 3
+# Newest format first; archives of either kind are listed and restorable.
+ARCHIVE_SUFFIXES = (".tar.zst", ".tar.gz")
+
+
+@contextmanager
+def _open_archive(path: Path, mode: str, compresslevel: int = 6) -> Iterator[tarfile.TarFile]:
+    """Open a backup archive for reading ("r") or writing ("w"), picking the codec by suffix.
+
+    zstd archives are streamed (``r|``/``w|``), so members must be read in order.
+    """
+    if path.name.endswith(".tar.zst"):
+        if zstd is None:
+            raise RuntimeError("zstandard is not installed")
+        with open(path, mode + "b") as raw:
+            if mode == "w":
+                stream = zstd.ZstdCompressor(level=ZSTD_LEVEL, threads=-1).stream_writer(raw, closefd=False)
+            else:
+                stream = zstd.ZstdDecompressor().stream_reader(raw, closefd=False)
+            with stream, tarfile.open(fileobj=stream, mode=mode + "|", copybufsize=TAR_COPY_BUFSIZE) as tar:
+                yield tar
+    else:
+        options = {"compresslevel": compresslevel} if mode == "w" else {}
+        with tarfile.open(path, mode + ":gz", copybufsize=TAR_COPY_BUFSIZE, **options) as tar:
+            yield tar
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BackupConfig:
     include_camera_recordings: bool = False
     include_chat_logs: bool = True
@@ -26,7 +65,7 @@ class BackupConfig:
     compression_level: int = 6
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BackupInfo:
     backup_id: str
     created_at: float
@@ -50,66 +89,54 @@ class BackupService:
             config = BackupConfig()
         
         backup_id = custom_name or f"echo_backup_{int(time.time())}"
-        backup_path = self._backup_dir / f"{backup_id}.tar.gz"
+        backup_path = self._backup_dir / f"{backup_id}{ARCHIVE_SUFFIXES[0 if zstd else 1]}"
         
         try:
-            # Create temporary directory for backup contents
-            temp_dir = self._backup_dir / f"temp_{backup_id}"
-            temp_dir.mkdir(exist_ok=True)
-            
+            # Sections are added straight from their source files; nothing is
+            # staged on disk before compression.
             file_count = 0
             total_size = 0
             
-            # Backup configuration
-            if config.include_config:
-                config_files = self._backup_config_files(temp_dir)
-                file_count += config_files
-                total_size += self._get_dir_size(temp_dir / "config")
-            
-            # Backup chat logs
-            if config.include_chat_logs:
-                chat_files = self._backup_chat_logs(temp_dir)
-                file_count += chat_files
-                total_size += self._get_dir_size(temp_dir / "chat_logs")
-            
-            # Backup face data
-            if config.include_face_data:
-                face_files = self._backup_face_data(temp_dir)
-                file_count += face_files
-                total_size += self._get_dir_size(temp_dir / "faces")
-            
-            # Backup system logs
-            if config.include_system_logs:
-                log_files = self._backup_system_logs(temp_dir)
-                file_count += log_files
-                total_size += self._get_dir_size(temp_dir / "logs")
-            
-            # Backup camera recordings (if enabled)
-            if config.include_camera_recordings:
-                camera_files = self._backup_camera_recordings(temp_dir)
-                file_count += camera_files
-                total_size += self._get_dir_size(temp_dir / "camera")
-            
-            # Create backup metadata
-            metadata = {
-                "backup_id": backup_id,
-                "created_at": time.time(),
-                "config": {
-                    "include_camera_recordings": config.include_camera_recordings,
-                    "include_chat_logs": config.include_chat_logs,
-                    "include_face_data": config.include_face_data,
-                    "include_system_logs": config.include_system_logs,
-                    "include_config": config.include_config,
-                    "max_backup_size_mb": config.max_backup_size_mb,
-                    "compression_level": config.compression_level
-                },
-                "file_count": file_count,
-                "total_size_bytes": total_size,
-                "echo_version": "2025.1"
-            }
+            with _open_archive(backup_path, "w", config.compression_level) as tar:
+                sections = (
+                    (config.include_config, self._backup_config_files, "config"),
+                    (config.include_chat_logs, self._backup_chat_logs, "chat_logs"),
+                    (config.include_face_data, self._backup_face_data, "faces"),
+                    (config.include_system_logs, self._backup_system_logs, "logs"),
+                    (config.include_camera_recordings, self._backup_camera_recordings, "camera"),
+                )
+                for enabled, backup_section, section in sections:
+                    if enabled:
+                        count, size = backup_section(tar, f"{backup_id}/{section}")
+                        file_count += count
+                        total_size += size
+                
+                # Create backup metadata
+                metadata = {
+                    "backup_id": backup_id,
+                    "created_at": time.time(),
+                    "config": {
+                        "include_camera_recordings": config.include_camera_recordings,
+                        "include_chat_logs": config.include_chat_logs,
+                        "include_face_data": config.include_face_data,
+                        "include_system_logs": config.include_system_logs,
+                        "include_config": config.include_config,
+                        "max_backup_size_mb": config.max_backup_size_mb,
+                        "compression_level": config.compression_level
+                    },
+                    "file_count": file_count,
+                    "total_size_bytes": total_size,
+                    "echo_version": "2025.1"
+                }
+                
+                metadata_bytes = orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+                info = tarfile.TarInfo(f"{backup_id}/backup_metadata.json")
+                info.size = len(metadata_bytes)
+                info.mtime = int(metadata["created_at"])
+                tar.addfile(info, io.BytesIO(metadata_bytes))
             
-            with open(temp_dir / "backup_metadata.json", 'w') as f:
-                json.dump(metadata, f, indent=2)
+            # Sidecar copy so list_backups never has to open the archive
+            self._metadata_path(backup_id).write_bytes(metadata_bytes)
             
             # Check size limit
             max_size_bytes = config.max_backup_size_mb * 1024 * 1024
@@ -117,13 +144,6 @@ class BackupService:
                 LOGGER.warning("Backup size %d MB exceeds limit %d MB", 
                              total_size // (1024 * 1024), config.max_backup_size_mb)
             
-            # Create compressed archive
-            with tarfile.open(backup_path, 'w:gz', compresslevel=config.compression_level) as tar:
-                tar.add(temp_dir, arcname=backup_id)
-            
-            # Clean up temp directory
-            shutil.rmtree(temp_dir)
-            
             # Get final backup size
             final_size = backup_path.stat().st_size
             
@@ -147,76 +167,47 @@ class BackupService:
         except Exception as exc:
             LOGGER.exception("Error creating backup: %s", exc)
             # Clean up on error
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
             if backup_path.exists():
                 backup_path.unlink()
+            self._metadata_path(backup_id).unlink(missing_ok=True)
             raise
 
-    def _backup_config_files(self, temp_dir: Path) -> int:
+    def _backup_config_files(self, tar: tarfile.TarFile, arc_dir: str) -> Tuple[int, int]:
         """Backup configuration files."""
-        config_dir = temp_dir / "config"
-        config_dir.mkdir(exist_ok=True)
-        
         file_count = 0
+        total_size = 0
         
-        # Backup .env file
-        env_file = self._settings.base_dir / ".env"
-        if env_file.exists():
-            shutil.copy2(env_file, config_dir / ".env")
-            file_count += 1
-        
-        # Backup state file
-        state_file = self._settings.data_dir / "echo_state.json"
-        if state_file.exists():
-            shutil.copy2(state_file, config_dir / "echo_state.json")
-            file_count += 1
-        
-        # Backup any other config files
         config_files = [
-            "requirements.txt",
-            "pyproject.toml",
-            "README.md"
+            self._settings.base_dir / ".env",
+            self._settings.data_dir / "echo_state.json",
+            self._settings.base_dir / "requirements.txt",
+            self._settings.base_dir / "pyproject.toml",
+            self._settings.base_dir / "README.md"
         ]
         
-        for filename in config_files:
-            file_path = self._settings.base_dir / filename
-            if file_path.exists():
-                shutil.copy2(file_path, config_dir / filename)
+        for file_path in config_files:
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                total_size += self._add_file(tar, str(file_path), f"{arc_dir}/{file_path.name}", st)
                 file_count += 1
         
-        return file_count
+        return file_count, total_size
 
-    def _backup_chat_logs(self, temp_dir: Path) -> int:
+    def _backup_chat_logs(self, tar: tarfile.TarFile, arc_dir: str) -> Tuple[int, int]:
         """Backup chat logs."""
-        chat_logs_dir = self._settings.data_dir / "chat_logs"
-        if not chat_logs_dir.exists():
-            return 0
-        
-        backup_chat_dir = temp_dir / "chat_logs"
-        shutil.copytree(chat_logs_dir, backup_chat_dir)
-        
-        # Count files
-        return len(list(backup_chat_dir.rglob("*")))
+        return self._add_tree(tar, self._settings.data_dir / "chat_logs", arc_dir)
 
-    def _backup_face_data(self, temp_dir: Path) -> int:
+    def _backup_face_data(self, tar: tarfile.TarFile, arc_dir: str) -> Tuple[int, int]:
         """Backup face recognition data."""
-        faces_dir = self._settings.data_dir / "faces"
-        if not faces_dir.exists():
-            return 0
-        
-        backup_faces_dir = temp_dir / "faces"
-        shutil.copytree(faces_dir, backup_faces_dir)
-        
-        # Count files
-        return len(list(backup_faces_dir.rglob("*")))
+        return self._add_tree(tar, self._settings.data_dir / "faces", arc_dir)
 
-    def _backup_system_logs(self, temp_dir: Path) -> int:
+    def _backup_system_logs(self, tar: tarfile.TarFile, arc_dir: str) -> Tuple[int, int]:
         """Backup system logs."""
-        logs_dir = temp_dir / "logs"
-        logs_dir.mkdir(exist_ok=True)
-        
         file_count = 0
+        total_size = 0
         
         # Try to copy system logs
         system_log_paths = [
@@ -227,67 +218,97 @@ class BackupService:
         
         for log_path in system_log_paths:
             try:
-                if Path(log_path).exists():
-                    shutil.copy2(log_path, logs_dir / Path(log_path).name)
-                    file_count += 1
+                st = os.stat(log_path)
+                total_size += self._add_file(tar, log_path, f"{arc_dir}/{Path(log_path).name}", st)
+                file_count += 1
+            except FileNotFoundError:
+                continue
             except PermissionError:
                 LOGGER.warning("No permission to access %s", log_path)
             except Exception as exc:
                 LOGGER.warning("Error copying %s: %s", log_path, exc)
         
         # Copy application logs if they exist
-        app_logs_dir = self._settings.data_dir / "logs"
-        if app_logs_dir.exists():
-            shutil.copytree(app_logs_dir, logs_dir / "echo")
-            file_count += len(list((logs_dir / "echo").rglob("*")))
-        
-        return file_count
+        count, size = self._add_tree(tar, self._settings.data_dir / "logs", f"{arc_dir}/echo")
+        return file_count + count, total_size + size
 
-    def _backup_camera_recordings(self, temp_dir: Path) -> int:
+    def _backup_camera_recordings(self, tar: tarfile.TarFile, arc_dir: str) -> Tuple[int, int]:
         """Backup camera recordings."""
-        camera_dir = self._settings.data_dir / "camera_recordings"
-        if not camera_dir.exists():
-            return 0
-        
-        backup_camera_dir = temp_dir / "camera"
-        shutil.copytree(camera_dir, backup_camera_dir)
-        
-        # Count files
-        return len(list(backup_camera_dir.rglob("*")))
+        return self._add_tree(tar, self._settings.data_dir / "camera_recordings", arc_dir)
+
+    def _add_tree(self, tar: tarfile.TarFile, src: Path, arc_dir: str) -> Tuple[int, int]:
+        """Add every regular file under ``src`` to ``tar`` beneath ``arc_dir``.
+
+        Symlinks and special files are skipped. Returns ``(file_count, total_bytes)``.
+        """
+        file_count = 0
+        total_size = 0
+        pending = [(str(src), arc_dir)]
+        while pending:
+            src_dir, arc_prefix = pending.pop()
+            try:
+                entries = os.scandir(src_dir)
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_symlink():
+                        continue
+                    arcname = f"{arc_prefix}/{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append((entry.path, arcname))
+                    elif entry.is_file(follow_symlinks=False):
+                        # DirEntry caches the stat from the directory read.
+                        total_size += self._add_file(tar, entry.path, arcname, entry.stat(follow_symlinks=False))
+                        file_count += 1
+        return file_count, total_size
+
+    @staticmethod
+    def _add_file(tar: tarfile.TarFile, path: str, arcname: str, st: os.stat_result) -> int:
+        """Add one regular file using an existing stat result; returns its size.
+
+        Building the TarInfo ourselves skips tar.add's extra lstat and its
+        per-file pwd/grp lookups. The file is opened before the header is
+        written, so an unreadable file leaves the archive untouched.
+        """
+        info = tarfile.TarInfo(arcname)
+        info.size = st.st_size
+        info.mtime = int(st.st_mtime)
+        info.mode = stat.S_IMODE(st.st_mode)
+        info.uid = st.st_uid
+        info.gid = st.st_gid
+        with open(path, "rb") as f:
+            tar.addfile(info, f)
+        return st.st_size
 
     def list_backups(self) -> List[BackupInfo]:
         """List all available backups."""
         backups = []
         
-        for backup_file in self._backup_dir.glob("*.tar.gz"):
+        for backup_file in self._archives():
+            backup_id = self._backup_id(backup_file)
             try:
-                # Extract metadata from backup
-                with tarfile.open(backup_file, 'r:gz') as tar:
-                    try:
-                        metadata_file = tar.extractfile(f"{backup_file.stem}/backup_metadata.json")
-                        if metadata_file:
-                            metadata = json.loads(metadata_file.read().decode())
-                            
-                            backup_info = BackupInfo(
-                                backup_id=metadata["backup_id"],
-                                created_at=metadata["created_at"],
-                                size_bytes=backup_file.stat().st_size,
-                                file_count=metadata["file_count"],
-                                config=BackupConfig(**metadata["config"]),
-                                path=str(backup_file)
-                            )
-                            backups.append(backup_info)
-                    except (KeyError, json.JSONDecodeError):
-                        # Fallback for old backups without metadata
-                        backup_info = BackupInfo(
-                            backup_id=backup_file.stem,
-                            created_at=backup_file.stat().st_mtime,
-                            size_bytes=backup_file.stat().st_size,
-                            file_count=0,
-                            config=BackupConfig(),
-                            path=str(backup_file)
-                        )
-                        backups.append(backup_info)
+                metadata = self._read_metadata(backup_file, backup_id)
+                if metadata is not None:
+                    backup_info = BackupInfo(
+                        backup_id=metadata["backup_id"],
+                        created_at=metadata["created_at"],
+                        size_bytes=backup_file.stat().st_size,
+                        file_count=metadata["file_count"],
+                        config=BackupConfig(**metadata["config"]),
+                        path=str(backup_file)
+                    )
+                else:
+                    # Fallback for old backups without metadata
+                    backup_info = BackupInfo(
+                        backup_id=backup_id,
+                        created_at=backup_file.stat().st_mtime,
+                        size_bytes=backup_file.stat().st_size,
+                        file_count=0,
+                        config=BackupConfig(),
+                        path=str(backup_file)
+                    )
+                backups.append(backup_info)
                         
             except Exception as exc:
                 LOGGER.warning("Error reading backup %s: %s", backup_file, exc)
@@ -299,9 +320,9 @@ class BackupService:
     def restore_backup(self, backup_id: str, restore_path: Optional[Path] = None) -> bool:
         """Restore a backup to the specified path."""
         try:
-            backup_file = self._backup_dir / f"{backup_id}.tar.gz"
-            if not backup_file.exists():
-                LOGGER.error("Backup file not found: %s", backup_file)
+            backup_file = self._find_archive(backup_id)
+            if backup_file is None:
+                LOGGER.error("Backup file not found: %s", backup_id)
                 return False
             
             if restore_path is None:
@@ -309,9 +330,10 @@ class BackupService:
             
             restore_path.mkdir(parents=True, exist_ok=True)
             
-            # Extract backup
-            with tarfile.open(backup_file, 'r:gz') as tar:
-                tar.extractall(restore_path)
+            # Extract backup, preferring the system tar (with pigz/zstd when present)
+            if not self._extract_with_tar(backup_file, restore_path):
+                with _open_archive(backup_file, "r") as tar:
+                    tar.extractall(restore_path)
             
             LOGGER.info("Restored backup %s to %s", backup_id, restore_path)
             return True
@@ -320,22 +342,82 @@ class BackupService:
             LOGGER.exception("Error restoring backup %s: %s", backup_id, exc)
             return False
 
+    def _extract_with_tar(self, backup_file: Path, restore_path: Path) -> bool:
+        """Extract with GNU tar; returns False when it is unavailable or fails."""
+        if shutil.which("tar") is None:
+            return False
+        if backup_file.name.endswith(".tar.zst"):
+            if shutil.which("zstd") is None:
+                return False
+            compress = "--use-compress-program=zstd"
+        else:
+            # pigz decompresses on a separate thread and uses faster CRC code
+            compress = "--use-compress-program=pigz" if shutil.which("pigz") else "--gzip"
+        try:
+            subprocess.run(
+                ["tar", "-x", compress, "-f", str(backup_file), "-C", str(restore_path)],
+                check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+        except subprocess.CalledProcessError as exc:
+            LOGGER.warning("tar failed for %s, using tarfile: %s", backup_file,
+                           exc.stderr.decode("utf-8", "replace").strip())
+            return False
+        return True
+
     def delete_backup(self, backup_id: str) -> bool:
         """Delete a backup."""
         try:
-            backup_file = self._backup_dir / f"{backup_id}.tar.gz"
-            if backup_file.exists():
+            backup_file = self._find_archive(backup_id)
+            if backup_file is not None:
                 backup_file.unlink()
+                self._metadata_path(backup_id).unlink(missing_ok=True)
                 LOGGER.info("Deleted backup %s", backup_id)
                 return True
             else:
-                LOGGER.warning("Backup file not found: %s", backup_file)
+                LOGGER.warning("Backup file not found: %s", backup_id)
                 return False
                 
         except Exception as exc:
             LOGGER.exception("Error deleting backup %s: %s", backup_id, exc)
             return False
 
+    def _metadata_path(self, backup_id: str) -> Path:
+        return self._backup_dir / f"{backup_id}.json"
+
+    def _read_metadata(self, backup_file: Path, backup_id: str) -> Optional[Dict]:
+        """Load metadata from the sidecar, or from inside the archive for older backups."""
+        try:
+            return orjson.loads(self._metadata_path(backup_id).read_bytes())
+        except FileNotFoundError:
+            pass
+        with _open_archive(backup_file, "r") as tar:
+            for member in tar:
+                if member.name == f"{backup_id}/backup_metadata.json":
+                    metadata_file = tar.extractfile(member)
+                    return orjson.loads(metadata_file.read()) if metadata_file else None
+        return None
+
+    def _archives(self) -> List[Path]:
+        # One directory read for every archive format rather than a glob per suffix.
+        with os.scandir(self._backup_dir) as entries:
+            return [Path(entry.path) for entry in entries
+                    if entry.name.endswith(ARCHIVE_SUFFIXES) and entry.is_file()]
+
+    def _find_archive(self, backup_id: str) -> Optional[Path]:
+        for suffix in ARCHIVE_SUFFIXES:
+            path = self._backup_dir / f"{backup_id}{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    @staticmethod
+    def _backup_id(path: Path) -> str:
+        for suffix in ARCHIVE_SUFFIXES:
+            if path.name.endswith(suffix):
+                return path.name[:-len(suffix)]
+        return path.name
+
     def _cleanup_old_backups(self) -> None:
         """Clean up old backups to stay within limits."""
         try:
@@ -349,14 +431,3 @@ class BackupService:
                     
         except Exception as exc:
             LOGGER.exception("Error cleaning up old backups: %s", exc)
-
-    def _get_dir_size(self, path: Path) -> int:
-        """Get total size of directory in bytes."""
-        total_size = 0
-        try:
-            for file_path in path.rglob("*"):
-                if file_path.is_file():
-                    total_size += file_path.stat().st_size
-        except Exception:
-            pass
-        return total_size
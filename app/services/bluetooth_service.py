@@ -0,0 +1,126 @@
+"""Continuous Bluetooth discovery via a long-lived bluetoothctl process."""
+from __future__ import annotations
+
+import logging
+import re
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+LOGGER = logging.getLogger("echo.bluetooth")
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]|\x01|\x02")
+_EVENT_RE = re.compile(r"(?:\[(NEW|CHG|DEL)\] )?Device ([0-9A-F]{2}(?::[0-9A-F]{2}){5})(?: (.*))?$", re.I)
+# bluetoothctl prints "0xffffffc4 (-60)", a bare "-60", or (older BlueZ) just "0xffffffc4".
+_RSSI_PAREN_RE = re.compile(r"\((-?\d+)\)")
+_RSSI_RE = re.compile(r"^\s*(0x[0-9a-f]+|-?\d+)\s*$", re.I)
+
+
+def _parse_rssi(value: str) -> Optional[int]:
+    match = _RSSI_PAREN_RE.search(value)
+    if match:
+        return int(match.group(1))
+    match = _RSSI_RE.match(value)
+    if not match:
+        return None
+    text = match.group(1)
+    if not text.lower().startswith("0x"):
+        return int(text)
+    number = int(text, 16) & 0xFFFFFFFF
+    return number - (1 << 32) if number & 0x80000000 else number
+
+
+class BluetoothScanner:
+    """Keep discovery running in the background and serve the latest device snapshot.
+
+    Replaces a blocking scan per request: bluetoothctl streams [NEW]/[CHG]/[DEL]
+    events which are folded into an in-memory table that endpoints read in O(1).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._devices: Dict[str, Dict[str, Any]] = {}
+        self._process: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+        self._available = True
+
+    def ensure_started(self) -> bool:
+        """Start the scanner if needed; returns False when bluetoothctl is unavailable."""
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                return True
+            if not self._available:
+                return False
+            try:
+                self._process = subprocess.Popen(
+                    ["bluetoothctl"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    bufsize=1,
+                )
+            except FileNotFoundError:
+                LOGGER.warning("bluetoothctl not found; background Bluetooth discovery disabled")
+                self._available = False
+                return False
+            self._process.stdin.write("power on\nscan on\ndevices\n")
+            self._process.stdin.flush()
+            self._thread = threading.Thread(target=self._read_loop, args=(self._process,), daemon=True)
+            self._thread.start()
+            LOGGER.info("Background Bluetooth discovery started")
+            return True
+
+    def devices(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(device) for device in self._devices.values()]
+
+    def stop(self) -> None:
+        with self._lock:
+            process, self._process = self._process, None
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.stdin.write("scan off\nquit\n")
+            process.stdin.flush()
+            process.wait(timeout=2.0)
+        except Exception:
+            process.kill()
+
+    def _read_loop(self, process: subprocess.Popen) -> None:
+        for raw_line in process.stdout:
+            self._handle_line(_ANSI_RE.sub("", raw_line).strip())
+        LOGGER.info("Background Bluetooth discovery stopped")
+
+    def _handle_line(self, line: str) -> None:
+        # Events may follow an interactive prompt such as "[bluetooth]# ".
+        start = line.find("Device ")
+        if start < 0:
+            return
+        if start >= 6 and line[start - 6:start - 1] in {"[NEW]", "[CHG]", "[DEL]"}:
+            start -= 6
+        match = _EVENT_RE.match(line[start:])
+        if match is None:
+            return
+        event, device_id, rest = match.groups()
+        rest = rest or ""
+        with self._lock:
+            if event == "DEL":
+                self._devices.pop(device_id, None)
+                return
+            device = self._devices.setdefault(
+                device_id,
+                {"id": device_id, "name": "Unknown Device", "status": "Available", "rssi": None},
+            )
+            device["last_seen"] = time.time()
+            if event == "CHG":
+                key, _, value = rest.partition(": ")
+                if key == "RSSI":
+                    rssi = _parse_rssi(value)
+                    if rssi is not None:
+                        device["rssi"] = rssi
+                elif key in {"Name", "Alias"} and value:
+                    device["name"] = value
+            elif rest:
+                device["name"] = rest
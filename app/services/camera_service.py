@@ -6,15 +6,24 @@ import os
 import threading
 import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 try:
     import cv2  # type: ignore
 except Exception:  # pragma: no cover - optional dependency
     cv2 = None
 
+try:  # PyTurboJPEG is optional; SIMD libjpeg-turbo encoding when present
+    from turbojpeg import TurboJPEG  # type: ignore
+except ImportError:  # pragma: no cover - runtime fallback
+    TurboJPEG = None
 
-@dataclass
+JPEG_QUALITY = 80
+# Keep encoding every frame for this long after the last frame() call.
+READER_IDLE_TIMEOUT = 2.0
+
+
+@dataclass(slots=True, frozen=True)
 class CameraConfig:
     name: str
     device: str
@@ -26,8 +35,22 @@ class CameraStream:
     def __init__(self, config: CameraConfig) -> None:
         self.config = config
         self._capture = None
-        self._last_frame: Optional[bytes] = None
-        self._lock = threading.Lock()
+        self._frame_seq = 0
+        # Latest capture as (raw_seq, frame), kept raw so JPEG encoding only
+        # happens when someone reads. _encoded is (raw_seq, jpeg) of the newest
+        # published frame. Each is replaced as one tuple, so readers on the
+        # frame() path can take either without the lock.
+        self._raw: Optional[Tuple[int, Any]] = None
+        self._raw_seq = 0
+        self._encoded: Tuple[int, Optional[bytes]] = (0, None)
+        self._waiters = 0
+        self._last_read = 0.0
+        self._jpeg_params: List[int] = []
+        # True when the device hands us its own MJPG bytes and no encode is needed.
+        self._passthrough = False
+        self._turbo = None
+        # Signalled on every new frame so streaming clients wake immediately.
+        self._frame_ready = threading.Condition()
         self._thread: Optional[threading.Thread] = None
         self._running = threading.Event()
 
@@ -52,8 +75,33 @@ class CameraStream:
             self._capture = None
 
     def frame(self) -> Optional[bytes]:
-        with self._lock:
-            return self._last_frame
+        self._last_read = time.monotonic()
+        raw = self._raw
+        encoded_seq, data = self._encoded
+        if raw is None or encoded_seq == raw[0]:
+            return data
+        # The loop was idle; encode the newest capture on demand.
+        fresh = self._encode(raw[1])
+        if fresh is None:
+            return data
+        self._publish(fresh, raw[0])
+        return fresh
+
+    def wait_for_frame(self, after: int, timeout: float) -> Tuple[int, Optional[bytes]]:
+        """Block until a frame newer than sequence ``after`` exists; returns (seq, frame).
+
+        Only the newest frame is returned, so slow clients skip frames rather than lag.
+        On timeout the frame is None.
+        """
+        with self._frame_ready:
+            self._waiters += 1
+            try:
+                if not self._frame_ready.wait_for(lambda: self._frame_seq > after, timeout):
+                    return after, None
+                return self._frame_seq, self._encoded[1]
+            finally:
+                self._waiters -= 1
+                self._last_read = time.monotonic()
 
     def _loop(self) -> None:
         assert cv2 is not None
@@ -62,27 +110,53 @@ class CameraStream:
         self._capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self._capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
         self._capture.set(cv2.CAP_PROP_FPS, self.config.fps)
+        self._passthrough = False
         try:
             fourcc = cv2.VideoWriter_fourcc(*"MJPG")
             self._capture.set(cv2.CAP_PROP_FOURCC, fourcc)
+            # With RGB conversion off, V4L2 returns the camera's JPEG as-is.
+            if int(self._capture.get(cv2.CAP_PROP_FOURCC)) == fourcc:
+                self._passthrough = bool(self._capture.set(cv2.CAP_PROP_CONVERT_RGB, 0))
         except Exception:
             pass
+        self._jpeg_params = [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY]
+        if TurboJPEG is not None and self._turbo is None:
+            try:
+                self._turbo = TurboJPEG()
+            except Exception:  # libturbojpeg missing on this host
+                self._turbo = None
 
         interval = max(1.0 / max(self.config.fps, 1), 0.01)
-        while self._running.is_set():
+        running = self._running.is_set
+        monotonic = time.monotonic
+        # Pace against a deadline so time spent reading/encoding counts
+        # toward the frame interval instead of being added to it.
+        next_deadline = monotonic()
+        while running():
             ok, frame = self._capture.read()
             if not ok:
                 time.sleep(0.03)
+                next_deadline = monotonic()
                 continue
-            try:
-                ok, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
-            except Exception:
-                ok = False
-                buffer = None
-            if ok and buffer is not None:
-                with self._lock:
-                    self._last_frame = buffer.tobytes()
-            time.sleep(interval)
+            if self._passthrough and not (frame.ndim == 1 or frame.shape[0] == 1):
+                # The backend decoded anyway; fall back to encoding ourselves.
+                self._passthrough = False
+                self._capture.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            # read() hands back a fresh array each call, so it can be kept without a copy.
+            self._raw_seq += 1
+            raw_seq = self._raw_seq
+            self._raw = (raw_seq, frame)
+            if self._waiters > 0 or monotonic() - self._last_read < READER_IDLE_TIMEOUT:
+                data = self._encode(frame)
+                if data is not None:
+                    self._publish(data, raw_seq)
+            next_deadline += interval
+            now = monotonic()
+            if now < next_deadline:
+                time.sleep(next_deadline - now)
+            else:
+                # Running behind; restart the schedule rather than bursting to catch up.
+                next_deadline = now
 
         if self._capture:
             try:
@@ -91,6 +165,26 @@ class CameraStream:
                 pass
             self._capture = None
 
+    def _encode(self, frame) -> Optional[bytes]:
+        if self._passthrough:
+            return frame.tobytes()
+        try:
+            if self._turbo is not None:
+                return self._turbo.encode(frame, quality=JPEG_QUALITY)
+            ok, buffer = cv2.imencode(".jpg", frame, self._jpeg_params)
+        except Exception:
+            return None
+        return buffer.tobytes() if ok and buffer is not None else None
+
+    def _publish(self, data: bytes, raw_seq: int) -> None:
+        with self._frame_ready:
+            # An on-demand encode may finish after the loop published a newer frame.
+            if raw_seq <= self._encoded[0]:
+                return
+            self._encoded = (raw_seq, data)
+            self._frame_seq += 1
+            self._frame_ready.notify_all()
+
 
 class CameraService:
     def __init__(self, streams: Dict[str, CameraStream]) -> None:
@@ -119,6 +213,10 @@ class CameraService:
         stream = self._get(name)
         return stream.frame()
 
+    def wait_for_frame(self, name: str, after: int = 0, timeout: float = 1.0) -> Tuple[int, Optional[bytes]]:
+        stream = self._get(name)
+        return stream.wait_for_frame(after, timeout)
+
     def stop_all(self) -> None:
         for stream in self._streams.values():
             stream.stop()
@@ -32,6 +32,8 @@ class ChatLogService:
         self._current_session: List[ChatMessage] = []
         self._max_session_messages = 1000
         self._max_log_files = 30  # Keep last 30 days of logs
+        # Seeded from the clock so versions never repeat across restarts.
+        self._version = time.time_ns()
 
     def log_message(self, role: str, content: str, metadata: Optional[Dict[str, any]] = None, 
                    face_detected: Optional[str] = None, confidence: Optional[float] = None) -> str:
@@ -49,6 +51,7 @@ class ChatLogService:
         )
         
         self._current_session.append(message)
+        self._version += 1
         
         # Trim session if too long
         if len(self._current_session) > self._max_session_messages:
@@ -88,6 +91,10 @@ class ChatLogService:
         }
         return self.log_message("system", event, metadata)
 
+    def version(self) -> int:
+        """Counter bumped on every logged message; changes whenever recent messages do."""
+        return self._version
+
     def get_recent_messages(self, limit: int = 50) -> List[Dict[str, any]]:
         """Get recent messages from current session."""
         return [
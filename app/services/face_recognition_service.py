@@ -1,32 +1,42 @@
 """Face recognition and identification service."""
 from __future__ import annotations
 
-import json
 import logging
 import os
 import pickle
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+
+import orjson
+from werkzeug.utils import secure_filename
 
 try:
     import cv2
     import numpy as np
-    from sklearn.svm import SVC
-    from sklearn.preprocessing import LabelEncoder
 except ImportError:
     cv2 = None
     np = None
-    SVC = None
-    LabelEncoder = None
 
 from app.config import Settings
 
 LOGGER = logging.getLogger("echo.face_recognition")
 
+# Encodings live in one (N, D) uint8 array; the JSON holds per-face details in the same order.
+FACES_META_FILE = "faces_meta.json"
+FACES_ENCODINGS_FILE = "faces_encodings.npy"
+# Pre-.npy format, still read when the files above do not exist yet.
+LEGACY_FACES_FILE = "known_faces.json"
+ENCODING_SIZE = (64, 64)
+# OpenCV Zoo YuNet model; used instead of the Haar cascade when present under <data_dir>/models.
+YUNET_MODEL_FILE = "face_detection_yunet_2023mar.onnx"
+# last_seen updates are batched and written at most this often.
+LAST_SEEN_FLUSH_INTERVAL = 30.0
+
 
-@dataclass
+@dataclass(slots=True)
 class FaceData:
     name: str
     encoding: np.ndarray
@@ -35,7 +45,7 @@ class FaceData:
     image_path: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FaceDetection:
     name: str
     confidence: float
@@ -44,14 +54,24 @@ class FaceDetection:
 
 
 class FaceRecognitionService:
+    # The Haar XML is parsed once per process, not per service instance.
+    _FACE_CASCADE = None
+
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
         self._face_cascade = None
+        self._yunet = None
         self._known_faces: Dict[str, FaceData] = {}
         self._face_encodings: List[np.ndarray] = []
         self._face_names: List[str] = []
-        self._classifier: Optional[SVC] = None
-        self._label_encoder: Optional[LabelEncoder] = None
+        # L2-normalized encodings, one row per entry in _names_index.
+        self._encoding_matrix: Optional[np.ndarray] = None
+        self._names_index: List[str] = []
+        # cv2.resize writes every encoding here instead of allocating per face.
+        self._encoding_buf = np.empty(ENCODING_SIZE[::-1], np.uint8) if np is not None else None
+        self._encoding_lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = time.monotonic()
         self._data_dir = settings.data_dir / "faces"
         self._data_dir.mkdir(parents=True, exist_ok=True)
         
@@ -61,41 +81,60 @@ class FaceRecognitionService:
 
     def _initialize_face_detection(self) -> None:
         """Initialize OpenCV face detection."""
+        model_path = self._settings.data_dir / "models" / YUNET_MODEL_FILE
+        if model_path.exists() and hasattr(cv2, "FaceDetectorYN"):
+            try:
+                self._yunet = cv2.FaceDetectorYN.create(str(model_path), "", (320, 240))
+                LOGGER.info("Face detection initialized (YuNet)")
+                return
+            except Exception as exc:
+                LOGGER.warning("Failed to load YuNet model, using Haar cascade: %s", exc)
+                self._yunet = None
+        
         try:
-            # Try to load Haar cascade for face detection
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self._face_cascade = cv2.CascadeClassifier(cascade_path)
-            
-            if self._face_cascade.empty():
-                LOGGER.warning("Could not load face cascade classifier")
-                self._face_cascade = None
-            else:
-                LOGGER.info("Face detection initialized")
+            cls = type(self)
+            if cls._FACE_CASCADE is None:
+                # Try to load Haar cascade for face detection
+                cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+                cascade = cv2.CascadeClassifier(cascade_path)
+                if cascade.empty():
+                    LOGGER.warning("Could not load face cascade classifier")
+                    return
+                cls._FACE_CASCADE = cascade
+            self._face_cascade = cls._FACE_CASCADE
+            LOGGER.info("Face detection initialized")
         except Exception as exc:
             LOGGER.warning("Failed to initialize face detection: %s", exc)
             self._face_cascade = None
 
     def detect_faces(self, image: np.ndarray) -> List[FaceDetection]:
         """Detect faces in an image and return bounding boxes."""
-        if self._face_cascade is None or image is None:
+        if (self._yunet is None and self._face_cascade is None) or image is None:
             return []
         
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            faces = self._face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
+            if self._yunet is not None:
+                # YuNet works on the BGR frame directly; gray is only needed for encodings
+                height, width = image.shape[:2]
+                self._yunet.setInputSize((width, height))
+                _, found = self._yunet.detect(image)
+                if found is None:
+                    return []
+                faces = [(max(int(x), 0), max(int(y), 0), int(w), int(h)) for x, y, w, h in found[:, :4]]
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            else:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                faces = self._face_cascade.detectMultiScale(
+                    gray,
+                    scaleFactor=1.1,
+                    minNeighbors=5,
+                    minSize=(30, 30)
+                )
             
             detections = []
             for (x, y, w, h) in faces:
-                # Extract face region
-                face_region = image[y:y+h, x:x+w]
-                
-                # Try to recognize the face
-                name, confidence = self._recognize_face(face_region)
+                # Recognize from the frame-level grayscale; no per-face BGR crop
+                name, confidence = self._recognize_face(gray[y:y+h, x:x+w])
                 
                 detections.append(FaceDetection(
                     name=name,
@@ -110,23 +149,22 @@ class FaceRecognitionService:
             LOGGER.exception("Error detecting faces: %s", exc)
             return []
 
-    def _recognize_face(self, face_image: np.ndarray) -> Tuple[str, float]:
-        """Recognize a face and return name and confidence."""
-        if not self._known_faces or self._classifier is None:
+    def _recognize_face(self, face_gray: np.ndarray) -> Tuple[str, float]:
+        """Recognize a grayscale face crop and return name and confidence."""
+        if not self._known_faces or self._encoding_matrix is None:
             return "Unknown", 0.0
         
         try:
             # Extract face encoding (simplified - in real implementation, use face_recognition library)
-            face_encoding = self._extract_face_encoding(face_image)
-            if face_encoding is None:
-                return "Unknown", 0.0
-            
-            # Predict using trained classifier
-            prediction = self._classifier.predict([face_encoding])
-            confidence = max(self._classifier.predict_proba([face_encoding])[0])
+            with self._encoding_lock:
+                # astype copies out of the shared buffer before it is released
+                query = self._extract_face_encoding_gray(face_gray).astype(np.float32)
             
-            name = self._label_encoder.inverse_transform(prediction)[0]
-            return name, confidence
+            # Nearest known face by cosine similarity
+            query /= max(float(np.linalg.norm(query)), 1e-6)
+            similarities = self._encoding_matrix @ query
+            best = int(similarities.argmax())
+            return self._names_index[best], min(float(similarities[best]), 1.0)
             
         except Exception as exc:
             LOGGER.exception("Error recognizing face: %s", exc)
@@ -136,27 +174,50 @@ class FaceRecognitionService:
         """Extract face encoding from face image."""
         # This is a simplified version - in production, use face_recognition library
         try:
-            # Resize to standard size
-            face_resized = cv2.resize(face_image, (64, 64))
-            # Convert to grayscale
-            face_gray = cv2.cvtColor(face_resized, cv2.COLOR_BGR2GRAY)
-            # Flatten to 1D array
-            return face_gray.flatten()
+            face_gray = cv2.cvtColor(face_image, cv2.COLOR_BGR2GRAY)
+            with self._encoding_lock:
+                return self._extract_face_encoding_gray(face_gray).copy()
         except Exception as exc:
             LOGGER.exception("Error extracting face encoding: %s", exc)
             return None
 
-    def add_face(self, name: str, face_image: np.ndarray, confidence_threshold: float = 0.8) -> bool:
-        """Add a new face to the known faces database."""
+    def _extract_face_encoding_gray(self, face_gray: np.ndarray) -> np.ndarray:
+        """Resize a grayscale crop into the shared buffer and return it flattened.
+
+        The result is a view of ``_encoding_buf``; callers hold ``_encoding_lock``
+        and copy it before releasing the lock.
+        """
+        cv2.resize(face_gray, ENCODING_SIZE, dst=self._encoding_buf)
+        return self._encoding_buf.reshape(-1)
+
+    def add_face(self, name: str, face_image: Union[np.ndarray, bytes], confidence_threshold: float = 0.8) -> bool:
+        """Add a new face to the known faces database.
+
+        ``face_image`` is either a decoded BGR image or the raw JPEG bytes; bytes
+        are stored as-is and only decoded (as grayscale) for the encoding.
+        """
+        # ``name`` may come straight from a request; it must not pick the directory.
+        face_path = self._face_image_path(name)
+        if face_path is None:
+            LOGGER.warning("Rejected face name %r", name)
+            return False
         try:
-            face_encoding = self._extract_face_encoding(face_image)
+            if isinstance(face_image, (bytes, bytearray)):
+                face_gray = cv2.imdecode(np.frombuffer(face_image, np.uint8), cv2.IMREAD_GRAYSCALE)
+                if face_gray is None:
+                    return False
+                with self._encoding_lock:
+                    face_encoding = self._extract_face_encoding_gray(face_gray).copy()
+            else:
+                face_encoding = self._extract_face_encoding(face_image)
             if face_encoding is None:
                 return False
             
             # Save face image
-            face_filename = f"{name}_{int(time.time())}.jpg"
-            face_path = self._data_dir / face_filename
-            cv2.imwrite(str(face_path), face_image)
+            if isinstance(face_image, (bytes, bytearray)):
+                face_path.write_bytes(face_image)
+            else:
+                cv2.imwrite(str(face_path), face_image)
             
             # Add to known faces
             face_data = FaceData(
@@ -171,8 +232,8 @@ class FaceRecognitionService:
             self._face_encodings.append(face_encoding)
             self._face_names.append(name)
             
-            # Retrain classifier
-            self._train_classifier()
+            # Add (or replace) just this face's row in the recognition index
+            self._index_add(name, face_encoding)
             
             # Save to disk
             self._save_known_faces()
@@ -184,22 +245,59 @@ class FaceRecognitionService:
             LOGGER.exception("Error adding face for %s: %s", name, exc)
             return False
 
+    def _face_image_path(self, name: str) -> Optional[Path]:
+        """Where to store a new image for ``name``; None if it would leave the faces dir."""
+        stem = secure_filename(name)
+        if not stem:
+            return None
+        data_dir = self._data_dir.resolve()
+        face_path = (data_dir / f"{stem}_{int(time.time())}.jpg").resolve()
+        if face_path.parent != data_dir:
+            return None
+        return face_path
+
     def _train_classifier(self) -> None:
-        """Train the face recognition classifier."""
-        if not self._face_encodings or not self._face_names:
+        """Rebuild the normalized encoding matrix used for recognition."""
+        if not self._known_faces:
+            self._encoding_matrix = None
+            self._names_index = []
             return
         
         try:
-            self._label_encoder = LabelEncoder()
-            encoded_labels = self._label_encoder.fit_transform(self._face_names)
-            
-            self._classifier = SVC(kernel='linear', probability=True)
-            self._classifier.fit(self._face_encodings, encoded_labels)
+            names = list(self._known_faces)
+            matrix = np.stack([self._known_faces[name].encoding for name in names]).astype(np.float32)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-6)
+            self._encoding_matrix = matrix
+            self._names_index = names
             
-            LOGGER.info("Face classifier trained with %d faces", len(self._face_encodings))
+            LOGGER.info("Face index built with %d faces", len(names))
             
         except Exception as exc:
-            LOGGER.exception("Error training face classifier: %s", exc)
+            LOGGER.exception("Error building face index: %s", exc)
+
+    def _index_add(self, name: str, encoding: np.ndarray) -> None:
+        """Insert one face into the index without renormalizing the others."""
+        row = encoding.astype(np.float32)
+        row /= max(float(np.linalg.norm(row)), 1e-6)
+        if self._encoding_matrix is None:
+            self._encoding_matrix = row[np.newaxis, :]
+            self._names_index = [name]
+        elif name in self._names_index:
+            self._encoding_matrix[self._names_index.index(name)] = row
+        else:
+            self._encoding_matrix = np.vstack((self._encoding_matrix, row))
+            self._names_index = self._names_index + [name]
+
+    def _index_remove(self, name: str) -> None:
+        if name not in self._names_index:
+            return
+        if len(self._names_index) == 1:
+            self._encoding_matrix = None
+            self._names_index = []
+            return
+        idx = self._names_index.index(name)
+        self._encoding_matrix = np.delete(self._encoding_matrix, idx, axis=0)
+        self._names_index = self._names_index[:idx] + self._names_index[idx + 1:]
 
     def get_known_faces(self) -> List[Dict[str, any]]:
         """Get list of known faces."""
@@ -233,12 +331,8 @@ class FaceRecognitionService:
             if face_data.image_path and Path(face_data.image_path).exists():
                 Path(face_data.image_path).unlink()
             
-            # Retrain classifier
-            if self._face_encodings:
-                self._train_classifier()
-            else:
-                self._classifier = None
-                self._label_encoder = None
+            # Drop this face's row from the recognition index
+            self._index_remove(name)
             
             # Save to disk
             self._save_known_faces()
@@ -253,24 +347,30 @@ class FaceRecognitionService:
     def _load_known_faces(self) -> None:
         """Load known faces from disk."""
         try:
-            faces_file = self._data_dir / "known_faces.json"
-            if not faces_file.exists():
-                return
-            
-            with open(faces_file, 'r') as f:
-                data = json.load(f)
-            
-            for name, face_info in data.items():
+            meta_file = self._data_dir / FACES_META_FILE
+            if meta_file.exists():
+                meta = orjson.loads(meta_file.read_bytes())
+                # Rows are views into the memmap; nothing is copied until training.
+                encodings = np.load(self._data_dir / FACES_ENCODINGS_FILE, mmap_mode='r') if meta else []
+            else:
+                legacy_file = self._data_dir / LEGACY_FACES_FILE
+                if not legacy_file.exists():
+                    return
+                data = orjson.loads(legacy_file.read_bytes())
+                meta = [dict(face_info, name=name) for name, face_info in data.items()]
+                encodings = [np.array(face_info['encoding'], dtype=np.uint8) for face_info in meta]
+            
+            for face_info, encoding in zip(meta, encodings):
                 face_data = FaceData(
-                    name=name,
-                    encoding=np.array(face_info['encoding']),
+                    name=face_info['name'],
+                    encoding=encoding,
                     confidence=face_info['confidence'],
                     last_seen=face_info['last_seen'],
                     image_path=face_info.get('image_path')
                 )
-                self._known_faces[name] = face_data
+                self._known_faces[face_data.name] = face_data
                 self._face_encodings.append(face_data.encoding)
-                self._face_names.append(name)
+                self._face_names.append(face_data.name)
             
             if self._face_encodings:
                 self._train_classifier()
@@ -280,22 +380,33 @@ class FaceRecognitionService:
         except Exception as exc:
             LOGGER.exception("Error loading known faces: %s", exc)
 
-    def _save_known_faces(self) -> None:
-        """Save known faces to disk."""
+    def _save_known_faces(self, encodings: bool = True) -> None:
+        """Save known faces to disk; ``encodings=False`` rewrites only the metadata."""
         try:
-            faces_file = self._data_dir / "known_faces.json"
-            data = {}
-            
-            for name, face_data in self._known_faces.items():
-                data[name] = {
-                    'encoding': face_data.encoding.tolist(),
+            faces = list(self._known_faces.values())
+            meta = [
+                {
+                    'name': face_data.name,
                     'confidence': face_data.confidence,
                     'last_seen': face_data.last_seen,
                     'image_path': face_data.image_path
                 }
-            
-            with open(faces_file, 'w') as f:
-                json.dump(data, f, indent=2)
+                for face_data in faces
+            ]
+            
+            encodings_file = self._data_dir / FACES_ENCODINGS_FILE
+            if not faces:
+                encodings_file.unlink(missing_ok=True)
+            elif encodings or not encodings_file.exists():
+                # Replace rather than overwrite: loaded encodings may still be
+                # memory-mapped from the current file.
+                tmp_file = encodings_file.with_name(encodings_file.name + ".tmp")
+                with open(tmp_file, 'wb') as f:
+                    np.save(f, np.stack([face_data.encoding for face_data in faces]))
+                os.replace(tmp_file, encodings_file)
+            (self._data_dir / FACES_META_FILE).write_bytes(orjson.dumps(meta, option=orjson.OPT_INDENT_2))
+            self._dirty = False
+            self._last_flush = time.monotonic()
             
             LOGGER.info("Saved %d known faces", len(self._known_faces))
             
@@ -306,4 +417,11 @@ class FaceRecognitionService:
         """Update the last seen timestamp for a face."""
         if name in self._known_faces:
             self._known_faces[name].last_seen = time.time()
-            self._save_known_faces()
+            self._dirty = True
+            if time.monotonic() - self._last_flush >= LAST_SEEN_FLUSH_INTERVAL:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write pending last_seen updates; called periodically and on shutdown."""
+        if self._dirty:
+            self._save_known_faces(encodings=False)
@@ -1,19 +1,36 @@
 """System metrics collection."""
 from __future__ import annotations
 
+import os
 import platform
 import shutil
 import socket
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 try:  # psutil is optional during development
     import psutil  # type: ignore
 except ImportError:  # pragma: no cover - runtime fallback
     psutil = None
 
+# Fixed for the life of the process; platform.platform() in particular may
+# read /etc/os-release or spawn uname, so resolve these once at import.
+_HOSTNAME = socket.gethostname()
+_PLATFORM = platform.platform()
+_PYTHON = platform.python_version()
+
+# Slow-moving sections refresh on their own schedule; anything not listed
+# (system, core) follows the service-wide cache TTL.
+SECTION_TTLS = {"storage": 30.0, "network": 60.0, "temps": 30.0}
+CORE_SAMPLE_INTERVAL = 1.0
+HWMON_DIR = "/sys/class/hwmon"
+THERMAL_DIR = "/sys/class/thermal"
+# rtnetlink multicast group for IPv4 address add/remove notifications.
+RTMGRP_IPV4_IFADDR = 0x10
+
 
 @dataclass
 class MetricsSnapshot:
@@ -22,53 +39,109 @@ class MetricsSnapshot:
 
 
 class MetricsService:
-    def __init__(self, cache_ttl: float = 2.0) -> None:
+    def __init__(self, cache_ttl: float = 2.0, temp_sensors: Sequence[str] = ()) -> None:
         self._cache_ttl = cache_ttl
-        self._cache: Optional[MetricsSnapshot] = None
+        self._temp_sensors = tuple(temp_sensors)
+        # (sensor name, label, high, critical, input path), discovered on first use.
+        self._sensor_paths: Optional[List[Tuple[str, str, Optional[float], Optional[float], str]]] = None
+        self._cache: Dict[str, MetricsSnapshot] = {}
+        self._addr_events = _open_addr_events()
+        self._storage_root = Path.home().anchor or "/"
+        self._boot_time: Optional[float] = psutil.boot_time() if psutil and hasattr(psutil, "boot_time") else None
+        self._sections: Dict[str, Callable[[], Dict[str, Any]]] = {
+            "system": self._system_info,
+            "core": self._core_metrics,
+            "storage": self._storage_metrics,
+            "network": self._network_metrics,
+            "temps": self._temperature_metrics,
+        }
+        # CPU/memory/load are sampled by a background thread so the CPU figure
+        # always spans a full interval and readers never touch /proc.
+        self._core: Dict[str, Any] = {"cpu_percent": None, "load": None, "memory": None}
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        if psutil:
+            self._sampler = threading.Thread(target=self._sample_core, name="metrics-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler and self._sampler.is_alive():
+            self._sampler.join(timeout=CORE_SAMPLE_INTERVAL + 0.5)
+        if self._addr_events is not None:
+            self._addr_events.close()
+            self._addr_events = None
 
-    def current(self) -> Dict[str, Any]:
+    def current(self, sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """All sections, or only the named ones; unknown names are ignored."""
         now = time.time()
-        if self._cache and now - self._cache.captured_at <= self._cache_ttl:
-            return self._cache.payload
-        payload = self._gather()
-        self._cache = MetricsSnapshot(now, payload)
-        return payload
+        names = self._sections if sections is None else [name for name in sections if name in self._sections]
+        return {name: self._section(name, now) for name in names}
 
-    def _gather(self) -> Dict[str, Any]:
-        return {
-            "system": self._system_info(),
-            "core": self._core_metrics(),
-            "storage": self._storage_metrics(),
-            "network": self._network_metrics(),
-            "temps": self._temperature_metrics(),
-        }
+    def system(self) -> Dict[str, Any]:
+        return self._section("system", time.time())
+
+    def core(self) -> Dict[str, Any]:
+        return self._section("core", time.time())
+
+    def storage(self) -> Dict[str, Any]:
+        return self._section("storage", time.time())
+
+    def network(self) -> Dict[str, Any]:
+        return self._section("network", time.time())
+
+    def temps(self) -> Dict[str, Any]:
+        return self._section("temps", time.time())
+
+    def _section(self, name: str, now: float) -> Dict[str, Any]:
+        cached = self._cache.get(name)
+        ttl = max(SECTION_TTLS.get(name, 0.0), self._cache_ttl)
+        if cached and now - cached.captured_at <= ttl and not (name == "network" and self._addresses_changed()):
+            return cached.payload
+        payload = self._sections[name]()
+        self._cache[name] = MetricsSnapshot(now, payload)
+        return payload
 
     def _system_info(self) -> Dict[str, Any]:
         return {
-            "hostname": socket.gethostname(),
-            "platform": platform.platform(),
-            "python": platform.python_version(),
+            "hostname": _HOSTNAME,
+            "platform": _PLATFORM,
+            "python": _PYTHON,
             "uptime_seconds": self._uptime_seconds(),
         }
 
     def _core_metrics(self) -> Dict[str, Any]:
-        cpu = mem = load = None
-        if psutil:
-            cpu = psutil.cpu_percent(interval=None)
-            mem_info = psutil.virtual_memory()._asdict()
-            mem = {"total": mem_info.get("total", 0), "used": mem_info.get("used", 0)}
+        return self._core
+
+    def _sample_core(self) -> None:
+        # The delta is taken against our own cpu_times() reading rather than
+        # cpu_percent(interval=None), whose baseline other callers can reset.
+        previous = _cpu_totals(psutil.cpu_times())
+        while not self._stop.wait(CORE_SAMPLE_INTERVAL):
             try:
-                load = psutil.getloadavg()
-            except (AttributeError, OSError):
-                load = None
-        return {
-            "cpu_percent": cpu,
-            "load": load,
-            "memory": mem,
-        }
+                current = _cpu_totals(psutil.cpu_times())
+                cpu_percent = _busy_percent(previous, current)
+                previous = current
+                memory = psutil.virtual_memory()
+                try:
+                    load = psutil.getloadavg()
+                except (AttributeError, OSError):
+                    load = None
+                self._core = {
+                    "cpu_percent": cpu_percent,
+                    "load": load,
+                    "memory": {
+                        "total": memory.total,
+                        "used": memory.used,
+                        "available": memory.available,
+                        "percent": memory.percent,
+                    },
+                }
+            except Exception:
+                continue
 
     def _storage_metrics(self) -> Dict[str, Any]:
-        root = shutil.disk_usage(Path.home().anchor or "/")
+        root = shutil.disk_usage(self._storage_root)
         return {
             "root": {"total": root.total, "used": root.used, "free": root.free},
         }
@@ -85,13 +158,48 @@ class MetricsService:
                 pass
         return {"interfaces": addrs}
 
+    def _addresses_changed(self) -> bool:
+        """Drain pending rtnetlink address events; True if any arrived."""
+        sock = self._addr_events
+        if sock is None:
+            return False
+        changed = False
+        try:
+            while sock.recv(65536):
+                changed = True
+        except BlockingIOError:
+            pass
+        except OSError:
+            # e.g. ENOBUFS after an overflow: events were lost, so refresh.
+            changed = True
+        return changed
+
     def _temperature_metrics(self) -> Dict[str, Any]:
+        if not self._temp_sensors:
+            return self._all_temperatures()
+        if self._sensor_paths is None:
+            self._sensor_paths = _discover_sensors(self._temp_sensors)
+        temps: Dict[str, Any] = {}
+        for name, label, high, critical, path in self._sensor_paths:
+            current = _read_millidegrees(path)
+            if current is not None:
+                temps.setdefault(name, []).append(
+                    {"label": label, "current": current, "high": high, "critical": critical}
+                )
+        return temps
+
+    def _all_temperatures(self) -> Dict[str, Any]:
         temps: Dict[str, Any] = {}
         if psutil and hasattr(psutil, "sensors_temperatures"):
             try:
                 for name, readings in psutil.sensors_temperatures().items():
                     temps[name] = [
-                        reading._asdict() if hasattr(reading, "_asdict") else reading
+                        {
+                            "label": reading.label,
+                            "current": reading.current,
+                            "high": reading.high,
+                            "critical": reading.critical,
+                        }
                         for reading in readings
                     ]
             except Exception:
@@ -99,6 +207,95 @@ class MetricsService:
         return temps
 
     def _uptime_seconds(self) -> Optional[float]:
-        if psutil and hasattr(psutil, "boot_time"):
-            return time.time() - psutil.boot_time()
+        if self._boot_time is None:
+            return None
+        return time.time() - self._boot_time
+
+
+def _cpu_totals(times: Any) -> Tuple[float, float]:
+    """(total, busy) seconds from a cpu_times() tuple, counted the way psutil does."""
+    total = sum(times)
+    # On Linux guest time is already included in user/nice.
+    total -= getattr(times, "guest", 0.0) + getattr(times, "guest_nice", 0.0)
+    busy = total - times.idle - getattr(times, "iowait", 0.0)
+    return total, busy
+
+
+def _busy_percent(before: Tuple[float, float], after: Tuple[float, float]) -> float:
+    elapsed = after[0] - before[0]
+    if elapsed <= 0:
+        return 0.0
+    return round(min(max((after[1] - before[1]) / elapsed * 100.0, 0.0), 100.0), 1)
+
+
+def _open_addr_events() -> Optional[socket.socket]:
+    """Subscribe to IPv4 address changes so cached interface addresses can be invalidated."""
+    if not hasattr(socket, "AF_NETLINK"):
         return None
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        sock.bind((0, RTMGRP_IPV4_IFADDR))
+        sock.setblocking(False)
+        return sock
+    except OSError:
+        return None
+
+
+def _read_text(path: str) -> str:
+    try:
+        with open(path) as handle:
+            return handle.read().strip()
+    except OSError:
+        return ""
+
+
+def _read_millidegrees(path: str) -> Optional[float]:
+    try:
+        with open(path, "rb") as handle:
+            return int(handle.read()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+def _discover_sensors(names: Sequence[str]) -> List[Tuple[str, str, Optional[float], Optional[float], str]]:
+    """Resolve whitelisted sensor names to their sysfs temperature files once.
+
+    hwmon devices are preferred, as in psutil; thermal zones only fill in
+    names no hwmon device provided.
+    """
+    wanted = set(names)
+    found: List[Tuple[str, str, Optional[float], Optional[float], str]] = []
+    seen = set()
+    try:
+        hwmons = sorted(os.listdir(HWMON_DIR))
+    except OSError:
+        hwmons = []
+    for hwmon in hwmons:
+        base = os.path.join(HWMON_DIR, hwmon)
+        name = _read_text(os.path.join(base, "name"))
+        if name not in wanted:
+            continue
+        try:
+            inputs = sorted(entry for entry in os.listdir(base) if entry.startswith("temp") and entry.endswith("_input"))
+        except OSError:
+            continue
+        for entry in inputs:
+            prefix = os.path.join(base, entry[:-len("_input")])
+            found.append((
+                name,
+                _read_text(prefix + "_label"),
+                _read_millidegrees(prefix + "_max"),
+                _read_millidegrees(prefix + "_crit"),
+                os.path.join(base, entry),
+            ))
+            seen.add(name)
+    try:
+        zones = sorted(entry for entry in os.listdir(THERMAL_DIR) if entry.startswith("thermal_zone"))
+    except OSError:
+        zones = []
+    for zone in zones:
+        base = os.path.join(THERMAL_DIR, zone)
+        name = _read_text(os.path.join(base, "type"))
+        if name in wanted and name not in seen:
+            found.append((name, "", None, None, os.path.join(base, "temp")))
+    return found
@@ -1,18 +1,20 @@
 """Text-to-speech queue and playback."""
 from __future__ import annotations
 
-import json
+import hashlib
 import logging
+import os
 import queue
 import subprocess
-import tempfile
 import threading
 import time
 import uuid
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
+import orjson
 import requests
 
 from app.config import Settings
@@ -20,6 +22,9 @@ from app.services.state_service import StateService
 
 LOGGER = logging.getLogger("echo.speech")
 
+TTS_CHUNK_SIZE = 64 * 1024
+TTS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
 
 @dataclass
 class SpeechTask:
@@ -37,6 +42,25 @@ class SpeechService:
         self._worker = threading.Thread(target=self._worker_loop, daemon=True)
         self._running = threading.Event()
         self._active_task: Optional[SpeechTask] = None
+        # Mirrors the queue contents so status() never walks Queue internals.
+        self._pending: deque[SpeechTask] = deque()
+        self._pending_lock = threading.Lock()
+        # Keep-alive session so back-to-back tasks skip the TLS handshake to OpenAI.
+        self._session = requests.Session()
+        self._session.headers.update(
+            {
+                "Authorization": f"Bearer {settings.openai_api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+        # argv for the decode | play pipeline never changes, so build it once.
+        self._decode_cmd = (
+            *(settings.ffmpeg_cmd or ("ffmpeg",)),
+            "-loglevel", "error", "-i", "pipe:0", "-f", "wav", "-ar", "16000", "-ac", "1", "pipe:1",
+        )
+        self._play_cmd = (*(settings.speech_player_cmd or ("aplay",)), "-")
+        self._tts_cache_dir = settings.data_dir / "tts_cache"
+        self._tts_cache_dir.mkdir(parents=True, exist_ok=True)
         self._running.set()
         self._worker.start()
 
@@ -44,21 +68,21 @@ class SpeechService:
         if not text.strip():
             raise ValueError("Cannot speak empty text")
         task = SpeechTask(id=str(uuid.uuid4()), text=text.strip(), voice=voice, created_at=time.time())
-        try:
-            self._queue.put_nowait(task)
-        except queue.Full as exc:
-            raise RuntimeError("Speech queue is full") from exc
+        with self._pending_lock:
+            try:
+                self._queue.put_nowait(task)
+            except queue.Full as exc:
+                raise RuntimeError("Speech queue is full") from exc
+            self._pending.append(task)
         self._state.record_event("speech", {"id": task.id, "status": "queued", "text": task.text})
         return task
 
     def stop(self) -> None:
+        # The worker re-checks the flag every time its 0.5 s queue poll times out.
         self._running.clear()
-        try:
-            self._queue.put_nowait(SpeechTask(id="__quit__", text="", voice=None, created_at=time.time()))
-        except queue.Full:
-            pass
         if self._worker.is_alive():
             self._worker.join(timeout=1.0)
+        self._session.close()
 
     def status(self) -> Dict[str, object]:
         return {
@@ -67,12 +91,8 @@ class SpeechService:
         }
 
     def _pending_snapshot(self) -> List[SpeechTask]:
-        items = list(getattr(self._queue, "queue", []))
-        tasks: List[SpeechTask] = []
-        for item in items:
-            if isinstance(item, SpeechTask) and item.id != "__quit__":
-                tasks.append(item)
-        return tasks
+        with self._pending_lock:
+            return list(self._pending)
 
     def _task_info(self, task: Optional[SpeechTask], status: str) -> Optional[Dict[str, str]]:
         if not task:
@@ -90,8 +110,8 @@ class SpeechService:
                 task = self._queue.get(timeout=0.5)
             except queue.Empty:
                 continue
-            if task.id == "__quit__":
-                break
+            with self._pending_lock:
+                self._pending.popleft()
             self._active_task = task
             self._handle_task(task)
             self._active_task = None
@@ -104,60 +124,110 @@ class SpeechService:
         self._state.record_event("speech", {"id": task.id, "status": "started", "text": task.text})
         try:
             if self._settings.openai_api_key:
-                audio_path = self._synthesize_openai(task)
-                self._play_file(audio_path)
-                Path(audio_path).unlink(missing_ok=True)
+                self._speak_openai(task)
             else:
                 self._speak_fallback(task)
-            self._state.record_event(
-                "speech",
-                {"id": task.id, "status": "completed", "text": task.text},
-            )
+            event = {"id": task.id, "status": "completed", "text": task.text}
         except Exception as exc:  # pragma: no cover - runtime path
             LOGGER.exception("Speech task failed: %s", exc)
-            self._state.record_event(
-                "speech",
-                {"id": task.id, "status": "failed", "error": str(exc), "text": task.text},
-            )
+            event = {"id": task.id, "status": "failed", "error": str(exc), "text": task.text}
+        if self._pending_snapshot():
+            patch = {"state": "talking"}
+        else:
+            patch = {"state": "idle", "last_talk": time.time()}
+        self._state.record_and_update("speech", event, patch)
+
+    def _speak_openai(self, task: SpeechTask) -> None:
+        voice = task.voice or self._settings.tts_voice
+        model = self._settings.tts_model
+        key = hashlib.sha256(f"{task.text}|{voice}|{model}".encode("utf-8")).hexdigest()
+        cached = self._tts_cache_dir / f"{key}.mp3"
+        try:
+            os.utime(cached)  # mtime doubles as the LRU timestamp
+        except FileNotFoundError:
+            pass
+        else:
+            self._play_stream(self._read_chunks(cached))
+            return
+
+        payload = {"model": model, "voice": voice, "input": task.text}
+        partial = cached.with_name(f"{key}.{task.id}.part")
+        try:
+            with self._session.post(
+                "https://api.openai.com/v1/audio/speech",
+                data=orjson.dumps(payload),
+                stream=True,
+                timeout=90,
+            ) as response, partial.open("wb") as sink:
+                response.raise_for_status()
+                self._play_stream(self._tee(response.iter_content(chunk_size=TTS_CHUNK_SIZE), sink))
+            os.replace(partial, cached)
         finally:
-            if self._pending_snapshot():
-                self._state.update({"state": "talking"})
-            else:
-                self._state.update({"state": "idle", "last_talk": time.time()})
+            partial.unlink(missing_ok=True)
+        self._evict_tts_cache()
+
+    @staticmethod
+    def _read_chunks(path: Path) -> Iterator[bytes]:
+        with path.open("rb") as handle:
+            while chunk := handle.read(TTS_CHUNK_SIZE):
+                yield chunk
+
+    @staticmethod
+    def _tee(chunks: Iterable[bytes], sink) -> Iterator[bytes]:
+        for chunk in chunks:
+            sink.write(chunk)
+            yield chunk
+
+    def _evict_tts_cache(self) -> None:
+        """Drop least recently played clips once the cache exceeds TTS_CACHE_MAX_BYTES."""
+        entries = []
+        total = 0
+        with os.scandir(self._tts_cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".mp3"):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        if total <= TTS_CACHE_MAX_BYTES:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= TTS_CACHE_MAX_BYTES:
+                break
 
-    def _synthesize_openai(self, task: SpeechTask) -> str:
-        voice = task.voice or self._settings.tts_voice
-        payload = {"model": self._settings.tts_model, "voice": voice, "input": task.text}
-        headers = {
-            "Authorization": f"Bearer {self._settings.openai_api_key}",
-            "Content-Type": "application/json",
-        }
-        response = requests.post(
-            "https://api.openai.com/v1/audio/speech",
-            headers=headers,
-            data=json.dumps(payload),
-            timeout=90,
-        )
-        response.raise_for_status()
-        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as mp3:
-            mp3.write(response.content)
-            mp3_path = mp3.name
-        wav_path = self._convert_to_wav(mp3_path)
-        Path(mp3_path).unlink(missing_ok=True)
-        return wav_path
-
-    def _convert_to_wav(self, mp3_path: str) -> str:
-        wav_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        wav_path = wav_file.name
-        wav_file.close()
-        ffmpeg_cmd = self._settings.ffmpeg_cmd or ["ffmpeg"]
-        cmd = ffmpeg_cmd + ["-y", "-i", mp3_path, "-ar", "16000", "-ac", "1", wav_path]
-        subprocess.run(cmd, check=True)
-        return wav_path
-
-    def _play_file(self, audio_path: str) -> None:
-        player = self._settings.speech_player_cmd or ["aplay"]
-        subprocess.run(player + [audio_path], check=True)
+    def _play_stream(self, chunks: Iterable[bytes]) -> None:
+        """Decode MP3 chunks with ffmpeg and pipe the WAV output straight into the player."""
+        decoder = subprocess.Popen(self._decode_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        try:
+            player = subprocess.Popen(self._play_cmd, stdin=decoder.stdout)
+        except Exception:
+            decoder.kill()
+            decoder.wait()
+            raise
+        # Only the player holds the read end now, so ffmpeg sees EPIPE if it exits early.
+        decoder.stdout.close()
+        try:
+            for chunk in chunks:
+                decoder.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # decoder or player died; reported through the return codes below
+        finally:
+            try:
+                decoder.stdin.close()
+            except BrokenPipeError:
+                pass
+            decoder.wait()
+            player.wait()
+        if decoder.returncode:
+            raise subprocess.CalledProcessError(decoder.returncode, self._decode_cmd)
+        if player.returncode:
+            raise subprocess.CalledProcessError(player.returncode, self._play_cmd)
 
     def _speak_fallback(self, task: SpeechTask) -> None:
         LOGGER.warning("OPENAI_API_KEY missing; using espeak fallback")
@@ -10,6 +10,8 @@ from pathlib import Path
 from queue import Queue, Full
 from typing import Any, Deque, Dict, Iterable
 
+import orjson
+
 DEFAULT_STATE: Dict[str, Any] = {
     "state": "idle",
     "last_talk": 0.0,
@@ -17,12 +19,20 @@ DEFAULT_STATE: Dict[str, Any] = {
 }
 
 
+def encode_sse(event: Dict[str, Any]) -> bytes:
+    """Render an event as one Server-Sent Events ``data:`` frame."""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
 class StateService:
     def __init__(self, path: Path, history_size: int = 100) -> None:
         self._path = Path(path)
         self._lock = threading.RLock()
         self._state: Dict[str, Any] = DEFAULT_STATE.copy()
         self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        # Encoded SSE frames for the same events, joined lazily for replay.
+        self._history_frames: Deque[bytes] = deque(maxlen=history_size)
+        self._history_blob: bytes | None = None
         self._listeners: set[Queue] = set()
         self._path.parent.mkdir(parents=True, exist_ok=True)
         self._load()
@@ -32,33 +42,38 @@ class StateService:
             return deepcopy(self._state)
 
     def update(self, patch: Dict[str, Any]) -> Dict[str, Any]:
-        patch = dict(patch or {})
         with self._lock:
-            state = deepcopy(self._state)
-            toggles_patch = patch.pop("toggles", None)
-            state.update(patch)
-            if isinstance(toggles_patch, dict):
-                state.setdefault("toggles", {})
-                state["toggles"].update(toggles_patch)
-            if state.get("state") == "talking" and not state.get("last_talk"):
-                state["last_talk"] = time.time()
-            self._state = state
-            self._persist()
-            event = {"type": "state", "data": deepcopy(self._state), "ts": time.time()}
-            self._history.append(event)
-            self._broadcast(event)
-            return deepcopy(self._state)
+            return self._apply(patch)
+
+    def record_and_update(
+        self, event_type: str, payload: Dict[str, Any], patch: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Record an event and apply a state patch under a single lock acquisition."""
+        event = {"type": event_type, "data": payload, "ts": time.time()}
+        with self._lock:
+            self._record(event)
+            return self._apply(patch)
 
     def record_event(self, event_type: str, payload: Dict[str, Any]) -> None:
         event = {"type": event_type, "data": payload, "ts": time.time()}
         with self._lock:
-            self._history.append(event)
-        self._broadcast(event)
+            self._record(event)
+
+    def publish(self, event_type: str, payload: Dict[str, Any]) -> None:
+        """Send a transient event to live listeners without adding it to the replay history."""
+        self._broadcast(encode_sse({"type": event_type, "data": payload, "ts": time.time()}))
 
     def history(self) -> Iterable[Dict[str, Any]]:
         with self._lock:
             return list(self._history)
 
+    def history_bytes(self) -> bytes:
+        """The replay history as one pre-encoded SSE blob, shared by new subscribers."""
+        with self._lock:
+            if self._history_blob is None:
+                self._history_blob = b"".join(self._history_frames)
+            return self._history_blob
+
     def add_listener(self, max_size: int = 32) -> Queue:
         queue: Queue = Queue(maxsize=max_size)
         with self._lock:
@@ -69,11 +84,35 @@ class StateService:
         with self._lock:
             self._listeners.discard(queue)
 
-    def _broadcast(self, event: Dict[str, Any]) -> None:
+    def _apply(self, patch: Dict[str, Any]) -> Dict[str, Any]:
+        patch = dict(patch or {})
+        state = deepcopy(self._state)
+        toggles_patch = patch.pop("toggles", None)
+        state.update(patch)
+        if isinstance(toggles_patch, dict):
+            state.setdefault("toggles", {})
+            state["toggles"].update(toggles_patch)
+        if state.get("state") == "talking" and not state.get("last_talk"):
+            state["last_talk"] = time.time()
+        self._state = state
+        self._persist()
+        event = {"type": "state", "data": deepcopy(self._state), "ts": time.time()}
+        self._record(event)
+        return deepcopy(self._state)
+
+    def _record(self, event: Dict[str, Any]) -> None:
+        # Encoded once: the same frame goes to the replay history and to every listener.
+        frame = encode_sse(event)
+        self._history.append(event)
+        self._history_frames.append(frame)
+        self._history_blob = None
+        self._broadcast(frame)
+
+    def _broadcast(self, payload: bytes) -> None:
         dead: list[Queue] = []
         for listener in list(self._listeners):
             try:
-                listener.put_nowait(event)
+                listener.put_nowait(payload)
             except Full:
                 dead.append(listener)
         for listener in dead:
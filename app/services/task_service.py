@@ -0,0 +1,91 @@
+"""Background execution for slow system commands."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+LOGGER = logging.getLogger("echo.tasks")
+
+DEFAULT_QUEUES = ("net", "bt", "sync", "voice")
+
+
+@dataclass
+class BackgroundTask:
+    id: str
+    name: str
+    queue: str
+    created_at: float
+    state: str = "queued"  # 'queued', 'running', 'succeeded', 'failed'
+    result: Any = None
+    error: Optional[str] = None
+    finished_at: Optional[float] = None
+
+
+class TaskService:
+    """Run blocking jobs off the request thread and keep their results for polling.
+
+    Each named queue gets its own single worker so, e.g., a Bluetooth scan
+    never waits behind a WiFi connect.
+    """
+
+    def __init__(self, queues: Iterable[str] = DEFAULT_QUEUES, max_tasks: int = 100) -> None:
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"echo-{name}")
+            for name in queues
+        }
+        self._tasks: "OrderedDict[str, BackgroundTask]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_tasks = max_tasks
+
+    def submit(self, queue: str, name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> BackgroundTask:
+        if queue not in self._executors:
+            raise KeyError(f"Unknown task queue: {queue}")
+        task = BackgroundTask(id=str(uuid.uuid4()), name=name, queue=queue, created_at=time.time())
+        with self._lock:
+            self._tasks[task.id] = task
+            while len(self._tasks) > self._max_tasks:
+                self._tasks.popitem(last=False)
+        self._executors[queue].submit(self._run, task, func, args, kwargs)
+        return task
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            return self._task_info(task)
+
+    def stop(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task: BackgroundTask, func: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        task.state = "running"
+        try:
+            task.result = func(*args, **kwargs)
+            task.state = "succeeded"
+        except Exception as exc:
+            LOGGER.exception("Task %s (%s) failed: %s", task.id, task.name, exc)
+            task.error = str(exc)
+            task.state = "failed"
+        finally:
+            task.finished_at = time.time()
+
+    @staticmethod
+    def _task_info(task: BackgroundTask) -> Dict[str, Any]:
+        return {
+            "id": task.id,
+            "name": task.name,
+            "queue": task.queue,
+            "state": task.state,
+            "result": task.result,
+            "error": task.error,
+            "created_at": task.created_at,
+            "finished_at": task.finished_at,
+        }
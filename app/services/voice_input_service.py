@@ -1,21 +1,71 @@
 """Voice input and speech recognition service."""
 from __future__ import annotations
 
+import io
 import logging
+import os
+import queue
 import subprocess
 import tempfile
 import threading
 import time
+import wave
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Any, Callable, Deque, List, Optional, Tuple
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+
+try:  # PyAudio needs PortAudio; fall back to a long-lived arecord without it
+    import pyaudio  # type: ignore
+except ImportError:  # pragma: no cover - runtime fallback
+    pyaudio = None
+
+try:  # webrtcvad is optional; an energy gate is used without it
+    import webrtcvad  # type: ignore
+except ImportError:  # pragma: no cover - runtime fallback
+    webrtcvad = None
+
+try:  # in-process Whisper; the whisper CLI is used without it
+    from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio  # type: ignore
+except ImportError:  # pragma: no cover - runtime fallback
+    BatchedInferencePipeline = WhisperModel = decode_audio = None
 
 from app.config import Settings
+from app.utils.ring_buffer import SampleRingBuffer
 
 LOGGER = logging.getLogger("echo.voice_input")
 
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+FRAME_BYTES = FRAME_SAMPLES * 2  # 16-bit mono
+VAD_AGGRESSIVENESS = 2
+# Mean absolute amplitude that counts as speech when webrtcvad is missing.
+ENERGY_THRESHOLD = 500
+# Endpointing, in 20 ms frames: keep 300 ms of lead-in, close the utterance
+# after 600 ms of silence, ignore blips under 300 ms and hand off unbroken
+# speech to STT every 15 s.
+PRE_ROLL_FRAMES = 15
+ENDPOINT_SILENCE_FRAMES = 30
+MIN_UTTERANCE_FRAMES = 15
+MAX_UTTERANCE_FRAMES = 750
+# Capture -> endpointer handoff holds 2 s of audio.
+RING_SAMPLES = 2 * SAMPLE_RATE
+# No audio for this long means the capture source died and is reopened.
+CAPTURE_TIMEOUT = 2.0
+# Uncommitted audio carried between chunks of unbroken speech is capped at
+# Whisper's 30 s window so each decode stays bounded.
+ACTIVE_MAX_SAMPLES = 30 * SAMPLE_RATE
+# SCHED_FIFO priority for the capture threads (needs CAP_SYS_NICE).
+CAPTURE_RT_PRIORITY = 10
+# Utterances waiting for transcription; capture drops new ones beyond this.
+UTTERANCE_QUEUE_MAX = 4
+WHISPER_BATCH_SIZE = 8
+
 
 @dataclass
 class VoiceInput:
@@ -32,25 +82,54 @@ class VoiceInputService:
         self._running = threading.Event()
         self._listening = threading.Event()
         self._worker_thread: Optional[threading.Thread] = None
+        self._stt_thread: Optional[threading.Thread] = None
+        # Capture hands finished utterances to the STT thread so it never stops reading.
+        self._utterances: "queue.Queue[Tuple[int, bytes, bool]]" = queue.Queue(maxsize=UTTERANCE_QUEUE_MAX)
+        # Audio after the last committed segment while an utterance is still going,
+        # tagged with that utterance so a paused or dropped one cannot leak into the next.
+        self._carry = np.empty(0, dtype=np.float32)
+        self._carry_utterance = 0
         self._audio_file: Optional[tempfile.NamedTemporaryFile] = None
+        # One capture stream for the life of the listener instead of a process per window.
+        self._pyaudio: Optional[Any] = None
+        self._stream: Optional[Any] = None
+        self._arecord: Optional[subprocess.Popen] = None
+        self._arecord_reader: Optional[threading.Thread] = None
+        # Filled by the PyAudio callback or arecord reader, drained frame by frame.
+        self._ring = SampleRingBuffer(RING_SAMPLES)
+        self._frame = np.empty(FRAME_SAMPLES, dtype=np.int16)
+        self._vad = webrtcvad.Vad(VAD_AGGRESSIVENESS) if webrtcvad is not None else None
+        # Keep-alive pool so each upload skips the TLS handshake to OpenAI.
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+        self._session.headers["Authorization"] = f"Bearer {settings.openai_api_key}"
+        # Loaded on first local transcription and kept for the life of the service.
+        self._whisper: Optional[Any] = None
+        self._whisper_lock = threading.Lock()
 
     def start_listening(self) -> None:
         """Start continuous voice input listening."""
         if self._running.is_set():
             return
         
+        self._open_capture()
         self._running.set()
         self._listening.set()
-        self._worker_thread = threading.Thread(target=self._listen_loop, daemon=True)
+        self._worker_thread = threading.Thread(target=self._listen_loop, name="echo-audio-capture", daemon=True)
+        self._stt_thread = threading.Thread(target=self._transcribe_loop, name="echo-stt", daemon=True)
         self._worker_thread.start()
+        self._stt_thread.start()
         LOGGER.info("Voice input service started")
 
     def stop_listening(self) -> None:
         """Stop voice input listening."""
         self._listening.clear()
         self._running.clear()
-        if self._worker_thread and self._worker_thread.is_alive():
-            self._worker_thread.join(timeout=2.0)
+        for thread in (self._worker_thread, self._stt_thread):
+            if thread and thread.is_alive():
+                thread.join(timeout=2.0)
+        self._close_capture()
+        self._session.close()
         LOGGER.info("Voice input service stopped")
 
     def pause_listening(self) -> None:
@@ -68,102 +147,284 @@ class VoiceInputService:
         return self._listening.is_set()
 
     def _listen_loop(self) -> None:
-        """Main listening loop."""
+        """Main listening loop: read 20 ms frames and queue voiced segments for STT."""
+        _raise_thread_priority()
+        pre_roll: Deque[bytes] = deque(maxlen=PRE_ROLL_FRAMES)
+        voiced: List[bytes] = []
+        in_speech = False
+        continued = False
+        lead_in = 0
+        silence = 0
+        utterance = 0
         while self._running.is_set():
+            try:
+                frame = self._read_frame()
+            except Exception as exc:
+                LOGGER.warning("Audio capture failed, reopening: %s", exc)
+                self._close_capture()
+                time.sleep(1.0)
+                if self._running.is_set():
+                    self._open_capture()
+                continue
+            
+            # Keep draining the device while paused so resuming never replays stale audio.
             if not self._listening.is_set():
-                time.sleep(0.1)
+                pre_roll.clear()
+                voiced = []
+                in_speech = False
                 continue
             
-            try:
-                # Record audio
-                audio_data = self._record_audio()
-                if not audio_data:
-                    time.sleep(0.5)
+            speech = self._is_speech(frame)
+            if not in_speech:
+                pre_roll.append(frame)
+                if speech:
+                    voiced = list(pre_roll)
+                    lead_in = len(voiced) - 1
+                    pre_roll.clear()
+                    utterance += 1
+                    in_speech = True
+                    continued = False
+                    silence = 0
+                continue
+            
+            voiced.append(frame)
+            silence = 0 if speech else silence + 1
+            if silence >= ENDPOINT_SILENCE_FRAMES:
+                in_speech = False
+                final = True
+                # A lone blip is noise, but the tail of a long utterance must still close it.
+                if not continued and len(voiced) - lead_in - silence < MIN_UTTERANCE_FRAMES:
+                    voiced = []
                     continue
-                
-                # Process audio
-                voice_input = self._process_audio(audio_data)
+            elif len(voiced) >= MAX_UTTERANCE_FRAMES:
+                continued = True
+                final = False
+            else:
+                continue
+            
+            frames, voiced = voiced, []
+            try:
+                self._utterances.put_nowait((utterance, b"".join(frames), final))
+            except queue.Full:
+                LOGGER.warning("Transcription is behind; dropping utterance")
+
+    def _transcribe_loop(self) -> None:
+        """Turn queued utterances into text and pass them to the callback."""
+        if WhisperModel is not None and not self._settings.openai_api_key:
+            # Pay the model load before the first utterance rather than during it.
+            try:
+                self._whisper_pipeline()
+            except Exception as exc:
+                LOGGER.warning("Could not preload Whisper model: %s", exc)
+        while self._running.is_set():
+            try:
+                utterance, pcm, final = self._utterances.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                voice_input = self._process_pcm(pcm, final, utterance)
                 if voice_input and voice_input.text.strip():
                     self._on_voice_input(voice_input)
-                
             except Exception as exc:
                 LOGGER.exception("Error in voice input loop: %s", exc)
-                time.sleep(1.0)
 
-    def _record_audio(self) -> Optional[bytes]:
-        """Record audio from microphone."""
+    def _open_capture(self) -> None:
+        device = self._settings.voice_input_device
+        self._ring.clear()
+        if pyaudio is not None:
+            try:
+                self._pyaudio = pyaudio.PyAudio()
+                self._stream = self._pyaudio.open(
+                    format=pyaudio.paInt16,
+                    channels=1,
+                    rate=SAMPLE_RATE,
+                    input=True,
+                    frames_per_buffer=FRAME_SAMPLES,
+                    input_device_index=int(device) if device.isdigit() else None,
+                    stream_callback=self._on_audio,
+                )
+                return
+            except Exception as exc:
+                LOGGER.warning("PyAudio capture unavailable, using arecord: %s", exc)
+                self._close_capture()
+        # Use arecord to capture audio (ALSA on Raspberry Pi), as one continuous raw stream
+        cmd = ["arecord", "-q", "-f", "S16_LE", "-r", str(SAMPLE_RATE), "-c", "1", "-t", "raw"]
+        if device and not device.isdigit():
+            cmd += ["-D", device]
         try:
-            # Use arecord to capture audio (ALSA on Raspberry Pi)
-            cmd = [
-                "arecord",
-                "-f", "S16_LE",  # 16-bit signed little endian
-                "-r", "16000",   # 16kHz sample rate
-                "-c", "1",       # Mono
-                "-d", "3",       # 3 seconds max
-                "-t", "wav"      # WAV format
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, timeout=5)
-            if result.returncode == 0:
-                return result.stdout
-            else:
-                LOGGER.warning("arecord failed: %s", result.stderr.decode())
-                return None
-                
-        except subprocess.TimeoutExpired:
-            LOGGER.warning("Audio recording timeout")
-            return None
-        except Exception as exc:
+            self._arecord = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError as exc:
             LOGGER.warning("Audio recording failed: %s", exc)
+            return
+        self._arecord_reader = threading.Thread(
+            target=self._read_arecord, args=(self._arecord,), name="echo-arecord-reader", daemon=True
+        )
+        self._arecord_reader.start()
+
+    def _close_capture(self) -> None:
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+            self._pyaudio = None
+        if self._arecord is not None:
+            self._arecord.kill()
+            self._arecord.wait()
+            self._arecord = None
+        if self._arecord_reader is not None:
+            self._arecord_reader.join(timeout=1.0)
+            self._arecord_reader = None
+
+    def _on_audio(self, in_data: bytes, frame_count: int, time_info: Any, status: int) -> tuple:
+        self._ring.push(np.frombuffer(in_data, dtype=np.int16))
+        return None, pyaudio.paContinue
+
+    def _read_arecord(self, process: subprocess.Popen) -> None:
+        _raise_thread_priority()
+        while True:
+            chunk = process.stdout.read(FRAME_BYTES)
+            if len(chunk) < FRAME_BYTES:
+                return
+            self._ring.push(np.frombuffer(chunk, dtype=np.int16))
+
+    def _read_frame(self) -> bytes:
+        if not self._ring.pop_into(self._frame, CAPTURE_TIMEOUT):
+            raise RuntimeError(f"no audio captured for {CAPTURE_TIMEOUT:.0f} s")
+        return self._frame.tobytes()
+
+    def _is_speech(self, frame: bytes) -> bool:
+        if self._vad is not None:
+            return self._vad.is_speech(frame, SAMPLE_RATE)
+        return float(np.abs(np.frombuffer(frame, dtype=np.int16).astype(np.int32)).mean()) > ENERGY_THRESHOLD
+
+    @staticmethod
+    def _to_wav(pcm: bytes) -> bytes:
+        """Wrap raw 16 kHz mono PCM in a WAV header, in memory."""
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+    def _process_pcm(self, pcm: bytes, final: bool = True, utterance: int = 0) -> Optional[VoiceInput]:
+        """Process one captured chunk of raw 16 kHz mono PCM.
+
+        ``final`` is False while the speaker is still talking. The local model
+        then commits every segment but the last and carries the remaining
+        audio into the next chunk, so a word cut at the boundary is decoded
+        whole and the carried audio never exceeds ACTIVE_MAX_SAMPLES. Carry
+        left by a different ``utterance`` (one cut short by a pause or whose
+        final chunk was dropped) is discarded.
+        """
+        if self._settings.openai_api_key:
+            return self._process_with_openai(self._to_wav(pcm))
+        if WhisperModel is None:
+            return self._process_with_whisper_local(self._to_wav(pcm))
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if self._carry.size and self._carry_utterance == utterance:
+            audio = np.concatenate((self._carry, audio))
+        self._carry = np.empty(0, dtype=np.float32)
+        segments = self._decode(audio)
+        if segments is None:
             return None
+        if not final and segments:
+            tail = segments.pop()
+            self._carry = audio[int(tail.start * SAMPLE_RATE):][-ACTIVE_MAX_SAMPLES:]
+            self._carry_utterance = utterance
+        return self._voice_input(segments)
 
     def _process_audio(self, audio_data: bytes) -> Optional[VoiceInput]:
         """Process audio data to extract speech."""
         if self._settings.openai_api_key:
             return self._process_with_openai(audio_data)
-        else:
-            return self._process_with_whisper_local(audio_data)
+        if WhisperModel is not None:
+            try:
+                audio = decode_audio(io.BytesIO(audio_data), sampling_rate=SAMPLE_RATE)
+            except Exception as exc:
+                LOGGER.warning("Could not decode audio: %s", exc)
+                return None
+            return self._transcribe_local(audio)
+        return self._process_with_whisper_local(audio_data)
+
+    def _whisper_pipeline(self) -> Any:
+        with self._whisper_lock:
+            if self._whisper is None:
+                settings = self._settings
+                model = WhisperModel(
+                    settings.whisper_model_size,
+                    device="cpu",
+                    compute_type=settings.whisper_compute_type,
+                    cpu_threads=settings.whisper_cpu_threads,
+                )
+                self._whisper = BatchedInferencePipeline(model=model)
+                LOGGER.info(
+                    "Loaded Whisper model %s (%s)", settings.whisper_model_size, settings.whisper_compute_type
+                )
+            return self._whisper
+
+    def _transcribe_local(self, audio: np.ndarray) -> Optional[VoiceInput]:
+        """Transcribe float32 16 kHz audio with the in-process Whisper model."""
+        segments = self._decode(audio)
+        return self._voice_input(segments) if segments else None
+
+    def _decode(self, audio: np.ndarray) -> Optional[List[Any]]:
+        try:
+            segments, _info = self._whisper_pipeline().transcribe(
+                audio,
+                batch_size=WHISPER_BATCH_SIZE,
+                language=self._settings.voice_input_language,
+            )
+            return list(segments)
+        except Exception as exc:
+            LOGGER.warning("Local whisper processing failed: %s", exc)
+            return None
+
+    def _voice_input(self, segments: List[Any]) -> Optional[VoiceInput]:
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        if not text:
+            return None
+        return VoiceInput(
+            text=text,
+            confidence=0.8,  # Local whisper confidence
+            timestamp=time.time(),
+            language=self._settings.voice_input_language
+        )
 
     def _process_with_openai(self, audio_data: bytes) -> Optional[VoiceInput]:
         """Process audio using OpenAI Whisper API."""
         try:
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_file.flush()
-                
-                with open(temp_file.name, "rb") as audio_file:
-                    files = {"file": ("audio.wav", audio_file, "audio/wav")}
-                    data = {
-                        "model": "whisper-1",
-                        "language": "en",
-                        "response_format": "json"
-                    }
-                    headers = {
-                        "Authorization": f"Bearer {self._settings.openai_api_key}"
-                    }
-                    
-                    response = requests.post(
-                        "https://api.openai.com/v1/audio/transcriptions",
-                        files=files,
-                        data=data,
-                        headers=headers,
-                        timeout=30
-                    )
-                    response.raise_for_status()
-                    
-                    result = response.json()
-                    text = result.get("text", "").strip()
-                    
-                    if text:
-                        return VoiceInput(
-                            text=text,
-                            confidence=0.9,  # OpenAI doesn't provide confidence
-                            timestamp=time.time(),
-                            language="en"
-                        )
+            files = {"file": ("audio.wav", io.BytesIO(audio_data), "audio/wav")}
+            data = {
+                "model": "whisper-1",
+                "language": "en",
+                "response_format": "json"
+            }
             
-            # Clean up temp file
-            Path(temp_file.name).unlink(missing_ok=True)
+            response = self._session.post(
+                "https://api.openai.com/v1/audio/transcriptions",
+                files=files,
+                data=data,
+                timeout=30
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            text = result.get("text", "").strip()
+            
+            if text:
+                return VoiceInput(
+                    text=text,
+                    confidence=0.9,  # OpenAI doesn't provide confidence
+                    timestamp=time.time(),
+                    language="en"
+                )
             return None
             
         except Exception as exc:
@@ -216,3 +477,16 @@ class VoiceInputService:
         except Exception as exc:
             LOGGER.exception("Error processing audio file %s: %s", file_path, exc)
             return None
+
+
+def _raise_thread_priority() -> None:
+    """Run the calling thread at realtime priority so Flask and the face renderer can't starve capture."""
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(CAPTURE_RT_PRIORITY))
+        return
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), -10)
+    except (AttributeError, OSError) as exc:
+        LOGGER.info("Audio capture running at normal priority: %s", exc)
@@ -8,7 +8,7 @@ import time
 import threading
 import logging
 from typing import Callable, Optional, Dict, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 
 try:
@@ -53,7 +53,8 @@ class WakeWordService:
     """Wake word detection service with multiple engine support"""
     
     def __init__(self, config: WakeWordConfig, callback: Callable[[], None]):
-        self.config = config
+        # Own copy: the loader caches its config and we flip ``enabled`` on failure.
+        self.config = replace(config)
         self.callback = callback
         self.is_running = False
         self.thread = None
@@ -0,0 +1,110 @@
+"""Push wallpapers to the face display Pi (Pi #2)."""
+from __future__ import annotations
+
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+try:  # paramiko is optional; fall back to scp without it
+    import paramiko  # type: ignore
+except ImportError:  # pragma: no cover - runtime fallback
+    paramiko = None
+
+from app.config import Settings
+
+LOGGER = logging.getLogger("echo.wallpaper_sync")
+
+REMOTE_WALLPAPER_DIR = "/opt/echo-ai/wallpapers"
+# %C is ssh's hash of (local host, remote host, port, user); keeps the path short.
+SSH_CONTROL_PATH = os.path.join(tempfile.gettempdir(), "echo-ssh-%C")
+
+
+class WallpaperSyncService:
+    """Keep one SSH/SFTP session to Pi #2 open and reuse it for every upload."""
+
+    def __init__(self, settings: Settings) -> None:
+        self._host = settings.face_pi_ip
+        self._username = settings.face_pi_user
+        self._lock = threading.Lock()
+        self._client: Optional[Any] = None
+        self._sftp: Optional[Any] = None
+
+    def sync(self, file_path: str, filename: str) -> Dict[str, Any]:
+        remote_path = f"{REMOTE_WALLPAPER_DIR}/{filename}"
+        if paramiko is not None:
+            try:
+                with self._lock:
+                    self._put(file_path, remote_path)
+                return {"success": True, "method": "sftp"}
+            except Exception as exc:
+                LOGGER.warning("SFTP sync to %s failed, falling back to scp: %s", self._host, exc)
+        return self._sync_scp(file_path, remote_path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+    def _put(self, file_path: str, remote_path: str) -> None:
+        # A dropped session surfaces as EOFError/OSError/SSHException on the
+        # next transfer; reconnect once and retry before giving up.
+        for attempt in range(2):
+            sftp = self._session()
+            try:
+                sftp.put(file_path, remote_path)
+                return
+            except (EOFError, OSError, paramiko.SSHException):
+                self._disconnect()
+                if attempt:
+                    raise
+
+    def _session(self) -> Any:
+        transport = self._client.get_transport() if self._client else None
+        if self._sftp is not None and transport is not None and transport.is_active():
+            return self._sftp
+        self._disconnect()
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        # Mirrors the previous scp invocation's StrictHostKeyChecking=no.
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(self._host, username=self._username, timeout=10, compress=False)
+        client.get_transport().set_keepalive(30)
+        self._client = client
+        self._sftp = client.open_sftp()
+        LOGGER.info("Opened SFTP session to %s@%s", self._username, self._host)
+        return self._sftp
+
+    def _disconnect(self) -> None:
+        for handle in (self._sftp, self._client):
+            if handle is not None:
+                try:
+                    handle.close()
+                except Exception:
+                    pass
+        self._sftp = None
+        self._client = None
+
+    def _sync_scp(self, file_path: str, remote_path: str) -> Dict[str, Any]:
+        # ControlMaster=auto lets the first scp leave a master connection behind
+        # (ControlPersist) that later uploads multiplex over, skipping the handshake.
+        scp_cmd = [
+            'scp', '-o', 'ConnectTimeout=10', '-o', 'StrictHostKeyChecking=no',
+            '-o', 'ControlMaster=auto', '-o', f'ControlPath={SSH_CONTROL_PATH}',
+            '-o', 'ControlPersist=10m',
+            file_path, f'{self._username}@{self._host}:{remote_path}'
+        ]
+        try:
+            result = subprocess.run(scp_cmd, capture_output=True, timeout=30)
+        except subprocess.TimeoutExpired:
+            return {"success": False, "error": "SCP timeout", "method": "scp"}
+        except Exception as exc:
+            return {"success": False, "error": str(exc), "method": "scp"}
+        if result.returncode == 0:
+            return {"success": True, "method": "scp"}
+        return {
+            "success": False,
+            "error": f"SCP failed: {result.stderr.decode() if result.stderr else 'Unknown error'}",
+            "method": "scp"
+        }
@@ -1,27 +1,23 @@
 """Environment helpers for Project Echo."""
 from __future__ import annotations
 
+import os
+import re
 from pathlib import Path
 from typing import Iterable
 
+# One KEY=value assignment per line; comments and blank lines never match.
+_ENV_RE = re.compile(r"^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t\r]*$", re.MULTILINE)
+
 
 def load_env_file(path: Path | str) -> None:
     """Load key=value pairs from a .env style file into the process environment."""
-    import os
-
     file_path = Path(path)
     if not file_path.exists():
         return
 
-    for raw_line in file_path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip()
-        if not key or key in os.environ:
-            continue
-        os.environ[key] = value.strip()
+    for match in _ENV_RE.finditer(file_path.read_text(encoding="utf-8")):
+        os.environ.setdefault(match.group(1), match.group(2))
 
 
 def load_first_existing(paths: Iterable[Path | str]) -> None:
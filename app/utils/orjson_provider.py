@@ -0,0 +1,45 @@
+"""orjson-backed JSON serialization for Flask responses."""
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Route ``jsonify``/``request.get_json`` through orjson instead of stdlib json."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """Serialize a pre-built payload straight to a response, bypassing ``jsonify``."""
+    return Response(orjson.dumps(payload, option=ORJSON_OPTIONS), status=status, mimetype="application/json")
+
+
+def json_body() -> Any:
+    """Decode the request body with orjson, skipping Flask's mimetype checks.
+
+    Returns ``{}`` for an empty body and ``None`` when the body is not valid JSON,
+    matching what ``request.get_json(silent=True)`` callers already handle.
+    """
+    raw = request.get_data(cache=False)
+    if not raw:
+        return {}
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return None
@@ -0,0 +1,62 @@
+"""Single-producer/single-consumer ring buffer for 16-bit PCM samples."""
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+
+
+class SampleRingBuffer:
+    """Fixed-size int16 ring shared by one writer thread and one reader thread.
+
+    Storage is allocated once; push/pop copy into and out of it with slice
+    assignments. Only the writer advances ``_written`` and only the reader
+    advances ``_read``, so neither side takes a lock. When the reader falls
+    behind by more than the capacity, the oldest samples are overwritten.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._capacity = capacity
+        # Monotonic sample counters; the slot is the counter modulo capacity.
+        self._written = 0
+        self._read = 0
+        self._ready = threading.Event()
+
+    def available(self) -> int:
+        return min(self._written - self._read, self._capacity)
+
+    def push(self, samples: np.ndarray) -> None:
+        count = len(samples)
+        if count > self._capacity:
+            samples = samples[-self._capacity:]
+            count = self._capacity
+        start = self._written % self._capacity
+        first = min(count, self._capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:count - first] = samples[first:]
+        self._written += count
+        self._ready.set()
+
+    def pop_into(self, out: np.ndarray, timeout: float) -> bool:
+        """Fill ``out`` with the next ``len(out)`` samples; False if they did not arrive in time."""
+        count = len(out)
+        while self._written - self._read < count:
+            self._ready.clear()
+            # Re-check after clearing so a push between the test and clear is not missed.
+            if self._written - self._read >= count:
+                break
+            if not self._ready.wait(timeout):
+                return False
+        if self._written - self._read > self._capacity:
+            self._read = self._written - self._capacity  # overrun: skip what was overwritten
+        start = self._read % self._capacity
+        first = min(count, self._capacity - start)
+        out[:first] = self._data[start:start + first]
+        out[first:] = self._data[:count - first]
+        self._read += count
+        return True
+
+    def clear(self) -> None:
+        """Drop everything written so far (reader side)."""
+        self._read = self._written
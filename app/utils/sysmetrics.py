@@ -0,0 +1,76 @@
+"""Cached host metrics for the lightweight status endpoint."""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+try:  # psutil is optional during development
+    import psutil  # type: ignore
+except ImportError:  # pragma: no cover - runtime fallback
+    psutil = None
+
+THERMAL_ZONE_PATH = "/sys/class/thermal/thermal_zone0/temp"
+STATUS_CACHE_TTL = 1.0
+
+_lock = threading.Lock()
+_cache: Dict[str, Any] = {"t": 0.0, "v": None}
+# None = not opened yet, -1 = no thermal zone on this host.
+_thermal_fd: Optional[int] = None
+
+
+@lru_cache(maxsize=1)
+def boot_time() -> float:
+    """Boot time never changes while we are running, so read /proc/stat once."""
+    if psutil is None:
+        raise RuntimeError("psutil is not installed")
+    return psutil.boot_time()
+
+
+def status_snapshot(core: Dict[str, Any]) -> Dict[str, Any]:
+    """Return cpu/memory/disk/temperature readings, refreshed at most once per TTL.
+
+    CPU and memory come from ``core``, the MetricsService background sample,
+    so no request thread ever computes a cpu_percent delta of its own.
+    """
+    if psutil is None:
+        raise RuntimeError("psutil is not installed")
+    now = time.monotonic()
+    with _lock:
+        cached = _cache["v"]
+        if cached is not None and now - _cache["t"] < STATUS_CACHE_TTL:
+            return cached
+        memory = core.get("memory")
+        if memory is None:  # the sampler has not completed its first interval yet
+            memory = psutil.virtual_memory()._asdict()
+        disk = psutil.disk_usage("/")
+        snapshot = {
+            "cpu_usage": core.get("cpu_percent") or 0.0,
+            "memory_usage": memory["percent"],
+            "memory_available": memory["available"],
+            "disk_usage": disk.percent,
+            "disk_free": disk.free,
+            "temperature": _read_temperature(),
+        }
+        _cache["t"] = now
+        _cache["v"] = snapshot
+        return snapshot
+
+
+def _read_temperature() -> float:
+    # sysfs attributes regenerate on every read from offset 0, so keep the fd
+    # open and pread() it instead of an open/read/close cycle per poll.
+    global _thermal_fd
+    if _thermal_fd == -1:
+        return 0.0
+    try:
+        if _thermal_fd is None:
+            _thermal_fd = os.open(THERMAL_ZONE_PATH, os.O_RDONLY)
+        return float(os.pread(_thermal_fd, 16, 0)) / 1000.0
+    except FileNotFoundError:
+        _thermal_fd = -1
+        return 0.0
+    except (OSError, ValueError):
+        return 0.0
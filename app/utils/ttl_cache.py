@@ -0,0 +1,42 @@
+"""Small in-process TTL memoization helper."""
+from __future__ import annotations
+
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+
+def ttl_cache(ttl: float) -> Callable[[F], F]:
+    """Memoize a function's result per positional arguments for ``ttl`` seconds.
+
+    Callers can pass ``force=True`` to skip the cached value and refresh it.
+    """
+
+    def decorator(func: F) -> F:
+        lock = threading.Lock()
+        entries: Dict[Tuple[Any, ...], Tuple[float, Any]] = {}
+
+        @wraps(func)
+        def wrapper(*args: Any, force: bool = False) -> Any:
+            now = time.monotonic()
+            if not force:
+                with lock:
+                    entry = entries.get(args)
+                if entry is not None and now - entry[0] < ttl:
+                    return entry[1]
+            value = func(*args)
+            with lock:
+                entries[args] = (time.monotonic(), value)
+            return value
+
+        def cache_clear() -> None:
+            with lock:
+                entries.clear()
+
+        wrapper.cache_clear = cache_clear  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
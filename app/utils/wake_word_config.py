@@ -3,11 +3,28 @@ Wake word configuration utilities
 """
 
 import os
+from functools import lru_cache
+from importlib.util import find_spec
 from typing import Optional
-from app.services.wake_word_service import WakeWordConfig, WakeWordEngine
+from app.services.wake_word_service import (
+    PORCUPINE_AVAILABLE,
+    PYAUDIO_AVAILABLE,
+    SNOWBOY_AVAILABLE,
+    WakeWordConfig,
+    WakeWordEngine,
+)
 
+# The service module already tried importing the other engines; vosk is only
+# probed here, and find_spec locates it without executing the package.
+VOSK_INSTALLED = find_spec("vosk") is not None
+
+@lru_cache(maxsize=1)
 def load_wake_word_config() -> WakeWordConfig:
-    """Load wake word configuration from environment variables"""
+    """Load wake word configuration from environment variables
+
+    The result is cached; call ``load_wake_word_config.cache_clear()`` after
+    changing the environment to pick up new values.
+    """
     
     # Basic settings
     enabled = os.getenv('ECHO_WAKE_WORD_ENABLED', '1').lower() in ('1', 'true', 'yes')
@@ -67,33 +84,15 @@ def load_wake_word_config() -> WakeWordConfig:
 
 def get_available_engines() -> dict:
     """Get information about available wake word engines"""
-    try:
-        import pvporcupine
-        porcupine_available = True
-    except ImportError:
-        porcupine_available = False
-    
-    try:
-        import snowboydecoder
-        snowboy_available = True
-    except ImportError:
-        snowboy_available = False
-    
-    try:
-        import pyaudio
-        pyaudio_available = True
-    except ImportError:
-        pyaudio_available = False
-    
     return {
         'porcupine': {
-            'available': porcupine_available,
+            'available': PORCUPINE_AVAILABLE,
             'description': 'Picovoice Porcupine - High accuracy, requires API key',
             'install': 'pip install pvporcupine',
             'setup': 'Get API key from https://picovoice.ai/'
         },
         'snowboy': {
-            'available': snowboy_available,
+            'available': SNOWBOY_AVAILABLE,
             'description': 'Snowboy - Offline, requires model file',
             'install': 'pip install snowboy',
             'setup': 'Download model file and set SNOWBOY_MODEL_PATH'
@@ -105,7 +104,7 @@ def get_available_engines() -> dict:
             'setup': 'Download model from https://alphacephei.com/vosk/models'
         },
         'pyaudio': {
-            'available': pyaudio_available,
+            'available': PYAUDIO_AVAILABLE,
             'description': 'PyAudio - Required for all engines',
             'install': 'pip install pyaudio',
             'setup': 'May require system audio libraries'
@@ -120,26 +119,20 @@ def validate_wake_word_config(config: WakeWordConfig) -> list:
         return issues  # No validation needed if disabled
     
     # Check if PyAudio is available
-    try:
-        import pyaudio
-    except ImportError:
+    if not PYAUDIO_AVAILABLE:
         issues.append("PyAudio not installed - required for wake word detection")
         return issues
     
     # Check engine-specific requirements
     if config.engine == WakeWordEngine.PORCUPINE:
-        try:
-            import pvporcupine
-        except ImportError:
+        if not PORCUPINE_AVAILABLE:
             issues.append("Porcupine not installed - run: pip install pvporcupine")
         
         if not os.getenv('PORCUPINE_ACCESS_KEY'):
             issues.append("PORCUPINE_ACCESS_KEY not set - get from https://picovoice.ai/")
     
     elif config.engine == WakeWordEngine.SNOWBOY:
-        try:
-            import snowboydecoder
-        except ImportError:
+        if not SNOWBOY_AVAILABLE:
             issues.append("Snowboy not installed - run: pip install snowboy")
         
         model_path = os.getenv('SNOWBOY_MODEL_PATH', 'resources/snowboy_hey_echo.pmdl')
@@ -147,9 +140,7 @@ def validate_wake_word_config(config: WakeWordConfig) -> list:
             issues.append(f"Snowboy model not found at {model_path}")
     
     elif config.engine == WakeWordEngine.VOSK:
-        try:
-            import vosk
-        except ImportError:
+        if not VOSK_INSTALLED:
             issues.append("Vosk not installed - run: pip install vosk")
         
         model_path = os.getenv('VOSK_MODEL_PATH', 'models/vosk-model-small-en-us-0.15')
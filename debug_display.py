@@ -1,8 +1,34 @@
 #!/usr/bin/env python3
 """Debug script to test display drivers and show what's available."""
 
+import multiprocessing
 import os
 import sys
+from typing import List, Tuple
+
+def _probe(driver: str) -> Tuple[str, bool, List[str]]:
+    """Try to open and draw on a window with one SDL video driver."""
+    os.environ['SDL_VIDEODRIVER'] = driver
+    lines = []
+    try:
+        import pygame
+        pygame.init()
+        
+        # Try to create a display
+        screen = pygame.display.set_mode((100, 100), 0)
+        lines.append(f"✅ {driver} driver works!")
+        
+        # Try to draw something
+        screen.fill((255, 0, 0))  # Red background
+        pygame.draw.circle(screen, (0, 255, 0), (50, 50), 20)  # Green circle
+        pygame.display.flip()
+        lines.append(f"✅ {driver} driver can draw!")
+        
+        pygame.quit()
+        return driver, True, lines
+    except Exception as e:
+        lines.append(f"❌ {driver} driver failed: {e}")
+        return driver, False, lines
 
 def test_display_drivers():
     print("=== Display Driver Debug ===")
@@ -27,30 +53,16 @@ def test_display_drivers():
         print(f"❌ Pygame init failed: {e}")
         return
     
-    # Test different drivers
+    # Test different drivers, each in a fresh process so they run in parallel
+    # and none inherits SDL state from a previous attempt.
     drivers = ["x11", "fbcon", "dummy"]
+    with multiprocessing.get_context("spawn").Pool(len(drivers)) as pool:
+        results = pool.map(_probe, drivers)
     
-    for driver in drivers:
+    for driver, _ok, lines in results:
         print(f"\n--- Testing {driver} driver ---")
-        os.environ['SDL_VIDEODRIVER'] = driver
-        
-        try:
-            # Try to create a display
-            screen = pygame.display.set_mode((100, 100), 0)
-            print(f"✅ {driver} driver works!")
-            
-            # Try to draw something
-            screen.fill((255, 0, 0))  # Red background
-            pygame.draw.circle(screen, (0, 255, 0), (50, 50), 20)  # Green circle
-            pygame.display.flip()
-            print(f"✅ {driver} driver can draw!")
-            
-            # Clean up
-            pygame.quit()
-            pygame.init()  # Reinit for next test
-            
-        except Exception as e:
-            print(f"❌ {driver} driver failed: {e}")
+        for line in lines:
+            print(line)
     
     # Check available video drivers
     print(f"\n--- Available video drivers ---")
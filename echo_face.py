@@ -6,7 +6,9 @@ import json
 import math
 import os
 import time
+from functools import lru_cache
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 import pygame
 
@@ -14,6 +16,14 @@ from app.config import Settings
 from app.utils.env import load_first_existing
 
 BASE_DIR = Path(__file__).resolve().parent if '__file__' in globals() else Path('/opt/echo-ai')
+WALLPAPER_PATH = "/opt/echo-ai/wallpapers/wallpaper.jpg"
+BACKGROUND_COLOR = (5, 5, 12)
+MOUTH_COLOR = (0, 200, 255)
+
+# Regions drawn last frame (restored from the background before redrawing)
+# and the background they were drawn over.
+_last_rects: List[pygame.Rect] = []
+_last_background: Optional[pygame.Surface] = None
 
 
 def load_state(state_path: Path) -> dict:
@@ -37,7 +47,7 @@ def load_state(state_path: Path) -> dict:
 
 def load_wallpaper(surface: pygame.Surface) -> pygame.Surface | None:
     """Load wallpaper if it exists"""
-    wallpaper_path = "/opt/echo-ai/wallpapers/wallpaper.jpg"
+    wallpaper_path = WALLPAPER_PATH
     video_path = "/opt/echo-ai/wallpapers/wallpaper.mp4"
     
     # Try image first
@@ -73,20 +83,58 @@ def load_wallpaper(surface: pygame.Surface) -> pygame.Surface | None:
     return None
 
 
-def draw_face(surface: pygame.Surface, mood: str, timestamp: float) -> None:
-    width, height = surface.get_size()
-    
-    # Try to load and draw wallpaper
-    wallpaper = load_wallpaper(surface)
+def _wallpaper_mtime() -> float:
+    try:
+        return os.stat(WALLPAPER_PATH).st_mtime
+    except OSError:
+        return 0.0
+
+
+@lru_cache(maxsize=2)
+def _background(size: Tuple[int, int], wallpaper_mtime: float) -> pygame.Surface:
+    """Screen-sized background, rebuilt only when the size or wallpaper file changes."""
+    background = pygame.Surface(size)
+    background.fill(BACKGROUND_COLOR)
+    wallpaper = load_wallpaper(background)
     if wallpaper:
         # Center the wallpaper
         wallpaper_width, wallpaper_height = wallpaper.get_size()
-        x = (width - wallpaper_width) // 2
-        y = (height - wallpaper_height) // 2
-        surface.blit(wallpaper, (x, y))
+        background.blit(wallpaper, ((size[0] - wallpaper_width) // 2, (size[1] - wallpaper_height) // 2))
+    return background
+
+
+@lru_cache(maxsize=64)
+def _eye_surface(color: Tuple[int, int, int], radius: int) -> pygame.Surface:
+    # pulse only takes a handful of integer values, so every eye is rasterized once.
+    eye = pygame.Surface((2 * radius + 2, 2 * radius + 2), pygame.SRCALPHA)
+    pygame.draw.circle(eye, color, (radius + 1, radius + 1), radius, width=4)
+    return eye
+
+
+@lru_cache(maxsize=4)
+def _mouth_surface(mouth_w: int, mouth_h: int) -> pygame.Surface:
+    mouth = pygame.Surface((mouth_w, mouth_h), pygame.SRCALPHA)
+    start_angle = math.pi * 0.1
+    end_angle = math.pi * 0.9
+    pygame.draw.arc(mouth, MOUTH_COLOR, mouth.get_rect(), start_angle, end_angle, width=6)
+    return mouth
+
+
+def draw_face(surface: pygame.Surface, mood: str, timestamp: float) -> List[pygame.Rect]:
+    """Draw the face and return the screen regions that changed."""
+    global _last_background, _last_rects
+    width, height = surface.get_size()
+    
+    background = _background((width, height), _wallpaper_mtime())
+    if background is not _last_background:
+        surface.blit(background, (0, 0))
+        _last_background = background
+        dirty = [surface.get_rect()]
     else:
-        # Default background if no wallpaper
-        surface.fill((5, 5, 12))
+        # Only the previous eyes and mouth need wiping.
+        for rect in _last_rects:
+            surface.blit(background, rect, rect)
+        dirty = list(_last_rects)
     
     eye_y = int(height * 0.33)
     eye_dx = int(width * 0.22)
@@ -105,17 +153,20 @@ def draw_face(surface: pygame.Surface, mood: str, timestamp: float) -> None:
     elif mood == "idle":
         pulse = int(4 * abs(math.sin(timestamp * 3)))
 
+    rects = []
+    eye = _eye_surface(color, eye_radius + pulse)
+    offset = eye_radius + pulse + 1
     for direction in (-1, 1):
-        center = (width // 2 + direction * eye_dx, eye_y)
-        pygame.draw.circle(surface, color, center, eye_radius + pulse, width=4)
+        center_x = width // 2 + direction * eye_dx
+        rects.append(surface.blit(eye, (center_x - offset, eye_y - offset)))
 
     mouth_y = int(height * 0.68)
     mouth_w = int(width * 0.36)
     mouth_h = 60 if mood != "sleeping" else 12
-    rect = pygame.Rect(width // 2 - mouth_w // 2, mouth_y - mouth_h // 2, mouth_w, mouth_h)
-    start_angle = math.pi * 0.1
-    end_angle = math.pi * 0.9
-    pygame.draw.arc(surface, (0, 200, 255), rect, start_angle, end_angle, width=6)
+    rects.append(surface.blit(_mouth_surface(mouth_w, mouth_h), (width // 2 - mouth_w // 2, mouth_y - mouth_h // 2)))
+
+    _last_rects = rects
+    return dirty + rects
 
 
 def main() -> None:
@@ -203,8 +254,8 @@ def main() -> None:
                 current_mood = "idle"  # Default fallback
             
             # Draw the face
-            draw_face(screen, current_mood, now)
-            pygame.display.flip()
+            dirty = draw_face(screen, current_mood, now)
+            pygame.display.update(dirty)
             
             # Limit to 30 FPS to reduce CPU usage
             clock.tick(30)
@@ -0,0 +1,49 @@
+"""Conditional GETs of /api/ai/conversation through the compressed app."""
+import os
+import tempfile
+import unittest
+
+from app import create_app
+
+
+class ConversationETagTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._data_dir = tempfile.TemporaryDirectory()
+        os.environ.update(
+            ECHO_DATA_DIR=cls._data_dir.name,
+            ECHO_VOICE_INPUT_ENABLED="0",
+            ECHO_API_TOKEN="change-me",
+        )
+        cls.app = create_app()
+        chat_log = cls.app.extensions["chat_log_service"]
+        # Enough history that the JSON body crosses COMPRESS_MIN_SIZE.
+        for index in range(20):
+            chat_log.log_user_input(f"message {index} " + "x" * 80, input_type="text")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._data_dir.cleanup()
+
+    def test_compressed_etag_round_trips_to_304(self) -> None:
+        client = self.app.test_client()
+        headers = {"Accept-Encoding": "br"}
+        first = client.get("/api/ai/conversation", headers=headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers.get("Content-Encoding"), "br")
+        etag = first.headers["ETag"]
+        self.assertTrue(etag.endswith(':br"'))
+
+        second = client.get("/api/ai/conversation", headers={**headers, "If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+
+    def test_new_message_invalidates_etag(self) -> None:
+        client = self.app.test_client()
+        etag = client.get("/api/ai/conversation", headers={"Accept-Encoding": "br"}).headers["ETag"]
+        self.app.extensions["chat_log_service"].log_user_input("one more", input_type="text")
+        response = client.get("/api/ai/conversation", headers={"Accept-Encoding": "br", "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
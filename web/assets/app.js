@@ -27,6 +27,32 @@ class EchoDashboard {
         return apiUrl;
     }
 
+    // Poll a background task (WiFi/Bluetooth scans and connects) until it finishes
+    async waitForTask(taskId, { interval = 1000, timeout = 120000 } = {}) {
+        const apiUrl = this.getApiUrl();
+        const apiKey = this.settings.echoApiKey || 'Lolo6750';
+        const deadline = Date.now() + timeout;
+
+        while (Date.now() < deadline) {
+            const response = await fetch(`${apiUrl}/api/tasks/${taskId}`, {
+                method: 'GET',
+                headers: { 'X-API-Key': apiKey }
+            });
+            if (!response.ok) {
+                throw new Error('Failed to poll task');
+            }
+            const task = await response.json();
+            if (task.state === 'succeeded') {
+                return task.result;
+            }
+            if (task.state === 'failed') {
+                throw new Error(task.error || 'Task failed');
+            }
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+        throw new Error('Task timed out');
+    }
+
     // Test API connectivity
     async testApiConnectivity() {
         // Show testing message
@@ -167,7 +193,7 @@ class EchoDashboard {
             scanWifi.addEventListener('click', () => this.scanWiFiNetworks());
         }
         if (refreshWifi) {
-            refreshWifi.addEventListener('click', () => this.scanWiFiNetworks());
+            refreshWifi.addEventListener('click', () => this.scanWiFiNetworks(true));
         }
         if (connectWifi) {
             connectWifi.addEventListener('click', () => this.connectToWiFi());
@@ -182,7 +208,7 @@ class EchoDashboard {
             scanBluetooth.addEventListener('click', () => this.scanBluetoothDevices());
         }
         if (refreshBluetooth) {
-            refreshBluetooth.addEventListener('click', () => this.scanBluetoothDevices());
+            refreshBluetooth.addEventListener('click', () => this.scanBluetoothDevices(true));
         }
         if (bluetoothEnabled) {
             bluetoothEnabled.addEventListener('change', () => this.toggleBluetooth());
@@ -1092,19 +1118,20 @@ class EchoDashboard {
     }
 
     // WiFi Functions
-    async scanWiFiNetworks() {
+    async scanWiFiNetworks(force = false) {
         try {
             this.showNotification('Scanning for WiFi networks...', 'info');
             const apiUrl = this.getApiUrl();
             const apiKey = this.settings.echoApiKey || 'Lolo6750';
 
-            const response = await fetch(`${apiUrl}/api/wifi/scan`, {
+            const response = await fetch(`${apiUrl}/api/wifi/scan${force ? '?force=1' : ''}`, {
                 method: 'GET',
                 headers: { 'X-API-Key': apiKey }
             });
 
             if (response.ok) {
-                const data = await response.json();
+                const { task_id } = await response.json();
+                const data = await this.waitForTask(task_id);
                 console.log('WiFi scan response:', data);
                 if (data.debug && data.debug.attempts) {
                     console.log('WiFi debug info:', data.debug);
@@ -1194,8 +1221,13 @@ class EchoDashboard {
             });
 
             if (response.ok) {
-                const result = await response.json();
-                this.showNotification(result.message || `Connecting to ${ssid}...`, 'info');
+                const task = await response.json();
+                this.showNotification(task.message || `Connecting to ${ssid}...`, 'info');
+                const result = await this.waitForTask(task.task_id);
+                if (!result.ok) {
+                    throw new Error(result.error || 'Failed to connect to WiFi');
+                }
+                this.showNotification(result.message, 'success');
             } else {
                 const error = await response.json();
                 console.error('WiFi connect error:', error);
@@ -1208,19 +1240,21 @@ class EchoDashboard {
     }
 
     // Bluetooth Functions
-    async scanBluetoothDevices() {
+    async scanBluetoothDevices(force = false) {
         try {
             this.showNotification('Scanning for Bluetooth devices...', 'info');
             const apiUrl = this.getApiUrl();
             const apiKey = this.settings.echoApiKey || 'Lolo6750';
 
-            const response = await fetch(`${apiUrl}/api/bluetooth/scan`, {
+            const response = await fetch(`${apiUrl}/api/bluetooth/scan${force ? '?force=1' : ''}`, {
                 method: 'GET',
                 headers: { 'X-API-Key': apiKey }
             });
 
             if (response.ok) {
-                const data = await response.json();
+                // 200 = live discovery snapshot, 202 = fallback scan running as a task
+                const body = await response.json();
+                const data = response.status === 202 ? await this.waitForTask(body.task_id) : body;
                 console.log('Bluetooth scan response:', data);
                 if (data.debug && data.debug.attempts) {
                     console.log('Bluetooth debug info:', data.debug);
@@ -1282,8 +1316,13 @@ class EchoDashboard {
             });
 
             if (response.ok) {
-                const result = await response.json();
-                this.showNotification(result.message || 'Connecting to device...', 'info');
+                const task = await response.json();
+                this.showNotification(task.message || 'Connecting to device...', 'info');
+                const result = await this.waitForTask(task.task_id);
+                if (!result.ok) {
+                    throw new Error(result.error || 'Failed to connect to device');
+                }
+                this.showNotification(result.message, 'success');
             } else {
                 const error = await response.json();
                 console.error('Bluetooth connect error:', error);